@@ -8,6 +8,7 @@ from app.auth.jwt import (
 )
 from app.auth.dependencies import (
     get_current_user,
+    get_current_user_record,
     get_current_active_user,
     require_role,
     check_resource_access,
@@ -21,6 +22,7 @@ __all__ = [
     "create_refresh_token",
     "verify_token",
     "get_current_user",
+    "get_current_user_record",
     "get_current_active_user",
     "require_role",
     "check_resource_access",
@@ -1,15 +1,99 @@
 """
 Access Code Authentication Dependency
 For Chrome Extension endpoints (no JWT required)
+
+Extension syncs and bot ingests are the highest-frequency callers, so the
+code -> user resolution is cached in-process for a short TTL. Entries are
+keyed by the SHA-256 of the code, so plaintext codes are not kept in
+memory as cache keys; a miss is an equality lookup on the unique
+users.access_code index. Regenerating a code or deactivating/re-roling a
+user drops the user's entries, and other workers pick the change up within
+the TTL.
 """
 from fastapi import Header, HTTPException, status, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from typing import Optional
+import hashlib
 
-from app.database import get_db
+from app.config import settings
+from app.core.ttl_cache import TTLCache
+from app.database import get_db, get_async_db
 from app.models.user import User
 
 
-async def verify_access_code(
+@dataclass(frozen=True)
+class AccessCodeEntry:
+    """What an access code resolves to"""
+    code_digest: str
+    user_id: int
+    username: str
+    role: str
+    is_active: bool
+
+
+def hash_access_code(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class AccessCodeCache(TTLCache[str, AccessCodeEntry]):
+    """Keyed by the access code's SHA-256 (see hash_access_code)"""
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.invalidate_where(lambda _, entry: entry.user_id == user_id)
+
+
+access_code_cache = AccessCodeCache(settings.access_code_cache_ttl_seconds)
+
+_ACCESS_CODE_COLUMNS = (User.id, User.username, User.role, User.is_active)
+
+
+def _entry_from_row(code: str, row) -> Optional[AccessCodeEntry]:
+    if row is None:
+        return None
+    entry = AccessCodeEntry(
+        code_digest=hash_access_code(code),
+        user_id=row.id,
+        username=row.username,
+        role=row.role,
+        is_active=bool(row.is_active)
+    )
+    access_code_cache.put(entry.code_digest, entry)
+    return entry
+
+
+def _check_access_code_user(entry: Optional[AccessCodeEntry]) -> User:
+    """
+    Raise the standard 401/403 for a missing or disabled access-code user.
+    Returns a User not attached to any session, with id, username, role
+    and is_active set.
+    """
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid access code. Please check your code in Settings."
+        )
+    
+    if not entry.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is disabled. Contact administrator."
+        )
+    
+    return User(id=entry.user_id, username=entry.username, role=entry.role, is_active=True)
+
+
+def _require_header(x_access_code: Optional[str]) -> None:
+    if not x_access_code:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="X-Access-Code header required. Generate code from Settings page."
+        )
+
+
+def verify_access_code(
     x_access_code: str = Header(None, alias="X-Access-Code"),
     db: Session = Depends(get_db)
 ) -> User:
@@ -17,7 +101,9 @@ async def verify_access_code(
     Verify X-Access-Code header and return associated user.
     
     Used by extension endpoints instead of JWT authentication.
-    Returns the user if code is valid and active.
+    Returns the user if code is valid and active. Declared sync so
+    FastAPI runs the lookup (on a cache miss) in its threadpool, off the
+    event loop.
     
     Args:
         x_access_code: Access code from X-Access-Code header
@@ -30,25 +116,24 @@ async def verify_access_code(
         401: If header missing or code invalid
         403: If user account disabled
     """
-    if not x_access_code:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="X-Access-Code header required. Generate code from Settings page."
-        )
-    
-    # Find user by access code
-    user = db.query(User).filter(User.access_code == x_access_code).first()
+    _require_header(x_access_code)
     
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid access code. Please check your code in Settings."
-        )
-    
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is disabled. Contact administrator."
-        )
+    entry = access_code_cache.get(hash_access_code(x_access_code))
+    if entry is None:
+        row = db.query(*_ACCESS_CODE_COLUMNS).filter(User.access_code == x_access_code).first()
+        entry = _entry_from_row(x_access_code, row)
+    return _check_access_code_user(entry)
+
+
+async def verify_access_code_async(
+    x_access_code: str = Header(None, alias="X-Access-Code"),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """verify_access_code for endpoints running on an AsyncSession"""
+    _require_header(x_access_code)
     
-    return user
+    entry = access_code_cache.get(hash_access_code(x_access_code))
+    if entry is None:
+        result = await db.execute(select(*_ACCESS_CODE_COLUMNS).where(User.access_code == x_access_code))
+        entry = _entry_from_row(x_access_code, result.first())
+    return _check_access_code_user(entry)
@@ -10,6 +10,7 @@ from typing import Optional
 from app.database import get_db
 from app.models.user import User
 from app.auth.jwt import verify_token
+from app.auth.user_state import load_user_state
 
 # HTTP Bearer security scheme
 security = HTTPBearer()
@@ -34,20 +35,14 @@ def normalize_role(role: str) -> str:
         return ""
     return role.strip().lower().replace(" ", "_").replace("-", "_")
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+def _authenticate(token: str, db: Session) -> User:
     """
-    Get current authenticated user from JWT token.
-    
-    Raises:
-        HTTPException: If token is invalid or user not found
+    Validate an access token against the cached user state and return a
+    detached User built from its claims (id, username, role).
     """
-    token = credentials.credentials
     payload = verify_token(token)
     
-    if not payload:
+    if not payload or payload.get("type") == "refresh":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
@@ -61,7 +56,7 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
-    # Convert string sub to integer for database query
+    # Convert string sub to integer
     try:
         user_id = int(user_id)
     except (ValueError, TypeError):
@@ -70,28 +65,72 @@ async def get_current_user(
             detail="Invalid user ID in token"
         )
     
-    # Fetch user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    state = load_user_state(db, user_id)
     
-    if not user:
+    if state is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
     
-    if not user.is_active:
+    if not state.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
     
-    # Normalize role on the fly
-    user.role = normalize_role(user.role)
+    # Role and activation changes bump the version and revoke older tokens
+    if payload.get("ver", 0) != state.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return User(
+        id=user_id,
+        username=payload.get("username"),
+        role=normalize_role(state.role),
+        is_active=True,
+        token_version=state.token_version
+    )
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Get current authenticated user from JWT token.
+    
+    Trusts the signed claims; only the user's active flag and token version
+    are checked (from a short-lived cache), so most requests run no user
+    query. The returned User is not attached to a session and only has id,
+    username, role and is_active set; use get_current_user_record for the
+    full row.
     
+    Raises:
+        HTTPException: If token is invalid, revoked or user not found
+    """
+    return _authenticate(credentials.credentials, db)
+
+
+def get_current_user_record(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Current user loaded from the database (for profile reads and updates)"""
+    user = db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    user.role = normalize_role(user.role)
     return user
 
 
-async def get_current_active_user(
+def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
     """Ensure user is active (redundant check)"""
@@ -166,7 +205,7 @@ def check_resource_access(user: User, resource_owner_id: int) -> bool:
     return False
 
 
-async def get_optional_current_user(
+def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: Session = Depends(get_db)
 ) -> Optional[User]:
@@ -178,15 +217,6 @@ async def get_optional_current_user(
         return None
     
     try:
-        token = credentials.credentials
-        payload = verify_token(token)
-        
-        if not payload:
-            return None
-        
-        user_id = payload.get("sub")
-        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-        return user
-        
-    except Exception:
+        return _authenticate(credentials.credentials, db)
+    except HTTPException:
         return None
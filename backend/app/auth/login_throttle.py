@@ -0,0 +1,90 @@
+"""
+Login Throttle
+In-process failed-login throttling per client IP and per username.
+
+Failures are kept as timestamps in a sliding window; once a key reaches its
+limit, further attempts are refused (429) before any password check or
+database read, so a guessing burst costs neither bcrypt time nor queries.
+A successful login clears the username's failures.
+"""
+from collections import deque
+from typing import Deque, Dict, Optional
+import threading
+import time
+
+from app.config import settings
+
+
+class LoginThrottle:
+    """Sliding-window failure counters keyed by ("ip", addr) and ("user", name)"""
+
+    def __init__(self, window_seconds: int, max_per_user: int, max_per_ip: int, max_keys: int = 50000):
+        self.window_seconds = window_seconds
+        self.max_per_user = max_per_user
+        self.max_per_ip = max_per_ip
+        self.max_keys = max_keys
+        self._failures: Dict[tuple, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def _recent(self, key: tuple, now: float) -> Deque[float]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return deque()
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+
+    def retry_after(self, ip: Optional[str], username: str) -> int:
+        """Seconds until an attempt is allowed again; 0 when not throttled"""
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key, limit in ((("ip", ip), self.max_per_ip), (("user", username.lower()), self.max_per_user)):
+                if key[1] is None or limit <= 0:
+                    continue
+                failures = self._recent(key, now)
+                if len(failures) >= limit:
+                    wait = max(wait, failures[len(failures) - limit] + self.window_seconds - now)
+            if wait > 0:
+                self.blocked += 1
+        return int(wait) + 1 if wait > 0 else 0
+
+    def record_failure(self, ip: Optional[str], username: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._failures) >= self.max_keys:
+                for key in list(self._failures):
+                    self._recent(key, now)
+                if len(self._failures) >= self.max_keys:
+                    self._failures.clear()
+            for key in (("ip", ip), ("user", username.lower())):
+                if key[1] is not None:
+                    self._failures.setdefault(key, deque()).append(now)
+
+    def record_success(self, username: str) -> None:
+        with self._lock:
+            self._failures.pop(("user", username.lower()), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._failures.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "tracked_keys": len(self._failures),
+                "blocked": self.blocked,
+                "window_seconds": self.window_seconds,
+                "max_failures_per_user": self.max_per_user,
+                "max_failures_per_ip": self.max_per_ip,
+            }
+
+
+login_throttle = LoginThrottle(
+    settings.login_failure_window_seconds,
+    settings.login_max_failures_per_user,
+    settings.login_max_failures_per_ip
+)
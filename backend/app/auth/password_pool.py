@@ -0,0 +1,98 @@
+"""
+Password Hashing Pool
+bcrypt hashing and verification on a small dedicated thread pool.
+
+A bcrypt check is ~200-300 ms of CPU. Run inline in an async handler it
+stalls the event loop; run on the default threadpool a login storm at shift
+change occupies every worker thread. Here at most PASSWORD_HASH_WORKERS
+checks run at once, at most PASSWORD_HASH_MAX_PENDING wait, and anything
+beyond that is rejected (503) instead of queueing without bound.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+import asyncio
+import threading
+import time
+
+from app.config import settings
+from app.auth.jwt import get_password_hash, verify_password
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the pool's pending limit is reached"""
+
+
+class PasswordPool:
+    """Bounded executor for password hashing with queueing metrics"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(workers, 1)
+        self.max_pending = max(max_pending, self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0  # Queued + running
+        self.peak_pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.run_ms_total = 0.0
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy()
+            self._pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+        queued_at = time.perf_counter()
+
+        def _run():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self.completed += 1
+                    wait_ms = (started - queued_at) * 1000
+                    self.wait_ms_total += wait_ms
+                    self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+                    self.run_ms_total += (finished - started) * 1000
+
+        return self._executor.submit(_run)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password without blocking the event loop"""
+        return await asyncio.wrap_future(self._submit(verify_password, plain_password, hashed_password))
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(get_password_hash, password))
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password from a sync route; waits on the pool so concurrency stays bounded"""
+        return self._submit(verify_password, plain_password, hashed_password).result()
+
+    def hash_sync(self, password: str) -> str:
+        return self._submit(get_password_hash, password).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_ms_total / self.completed, 1) if self.completed else None,
+                "max_wait_ms": round(self.wait_ms_max, 1),
+                "avg_run_ms": round(self.run_ms_total / self.completed, 1) if self.completed else None,
+            }
+
+
+password_pool = PasswordPool(settings.password_hash_workers, settings.password_hash_max_pending)
@@ -0,0 +1,90 @@
+"""
+User State Cache
+In-process cache of the per-user state the auth fast path checks.
+
+Access tokens carry sub/username/role plus a `ver` claim (users.token_version).
+Authenticated requests trust those signed claims and only compare them with
+the user's active flag and current token version, which are cached for a
+short TTL instead of read on every request. Deactivation and role changes
+bump the version, which revokes every outstanding token (and drops cached
+access-code resolutions): as soon as the change commits in this worker,
+within the TTL in the others.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.user import User
+from app.auth.access_code import access_code_cache
+from app.core.rbac import account_scope_cache
+
+
+@dataclass(frozen=True)
+class UserState:
+    """What a token is checked against"""
+    is_active: bool
+    role: str
+    token_version: int
+
+
+user_state_cache: TTLCache[int, UserState] = TTLCache(settings.auth_user_state_ttl_seconds)
+
+
+def load_user_state(db: Session, user_id: int) -> Optional[UserState]:
+    """Cached state of a user; None when the user does not exist"""
+    state = user_state_cache.get(user_id)
+    if state is not None:
+        return state
+
+    row = db.query(User.is_active, User.role, User.token_version).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    state = UserState(is_active=bool(row.is_active), role=row.role or "", token_version=row.token_version or 0)
+    user_state_cache.put(user_id, state)
+    return state
+
+
+def token_claims(user: User) -> Dict:
+    """Claims for access and refresh tokens of `user`"""
+    return {
+        "sub": str(user.id),  # Convert to string per JWT standard
+        "username": user.username,
+        "role": user.role,
+        "ver": user.token_version or 0,
+    }
+
+
+def _drop_cached(user_id: int) -> None:
+    user_state_cache.invalidate(user_id)
+    access_code_cache.invalidate_user(user_id)
+    account_scope_cache.invalidate_user(user_id)
+
+
+def revoke_tokens(user: User) -> None:
+    """
+    Invalidate every token issued to `user` by bumping its token version.
+    Its cached state, access-code resolution and account scope are dropped
+    once the caller's session commits: dropping them earlier would let a
+    concurrent request re-cache the pre-commit row for a full TTL.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    session = object_session(user)
+    if session is None:
+        _drop_cached(user.id)
+        return
+    session.info.setdefault("revoked_user_ids", set()).add(user.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_revoked_after_commit(session: Session) -> None:
+    for user_id in session.info.pop("revoked_user_ids", ()):
+        _drop_cached(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_revoked_on_rollback(session: Session) -> None:
+    session.info.pop("revoked_user_ids", None)
@@ -19,6 +19,13 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-this-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_user_state_ttl_seconds: int = 30  # Cached active/role/token-version per user; 0 reads it every request
+    password_hash_workers: int = 2  # bcrypt threads per worker process
+    password_hash_max_pending: int = 64  # Queued + running password checks before new ones get 503
+    login_failure_window_seconds: int = 900
+    login_max_failures_per_user: int = 5  # Failed logins per username within the window before 429
+    login_max_failures_per_ip: int = 20  # Failed logins per client IP within the window before 429
+    account_scope_ttl_seconds: int = 60  # Cached per-user Shopee account scope (RBAC); 0 resolves it every request
     
     # Shopee API
     shopee_api_base_url: str = "https://partner.shopeemobile.com/api/v2"
@@ -26,6 +33,38 @@ class Settings(BaseSettings):
     shopee_partner_key: Optional[str] = None
     shopee_sync_api_key: Optional[str] = None  # For Chrome Extension background sync
     access_code: Optional[str] = None  # For Chrome Extension popup manual actions
+    access_code_cache_ttl_seconds: int = 60  # Cached X-Access-Code -> user resolution; 0 disables
+    
+    # Realtime snapshot retention (24H bot)
+    snapshot_raw_retention_hours: int = 48  # Raw rows older than this are rolled up and dropped
+    snapshot_retention_interval_minutes: int = 60  # 0 disables the background retention loop
+    
+    # Extension sync audit (sync_events + compressed raw payload blobs)
+    sync_payload_blobs: str = "errors"  # off | errors | all: which raw payloads to keep on disk
+    sync_blob_dir: str = "data/sync_blobs"
+    sync_blob_retention_days: int = 7
+    account_resolution_cache_ttl_seconds: int = 300  # 0 disables the sync account resolution cache
+    account_write_flush_seconds: int = 5  # Flush interval for buffered shopee_accounts metadata writes; 0 writes inline
+    live_metrics_minute_retention_days: int = 7  # 1m live metric points older than this are folded into 15m
+    
+    # Server-side order import jobs (uploads spooled to disk, imported in chunks)
+    import_spool_dir: str = "data/imports"
+    import_chunk_rows: int = 5000
+    import_job_stale_minutes: int = 5  # Running import/payout jobs silent this long are resumed by another worker
+    import_failed_retention_days: int = 7  # Spooled uploads of failed import jobs are deleted after this many days
+    
+    # Bulk mark-paid (set-based UPDATEs, one transaction per chunk of order ids)
+    payout_batch_chunk_ids: int = 1000
+    
+    # Sales reports (closed date ranges are cached; refreshes drop overlapping entries)
+    report_cache_ttl_hours: int = 24
+    report_scheduler_interval_minutes: int = 60  # 0 disables background studio report generation
+    report_recompute_days: int = 3  # Daily studio reports this recent are recomputed each pass
+    
+    # Audit log (activity_logs written in batches; monthly partitions on Postgres)
+    activity_log_flush_seconds: int = 2
+    activity_log_max_pending: int = 50000  # Buffered events per worker; the oldest are dropped beyond this
+    activity_log_retention_months: int = 0  # 0 keeps all history; otherwise older monthly partitions are dropped
     
     # Application
     app_name: str = "Affiliate Dashboard"
@@ -5,7 +5,6 @@ from sqlalchemy import or_
 
 from app.models.user import User
 from app.models.order import Order
-from app.models.shopee_account import ShopeeAccount
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -54,26 +53,3 @@ def apply_scope_restriction(query, user: User, model=Order):
             return query.filter(model.id == -1) # Return empty
             
     return query
-
-def get_allowed_account_ids(db: Session, user: User) -> list[int]:
-    """
-    Get list of account IDs that the user is allowed to access.
-    
-    Rules:
-    - Super Admin / Owner / Supervisor / Partner: All accounts
-    - Leader: Assigned accounts (For now: All accounts in their studio/system if no explicit assignment found)
-    - Host: Assigned accounts (For now: All accounts, View Only enforced by endpoint logic)
-    
-    TODO: Implement explicit User-Account assignment table if strictly required.
-    For this Sprint 2, we assume Leaders/Hosts operate within their Studio context (if any) or see all.
-    Given the constraint 'Jangan merusak modul existing', we cannot add a new relation table easily.
-    We will fallback to returning all active account IDs for everyone, 
-    BUT Routes will enforce Action permissions (Host cannot POST).
-    """
-    if user.role in FULL_ACCESS_ROLES or user.role in ["leader", "host"]:
-        # Return all active account IDs
-        accounts = db.query(ShopeeAccount.id).filter(ShopeeAccount.is_active == True).all()
-        return [a.id for a in accounts]
-    
-    # Default: No access
-    return []
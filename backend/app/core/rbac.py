@@ -1,66 +1,192 @@
 """
 RBAC Helper for Shopee Account Scoping
 Determines which accounts a user can access based on their role
+
+A user's scope is resolved once and cached per worker (TTL
+ACCOUNT_SCOPE_TTL_SECONDS), so permission checks are set membership tests
+instead of a query per request. Roles that see every account get an
+unrestricted scope, which adds no `IN (...)` filter to queries at all.
+Assignment, account and role changes drop the affected entries.
+
+An unrestricted scope contains any id, existing or not; routes taking an
+account id go through ensure_account_access, which 404s unknown accounts
+before the scope check.
 """
+from dataclasses import dataclass
+from typing import Any, FrozenSet, Iterable, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import false, select, true
 from sqlalchemy.orm import Session
-from typing import List
+
+from app.config import settings
+from app.core.ttl_cache import TTLCache
 from app.models.user import User
 from app.models.shopee_account import ShopeeAccount
 from app.models.shopee_account_assignment import ShopeeAccountAssignment
+from app.core.permissions import FULL_ACCESS_ROLES
+
+# Roles that see every account, and roles limited to their assignments
+ALL_ACCOUNT_ROLES = ("super_admin", "owner", "supervisor")
+ASSIGNED_ACCOUNT_ROLES = ("leader", "partner", "host")
+# Operational scope (ads, premium dashboard): every active account
+ACTIVE_ACCOUNT_ROLES = tuple(FULL_ACCESS_ROLES) + ("host",)
+
+
+@dataclass(frozen=True)
+class AccountScope:
+    """
+    Accounts a user may access.
+
+    `unrestricted` scopes contain every account. `active_only` scopes hold the
+    active account ids for membership tests but filter queries with a
+    subquery on shopee_accounts rather than a literal id list.
+    """
+    unrestricted: bool = False
+    account_ids: FrozenSet[int] = frozenset()
+    active_only: bool = False
+
+    @classmethod
+    def of(cls, account_ids: Iterable[int]) -> "AccountScope":
+        return cls(account_ids=frozenset(account_ids))
+
+    def __contains__(self, account_id) -> bool:
+        return self.unrestricted or account_id in self.account_ids
 
+    def __bool__(self) -> bool:
+        return self.unrestricted or bool(self.account_ids)
 
-def get_allowed_account_ids(db: Session, user: User) -> List[int]:
+    def __len__(self) -> int:
+        return len(self.account_ids)
+
+    def clause(self, column):
+        """Filter expression restricting `column` (a shopee account id) to this scope"""
+        if self.unrestricted:
+            return true()
+        if self.active_only:
+            return column.in_(select(ShopeeAccount.id).where(ShopeeAccount.is_active == True))
+        if not self.account_ids:
+            return false()
+        return column.in_(sorted(self.account_ids))
+
+    def describe(self) -> str:
+        return "all" if self.unrestricted else str(len(self.account_ids))
+
+
+ALL_ACCOUNTS = AccountScope(unrestricted=True)
+NO_ACCOUNTS = AccountScope()
+
+
+ACTIVE_IDS_KEY = ("active", 0)  # Shared set of active account ids
+ALL_IDS_KEY = ("all", 0)  # Shared set of every account id
+
+
+class AccountScopeCache(TTLCache[Tuple[str, int], Any]):
+    """
+    ("assigned", user id) -> (role, AccountScope), plus the shared account id
+    sets under ACTIVE_IDS_KEY and ALL_IDS_KEY. Account changes clear() everything.
     """
-    Get list of shopee_account IDs that user can access based on role.
-    
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Assignment or role change of one user"""
+        self.invalidate_where(lambda key, _: key == ("assigned", user_id))
+
+
+account_scope_cache = AccountScopeCache(settings.account_scope_ttl_seconds)
+
+
+def _active_account_ids(db: Session) -> FrozenSet[int]:
+    account_ids = account_scope_cache.get(ACTIVE_IDS_KEY)
+    if account_ids is None:
+        account_ids = frozenset(
+            row[0] for row in db.query(ShopeeAccount.id).filter(ShopeeAccount.is_active == True)
+        )
+        account_scope_cache.put(ACTIVE_IDS_KEY, account_ids)
+    return account_ids
+
+
+def _all_account_ids(db: Session) -> FrozenSet[int]:
+    account_ids = account_scope_cache.get(ALL_IDS_KEY)
+    if account_ids is None:
+        account_ids = frozenset(row[0] for row in db.query(ShopeeAccount.id))
+        account_scope_cache.put(ALL_IDS_KEY, account_ids)
+    return account_ids
+
+
+def get_account_scope(db: Session, user: User) -> AccountScope:
+    """
+    Accounts a user can access based on role.
+
     Rules:
     - super_admin, owner, supervisor: ALL accounts
     - leader, partner: Only assigned accounts
     - host: Only assigned accounts (read-only, enforce elsewhere)
     - Others: No accounts
-    
-    Returns:
-        List[int]: Account IDs user can access
     """
-    # Full access roles
-    if user.role in ['super_admin', 'owner', 'supervisor']:
-        accounts = db.query(ShopeeAccount.id).all()
-        return [acc[0] for acc in accounts]
-    
-    # Scoped roles (leader, partner, host)
-    if user.role in ['leader', 'partner', 'host']:
-        assignments = db.query(ShopeeAccountAssignment.shopee_account_id).filter(
+    if user.role in ALL_ACCOUNT_ROLES:
+        return ALL_ACCOUNTS
+    if user.role not in ASSIGNED_ACCOUNT_ROLES:
+        return NO_ACCOUNTS
+
+    cached = account_scope_cache.get(("assigned", user.id))
+    if cached is not None and cached[0] == user.role:
+        return cached[1]
+    scope = AccountScope.of(
+        row[0] for row in db.query(ShopeeAccountAssignment.shopee_account_id).filter(
             ShopeeAccountAssignment.user_id == user.id
-        ).all()
-        return [assn[0] for assn in assignments]
-    
-    # Default: no access
-    return []
+        )
+    )
+    account_scope_cache.put(("assigned", user.id), (user.role, scope))
+    return scope
+
+
+def get_active_account_scope(db: Session, user: User) -> AccountScope:
+    """
+    Operational scope used by ads and the premium dashboard: every active
+    account for FULL_ACCESS_ROLES and hosts (hosts stay view-only through
+    endpoint role checks), nothing for other roles.
+    """
+    if user.role not in ACTIVE_ACCOUNT_ROLES:
+        return NO_ACCOUNTS
+    return AccountScope(account_ids=_active_account_ids(db), active_only=True)
 
 
 def can_access_account(db: Session, user: User, account_id: int) -> bool:
     """
     Check if user can access specific account.
-    
+
     Args:
         db: Database session
         user: Current user
         account_id: Shopee account ID to check
-    
+
     Returns:
         bool: True if user has access
     """
-    allowed_ids = get_allowed_account_ids(db, user)
-    return account_id in allowed_ids
+    return account_id in get_account_scope(db, user)
+
+
+def ensure_account_access(db: Session, user: User, account_id: int) -> None:
+    """
+    Guard for routes taking an account id.
+
+    Raises:
+        HTTPException 404 if the account does not exist, 403 if it is outside
+        the user's scope
+    """
+    if account_id not in _all_account_ids(db):
+        raise HTTPException(status_code=404, detail="Shopee account not found")
+    if not can_access_account(db, user, account_id):
+        raise HTTPException(status_code=403, detail="Access denied to this account")
 
 
 def is_read_only_for_account(user: User) -> bool:
     """
     Check if user has read-only access (e.g., 'host' role).
-    
+
     Args:
         user: Current user
-    
+
     Returns:
         bool: True if read-only
     """
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -28,6 +29,41 @@ else:
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL to its async driver (asyncpg / aiosqlite)"""
+    if url.startswith(("postgresql://", "postgres://")):
+        url = "postgresql+asyncpg://" + url.split("://", 1)[1]
+        # asyncpg takes ssl=, not libpq's sslmode=
+        return url.replace("sslmode=", "ssl=")
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1).replace("sslmode=", "ssl=")
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# Async engine for endpoints that must not block the event loop
+if settings.use_supabase:
+    async_engine = create_async_engine(
+        to_async_url(SQLALCHEMY_DATABASE_URL),
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        # Supabase's pooler runs PgBouncer in transaction mode: no prepared statement cache
+        connect_args={"statement_cache_size": 0},
+        echo=settings.debug
+    )
+else:
+    async_engine = create_async_engine(
+        to_async_url(SQLALCHEMY_DATABASE_URL),
+        pool_pre_ping=True,
+        echo=settings.debug
+    )
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base model
 Base = declarative_base()
 
@@ -39,3 +75,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency to get an AsyncSession.
+    Sync service code can run on it via `await db.run_sync(fn, *args)`.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dialect_insert(db, table):
+    """
+    Return an INSERT construct supporting ON CONFLICT for the session's dialect.
+    PostgreSQL and SQLite both expose on_conflict_do_update/do_nothing.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import asyncio
 import logging
 from app.database import Base, engine
 from app.config import settings
+from app.auth.password_pool import PasswordPoolBusy
 from app.routes import (
     auth,
     users,
@@ -56,6 +59,57 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy(request: Request, exc: PasswordPoolBusy):
+    """Password checks beyond the pool's pending limit are shed, not queued"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins in progress, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start periodic maintenance tasks"""
+    if settings.snapshot_retention_interval_minutes > 0:
+        from app.services.snapshot_retention import retention_loop
+        from app.services.live_metrics import rollup_loop
+        asyncio.create_task(retention_loop(settings.snapshot_retention_interval_minutes))
+        asyncio.create_task(rollup_loop(settings.snapshot_retention_interval_minutes))
+    if settings.sync_payload_blobs != "off":
+        from app.services.sync_blob_store import blob_retention_loop
+        asyncio.create_task(blob_retention_loop(60))
+    if settings.account_write_flush_seconds > 0:
+        from app.services.account_write_buffer import account_flush_loop
+        asyncio.create_task(account_flush_loop(settings.account_write_flush_seconds))
+    from app.services.import_jobs import import_job_resume_loop
+    asyncio.create_task(import_job_resume_loop(60))
+    from app.services.payout_batch import payout_batch_resume_loop
+    asyncio.create_task(payout_batch_resume_loop(60))
+    if settings.report_scheduler_interval_minutes > 0:
+        from app.services.studio_reports import report_scheduler_loop
+        asyncio.create_task(report_scheduler_loop(settings.report_scheduler_interval_minutes))
+    from app.services.audit_log import audit_flush_loop, audit_maintenance_loop
+    asyncio.create_task(audit_flush_loop(max(settings.activity_log_flush_seconds, 1)))
+    asyncio.create_task(audit_maintenance_loop(24))
+
+
+@app.on_event("shutdown")
+async def flush_buffers():
+    """Write out buffered account metadata and audit events before the worker exits"""
+    from app.services.account_write_buffer import flush_account_writes
+    try:
+        await asyncio.to_thread(flush_account_writes)
+    except Exception as e:
+        logger.error(f"Account write flush on shutdown failed: {e}")
+    from app.services.audit_log import flush_audit_log
+    try:
+        await asyncio.to_thread(flush_audit_log)
+    except Exception as e:
+        logger.error(f"Audit log flush on shutdown failed: {e}")
+
+
 @app.get("/")
 def read_root():
     """Root endpoint"""
@@ -11,6 +11,12 @@ from .user import User
 from .activity_log import ActivityLog
 from .live_product_snapshot import LiveProductSnapshot
 from .live_sync_log import LiveSyncLog
+from .sync_event import SyncEvent
+from .live_metric import LiveMetricPoint
+from .import_job import ImportJob
+from .payout_summary import PayoutDailySummary
+from .payout_batch import PayoutBatch
+from .report_cache import ReportRangeCache
 
 __all__ = [
     "Studio",
@@ -26,4 +32,10 @@ __all__ = [
     "ActivityLog",
     "LiveProductSnapshot",
     "LiveSyncLog",
+    "SyncEvent",
+    "LiveMetricPoint",
+    "ImportJob",
+    "PayoutDailySummary",
+    "PayoutBatch",
+    "ReportRangeCache",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -9,12 +9,14 @@ class ActivityLog(Base):
     Activity log for audit trail.
     Tracks all important user actions for security and compliance.
     
-    Partitioned by month for scalability.
+    Written in batches by app.services.audit_log. On Postgres the table is
+    range-partitioned by month on created_at (migration 023), so the primary
+    key there is (id, created_at) and retention drops whole partitions.
     """
     __tablename__ = "activity_logs"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
     
     # Action details
     action = Column(String(100), nullable=False)  # 'login', 'create_employee', 'edit_commission'
@@ -30,7 +32,15 @@ class ActivityLog(Base):
     user_agent = Column(Text)
     
     # Timestamp
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # One index per filter the log page offers, each ending in the keyset (created_at, id)
+    __table_args__ = (
+        Index('idx_activity_logs_created_id', 'created_at', 'id'),
+        Index('idx_activity_logs_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_activity_logs_action_created', 'action', 'created_at', 'id'),
+        Index('idx_activity_logs_entity_created', 'entity_type', 'created_at', 'id'),
+    )
     
     # Relationships
     user = relationship("User", back_populates="activity_logs")
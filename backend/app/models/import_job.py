@@ -0,0 +1,75 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from datetime import datetime
+from app.database import Base
+
+
+class ImportJob(Base):
+    """
+    Server-side CSV/XLSX order import.
+    The upload is spooled to `file_path` and imported in chunks of `chunk_size`
+    rows; each chunk commits together with the counters below, so
+    `chunks_done` is always the resume point after a restart.
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    shop_id = Column(Integer, nullable=False)  # shopee_accounts.id
+    import_type = Column(String(20), nullable=False)  # sales, commission
+    mapping = Column(JSON, nullable=False)
+    filename = Column(String(255), nullable=True)
+    file_path = Column(String(500), nullable=False)
+    file_format = Column(String(10), nullable=False)  # csv, xlsx
+    file_bytes = Column(Integer, default=0)
+
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    chunk_size = Column(Integer, nullable=False)
+    total_rows = Column(Integer, nullable=True)  # Estimate from the spooled file
+    chunks_done = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    inserted = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    failed_rows = Column(JSON, nullable=True)  # First MAX_FAILED_ROWS_REPORTED failures
+    chunk_stats = Column(JSON, nullable=True)  # [{chunk, rows, inserted, updated, skipped, failed, ms}]
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Touched per chunk; stale running jobs are reclaimed
+
+    def __repr__(self):
+        return f"<ImportJob {self.id} {self.status} {self.chunks_done} chunks>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "shop_id": self.shop_id,
+            "import_type": self.import_type,
+            "filename": self.filename,
+            "file_format": self.file_format,
+            "file_bytes": self.file_bytes,
+            "status": self.status,
+            "chunk_size": self.chunk_size,
+            "total_rows": self.total_rows,
+            "chunks_done": self.chunks_done,
+            "rows_processed": self.rows_processed,
+            "progress": (
+                1.0 if self.status == "completed"
+                else min(self.rows_processed / self.total_rows, 1.0) if self.total_rows
+                else None
+            ),
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "failed_rows": self.failed_rows or [],
+            "chunk_stats": self.chunk_stats or [],
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
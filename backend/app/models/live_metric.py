@@ -0,0 +1,36 @@
+"""
+LiveMetricPoint Model - Time series of extension live streaming metrics
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Index
+from app.database import Base
+
+
+class LiveMetricPoint(Base):
+    """
+    One bucket of a live session's metric curve.
+
+    The extension pushes viewers/likes/sales every few seconds; samples in
+    the same minute are merged into a single '1m' row by upsert, and old
+    minute rows are later folded into '15m' rows by the rollup.
+    """
+    __tablename__ = "live_metric_points"
+
+    account_id = Column(Integer, primary_key=True)  # shopee_accounts.id
+    session_key = Column(String(100), primary_key=True)
+    resolution = Column(String(4), primary_key=True)  # 1m, 15m
+    bucket_start = Column(DateTime, primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+    viewers_peak = Column(Integer, nullable=True)
+    # Values from the latest sample in the bucket (likes/sales/revenue are session totals)
+    viewers = Column(Integer, nullable=True)
+    likes = Column(Integer, nullable=True)
+    total_sales = Column(Integer, nullable=True)
+    revenue = Column(Numeric(14, 2), nullable=True)
+    last_sample_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_live_metric_points_resolution_bucket', 'resolution', 'bucket_start'),
+    )
+
+    def __repr__(self):
+        return f"<LiveMetricPoint {self.account_id} {self.session_key} {self.resolution} {self.bucket_start}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -32,3 +32,8 @@ class Order(Base):
     # Relationships
     shopee_account = relationship("ShopeeAccount", back_populates="orders")
     handler = relationship("User", foreign_keys=[handler_user_id])
+
+    __table_args__ = (
+        # Payout history keyset pagination and date-range scans
+        Index('idx_orders_date_id', 'date', 'id'),
+    )
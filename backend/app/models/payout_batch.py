@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from datetime import datetime
+from app.database import Base
+
+
+class PayoutBatch(Base):
+    """
+    Background bulk mark-paid of a list of order ids.
+    Ids are updated `chunk_size` at a time, one transaction per chunk;
+    `chunks_done` is the resume point after a restart (re-running a chunk is
+    harmless, already-paid orders are never touched again).
+    """
+    __tablename__ = "payout_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    payment_method = Column(String(50), nullable=False)
+    source = Column(String(10), nullable=False)  # ids, file
+    filename = Column(String(255), nullable=True)
+    order_ids = Column(JSON, nullable=False)  # De-duplicated, in submission order
+
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    chunk_size = Column(Integer, nullable=False)
+    total_ids = Column(Integer, default=0)
+    chunks_done = Column(Integer, default=0)
+    ids_processed = Column(Integer, default=0)
+    matched = Column(Integer, default=0)  # Ids that exist as orders
+    updated = Column(Integer, default=0)  # Orders newly marked paid
+    chunk_stats = Column(JSON, nullable=True)  # [{chunk, ids, matched, updated, ms}]
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Touched per chunk; stale running batches are reclaimed
+
+    def __repr__(self):
+        return f"<PayoutBatch {self.id} {self.status} {self.updated}/{self.total_ids}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "payment_method": self.payment_method,
+            "source": self.source,
+            "filename": self.filename,
+            "status": self.status,
+            "chunk_size": self.chunk_size,
+            "total_ids": self.total_ids,
+            "chunks_done": self.chunks_done,
+            "ids_processed": self.ids_processed,
+            "progress": (
+                1.0 if self.status == "completed"
+                else min(self.ids_processed / self.total_ids, 1.0) if self.total_ids
+                else None
+            ),
+            "matched": self.matched,
+            "updated": self.updated,
+            "not_found": (self.ids_processed or 0) - (self.matched or 0),
+            "chunk_stats": self.chunk_stats or [],
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
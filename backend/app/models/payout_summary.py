@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Date, Numeric
+from app.database import Base
+
+
+class PayoutDailySummary(Base):
+    """
+    Completed-order counts, GMV and commission per account, day and payout
+    status: the daily order fact table. Maintained by the order upsert and
+    mark-paid paths so payout summary cards and sales reports never
+    aggregate raw orders.
+    """
+    __tablename__ = "payout_daily_summary"
+
+    shopee_account_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    payout_status = Column(String(50), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    gmv_total = Column(Numeric(14, 2), nullable=False, default=0)
+    commission_total = Column(Numeric(14, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PayoutDailySummary {self.shopee_account_id} {self.day} {self.payout_status}>"
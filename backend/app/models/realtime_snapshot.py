@@ -1,12 +1,27 @@
 """
 RealtimeSnapshot Model - For 24H Playwright Bot data storage
 """
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Numeric, Float, Boolean, ForeignKey, UniqueConstraint
 from datetime import datetime
 from app.database import Base
 
 
-class RealtimeSnapshot(Base):
+class SnapshotMetricsMixin:
+    """
+    Hot dashboard metrics extracted from `data` at ingest time.
+    NULL when the snapshot type does not carry the metric.
+    """
+    # creator_live
+    orders_ready_to_ship = Column(Integer, nullable=True)
+    pending_orders = Column(Integer, nullable=True)
+    total_orders_today = Column(Integer, nullable=True)
+    # ads / coins
+    spend_today = Column(Numeric(14, 2), nullable=True)
+    budget_available = Column(Numeric(14, 2), nullable=True)
+    coins = Column(Numeric(14, 2), nullable=True)
+
+
+class RealtimeSnapshot(SnapshotMetricsMixin, Base):
     """Stores realtime scraped data from Playwright bot"""
     __tablename__ = "realtime_snapshots"
 
@@ -17,11 +32,83 @@ class RealtimeSnapshot(Base):
     data = Column(JSON, nullable=False)
     scraped_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Idempotency key: sha256 of client id or (account, type, scraped_at); retries are no-ops
+    dedup_key = Column(String(64), nullable=True, unique=True)
 
     def __repr__(self):
         return f"<RealtimeSnapshot {self.id} {self.shopee_account_id} {self.snapshot_type}>"
 
 
+class RealtimeSnapshotLatest(SnapshotMetricsMixin, Base):
+    """
+    Latest snapshot per (account, type), upserted on every ingest.
+    Dashboards read this instead of scanning realtime_snapshots history.
+    """
+    __tablename__ = "realtime_snapshot_latest"
+
+    shopee_account_id = Column(String(100), primary_key=True)
+    snapshot_type = Column(String(50), primary_key=True, index=True)
+    snapshot_id = Column(Integer, nullable=False)  # realtime_snapshots.id of the row mirrored here
+    shop_name = Column(String(255), nullable=True)
+    data = Column(JSON, nullable=False)
+    scraped_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<RealtimeSnapshotLatest {self.shopee_account_id} {self.snapshot_type}>"
+
+
+class RealtimeSnapshotRollup(Base):
+    """
+    Downsampled snapshot metrics per account, type and time bucket.
+    Raw rows older than the retention window are folded into these.
+    """
+    __tablename__ = "realtime_snapshot_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    shopee_account_id = Column(String(100), nullable=False)
+    snapshot_type = Column(String(50), nullable=False)
+    resolution = Column(String(10), nullable=False)  # 5m, 1h
+    bucket_start = Column(DateTime, nullable=False, index=True)
+    sample_count = Column(Integer, default=0)
+    metrics = Column(JSON, nullable=False)  # {field: {min, max, last}}
+    last_scraped_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('shopee_account_id', 'snapshot_type', 'resolution', 'bucket_start', name='uq_snapshot_rollup_bucket'),
+    )
+
+    def __repr__(self):
+        return f"<RealtimeSnapshotRollup {self.shopee_account_id} {self.snapshot_type} {self.resolution} {self.bucket_start}>"
+
+
+class BotHeartbeat(Base):
+    """
+    Liveness and cycle stats per bot worker and per account.
+    Updated by snapshot ingest and by explicit supervisor heartbeats,
+    so /api/bot/status never has to scan snapshot history.
+    """
+    __tablename__ = "bot_heartbeats"
+
+    scope = Column(String(20), primary_key=True)  # worker, account
+    key = Column(String(100), primary_key=True)  # worker_id or shopee_account_id
+    worker_id = Column(String(100), nullable=True)  # Last worker that reported for this key
+    shop_name = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=True)  # running, ok, error, stopped
+    last_seen_at = Column(DateTime, nullable=False)
+    last_snapshot_at = Column(DateTime, nullable=True)
+    last_cycle_at = Column(DateTime, nullable=True)
+    last_cycle_duration_ms = Column(Integer, nullable=True)
+    cycles_total = Column(Integer, default=0)
+    success_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)
+    consecutive_failures = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<BotHeartbeat {self.scope}:{self.key} {self.status}>"
+
+
 class BotRun(Base):
     """Tracks bot run status for monitoring"""
     __tablename__ = "bot_runs"
@@ -37,5 +124,29 @@ class BotRun(Base):
     started_at = Column(DateTime, default=datetime.utcnow)
     ended_at = Column(DateTime, nullable=True)
 
+    # Per-cycle throughput, filled by the progress/finish endpoints
+    worker_id = Column(String(100), nullable=True)
+    max_workers = Column(Integer, nullable=True)  # Parallelism the supervisor ran with
+    snapshots_count = Column(Integer, default=0)
+    duration_ms = Column(Integer, nullable=True)
+    snapshots_per_second = Column(Float, nullable=True)
+    p95_scrape_ms = Column(Integer, nullable=True)
+
     def __repr__(self):
         return f"<BotRun {self.run_id} {self.status}>"
+
+
+class BotRunScrape(Base):
+    """Per-account scrape timing within a bot run (source for p95)"""
+    __tablename__ = "bot_run_scrapes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(36), ForeignKey("bot_runs.run_id", ondelete="CASCADE"), nullable=False, index=True)
+    shopee_account_id = Column(String(100), nullable=False)
+    success = Column(Boolean, nullable=False)
+    duration_ms = Column(Integer, nullable=True)
+    snapshots = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<BotRunScrape {self.run_id} {self.shopee_account_id}>"
@@ -1,16 +1,23 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Numeric, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 
 class Report(Base):
+    """
+    Materialized studio report for one period.
+    Daily reports are computed from the order rollup, ad spend and
+    attendance; weekly and monthly reports are merged from the daily ones.
+    """
     __tablename__ = "reports"
 
     id = Column(Integer, primary_key=True, index=True)
     studio_id = Column(Integer, ForeignKey("studios.id"), nullable=False)
     report_type = Column(String(50), nullable=False)  # daily, weekly, monthly
-    period = Column(String(50), nullable=False)
+    period = Column(String(50), nullable=False)  # 2026-01-05, 2026-W02, 2026-01
+    period_start = Column(Date, nullable=True)
+    period_end = Column(Date, nullable=True)  # Inclusive
     total_revenue = Column(Numeric(12, 2), default=0)
     total_commission = Column(Numeric(12, 2), default=0)
     total_ad_spent = Column(Numeric(12, 2), default=0)
@@ -19,5 +26,26 @@ class Report(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint('studio_id', 'report_type', 'period', name='uix_reports_studio_period'),
+        Index('idx_reports_type_period_start', 'report_type', 'period_start'),
+    )
+
     # Relationships
     studio = relationship("Studio", back_populates="reports")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "studio_id": self.studio_id,
+            "report_type": self.report_type,
+            "period": self.period,
+            "period_start": self.period_start.isoformat() if self.period_start else None,
+            "period_end": self.period_end.isoformat() if self.period_end else None,
+            "total_revenue": float(self.total_revenue or 0),
+            "total_commission": float(self.total_commission or 0),
+            "total_ad_spent": float(self.total_ad_spent or 0),
+            "attendance_summary": self.attendance_summary or {},
+            "data": self.data or {},
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
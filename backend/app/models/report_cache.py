@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, Index
+from datetime import datetime
+from app.database import Base
+
+
+class ReportRangeCache(Base):
+    """
+    Sales report rows of a closed date range, keyed by a hash of the filters.
+    Entries overlapping a range whose order facts are refreshed are deleted
+    in the same transaction, so a hit is always current.
+    """
+    __tablename__ = "report_range_cache"
+
+    filter_hash = Column(String(64), primary_key=True)
+    from_date = Column(Date, nullable=False)
+    to_date = Column(Date, nullable=False)
+    account_id = Column(Integer, nullable=True)  # None = all shops
+    rows = Column(JSON, nullable=False)  # [[day, account_id, orders, gmv, commission]]
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index('idx_report_range_cache_range', 'from_date', 'to_date'),
+    )
+
+    def __repr__(self):
+        return f"<ReportRangeCache {self.from_date}..{self.to_date} account={self.account_id}>"
@@ -2,7 +2,7 @@
 Shopee Account Assignment Model
 Many-to-many relationship between users and shopee accounts
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -22,6 +22,7 @@ class ShopeeAccountAssignment(Base):
     shopee_account_id = Column(Integer, ForeignKey("shopee_accounts.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     role_scope = Column(String(20), nullable=False)  # owner/supervisor/partner/leader/host/viewer
+    is_default = Column(Boolean, nullable=False, default=False)  # Set by Connect Account (migration 007)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from datetime import datetime
+from app.database import Base
+
+
+class SyncEvent(Base):
+    """
+    Compact audit record of one extension sync.
+    Stores a summary of the payload (size, hash, counts) instead of the payload
+    itself; the raw body optionally lives in the blob store under payload_sha256.
+    """
+    __tablename__ = "sync_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    account_id = Column(Integer, nullable=True, index=True)  # shopee_accounts.id, NULL when unresolved
+
+    payload_type = Column(String(50), nullable=False)
+    success = Column(Boolean, nullable=False)
+    item_count = Column(Integer, default=0)  # rows in the payload's data lists
+    inserted = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    payload_bytes = Column(Integer, default=0)
+    payload_sha256 = Column(String(64), index=True)
+    blob_stored = Column(Boolean, default=False)
+    duration_ms = Column(Integer, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<SyncEvent {self.payload_type} account={self.account_id} success={self.success}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "account_id": self.account_id,
+            "payload_type": self.payload_type,
+            "success": self.success,
+            "item_count": self.item_count,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "payload_bytes": self.payload_bytes,
+            "payload_sha256": self.payload_sha256,
+            "blob_stored": self.blob_stored,
+            "duration_ms": self.duration_ms,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
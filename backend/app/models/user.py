@@ -36,6 +36,7 @@ class User(Base):
     
     # Status
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped to revoke issued tokens
     last_login = Column(DateTime, nullable=True)
     
     # Timestamps
@@ -1,21 +1,70 @@
 """
 Activity log routes for viewing audit trail.
+
+Audit events are written in batches by the audit writer, so an event shows
+up here within ACTIVITY_LOG_FLUSH_SECONDS of being recorded.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
 from datetime import date
 
 from app.database import get_db
 from app.models.activity_log import ActivityLog
+from app.models.sync_event import SyncEvent
+from app.services.sync_blob_store import SyncBlobStore
+from app.services.audit_log import audit_log
+from app.services.activity_log_history import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ActivityLogHistoryService, filtered_query
+)
 from app.models.user import User
 from app.auth.dependencies import get_current_user, require_role
 
 router = APIRouter(prefix="/api/activity-logs", tags=["Activity Logs"])
 
 
+class ActivityLogPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; None on the last page
+    approximate_total: Optional[int] = None  # Only with include_total=true
+
+
+@router.get("/page", response_model=ActivityLogPage)
+def page_activity_logs(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Activity logs newest first, keyset-paginated.
+    
+    **Permissions:** Admin or higher
+    
+    Pass `next_cursor` back as `cursor` for the next page. Filters are the
+    same as the list endpoint; `include_total` adds an approximate match count.
+    """
+    try:
+        items, next_cursor, total = ActivityLogHistoryService.page(
+            db, user_id=user_id, action=action, entity_type=entity_type,
+            date_from=date_from, date_to=date_to, cursor=cursor, limit=limit,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ActivityLogPage(items=items, next_cursor=next_cursor, approximate_total=total)
+
+
 @router.get("")
-async def list_activity_logs(
+def list_activity_logs(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     user_id: Optional[int] = None,
@@ -35,32 +84,92 @@ async def list_activity_logs(
     - **action**: Filter by action type
     - **entity_type**: Filter by entity (user, employee, etc.)
     - **date_from**: Start date
-    - **date_to**: End date
+    - **date_to**: End date (inclusive)
+    
+    Offset paging is kept for existing clients; use /page to browse deep history.
+    """
+    query = filtered_query(db, user_id, action, entity_type, date_from, date_to)
+    logs = query.order_by(
+        ActivityLog.created_at.desc(), ActivityLog.id.desc()
+    ).offset(skip).limit(limit).all()
+    
+    return [log.to_dict() for log in logs]
+
+
+@router.get("/writer-stats")
+async def get_audit_writer_stats(
+    current_user: User = Depends(require_role("admin"))
+):
     """
-    query = db.query(ActivityLog)
+    Buffered audit writer counters for this worker.
+    
+    **Permissions:** Admin or higher
+    """
+    return audit_log.stats()
+
+
+@router.get("/sync-events")
+def list_sync_events(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    user_id: Optional[int] = None,
+    account_id: Optional[int] = None,
+    payload_type: Optional[str] = None,
+    success: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    List extension sync events (compact summaries, no payloads).
+    
+    **Permissions:** Admin or higher
+    """
+    query = db.query(SyncEvent)
     
     if user_id:
-        query = query.filter(ActivityLog.user_id == user_id)
+        query = query.filter(SyncEvent.user_id == user_id)
+    
+    if account_id:
+        query = query.filter(SyncEvent.account_id == account_id)
     
-    if action:
-        query = query.filter(ActivityLog.action == action)
+    if payload_type:
+        query = query.filter(SyncEvent.payload_type == payload_type)
     
-    if entity_type:
-        query = query.filter(ActivityLog.entity_type == entity_type)
+    if success is not None:
+        query = query.filter(SyncEvent.success == success)
     
-    if date_from:
-        query = query.filter(ActivityLog.created_at >= date_from)
+    events = query.order_by(SyncEvent.created_at.desc()).offset(skip).limit(limit).all()
+    
+    return [event.to_dict() for event in events]
+
+
+@router.get("/sync-events/{event_id}/payload")
+def get_sync_event_payload(
+    event_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Raw JSON payload of a sync event, if it was kept in the blob store.
     
-    if date_to:
-        query = query.filter(ActivityLog.created_at <= date_to)
+    **Permissions:** Admin or higher
+    """
+    event = db.query(SyncEvent).filter(SyncEvent.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sync event not found")
     
-    logs = query.order_by(ActivityLog.created_at.desc()).offset(skip).limit(limit).all()
+    data = SyncBlobStore().get(event.payload_sha256) if event.blob_stored else None
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payload was not stored or has expired"
+        )
     
-    return [log.to_dict() for log in logs]
+    return Response(content=data, media_type="application/json")
 
 
 @router.get("/user/{user_id}")
-async def get_user_activity_logs(
+def get_user_activity_logs(
     user_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
@@ -84,7 +193,7 @@ async def get_user_activity_logs(
     logs = db.query(ActivityLog).filter(
         ActivityLog.user_id == user_id
     ).order_by(
-        ActivityLog.created_at.desc()
+        ActivityLog.created_at.desc(), ActivityLog.id.desc()
     ).offset(skip).limit(limit).all()
     
     return [log.to_dict() for log in logs]
@@ -15,7 +15,7 @@ from app.schemas.ads import (
     AudienceSettingsUpsertRequest, AudienceAddBudgetRequest, GenericSuccessResponse,
     LogsSpendRow, LogsAudienceRow, LogsRoasRow
 )
-from app.core.permissions import get_allowed_account_ids
+from app.core.rbac import get_active_account_scope
 
 router = APIRouter(prefix="/api/ads", tags=["ads"])
 
@@ -68,14 +68,14 @@ def get_ads_center_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if not allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if not scope:
         return []
 
     # Filter accounts
-    query = db.query(ShopeeAccount).filter(ShopeeAccount.id.in_(allowed_ids), ShopeeAccount.is_active == True)
+    query = db.query(ShopeeAccount).filter(scope.clause(ShopeeAccount.id), ShopeeAccount.is_active == True)
     if account_id:
-        if account_id not in allowed_ids:
+        if account_id not in scope:
             raise HTTPException(status_code=403, detail="Not allowed to access this account")
         query = query.filter(ShopeeAccount.id == account_id)
     accounts = query.all()
@@ -87,7 +87,7 @@ def get_ads_center_data(
         func.sum(AdsDailySpend.spend_amount).label("total_spend")
     ).filter(
         AdsDailySpend.date == date,
-        AdsDailySpend.shopee_account_id.in_(allowed_ids)
+        scope.clause(AdsDailySpend.shopee_account_id)
     ).group_by(AdsDailySpend.shopee_account_id).all()
     spend_map = {s.shopee_account_id: s.total_spend for s in spends}
 
@@ -100,7 +100,7 @@ def get_ads_center_data(
         func.sum(Order.total_amount).label("total_gmv")
     ).filter(
         func.date(Order.date) == date,  # Use date column instead of created_at
-        Order.shopee_account_id.in_(allowed_ids),
+        scope.clause(Order.shopee_account_id),
         Order.status == 'completed'  # Only count completed orders
     ).group_by(Order.shopee_account_id).all()
     
@@ -109,12 +109,12 @@ def get_ads_center_data(
     # 3. Metrics (Manual ROAS)
     metrics = db.query(AdsDailyMetrics).filter(
         AdsDailyMetrics.date == date,
-        AdsDailyMetrics.shopee_account_id.in_(allowed_ids)
+        scope.clause(AdsDailyMetrics.shopee_account_id)
     ).all()
     metrics_map = {m.shopee_account_id: m for m in metrics}
 
     # 4. Audience Settings & Last Action
-    settings = db.query(AudienceBudgetSetting).filter(AudienceBudgetSetting.shopee_account_id.in_(allowed_ids)).all()
+    settings = db.query(AudienceBudgetSetting).filter(scope.clause(AudienceBudgetSetting.shopee_account_id)).all()
     settings_map = {s.shopee_account_id: s for s in settings}
 
     # For status, we look at the LATEST action for each account
@@ -132,7 +132,7 @@ def get_ads_center_data(
         latest_actions_sub,
         (AudienceBudgetAction.shopee_account_id == latest_actions_sub.c.shopee_account_id) &
         (AudienceBudgetAction.created_at == latest_actions_sub.c.max_created)
-    ).filter(AudienceBudgetAction.shopee_account_id.in_(allowed_ids)).all()
+    ).filter(scope.clause(AudienceBudgetAction.shopee_account_id)).all()
     
     action_map = {a.shopee_account_id: a for a in latest_actions}
     
@@ -142,7 +142,7 @@ def get_ads_center_data(
         func.sum(AudienceBudgetAction.added_amount).label("total_added")
     ).filter(
         AudienceBudgetAction.date == date,
-        AudienceBudgetAction.shopee_account_id.in_(allowed_ids)
+        scope.clause(AudienceBudgetAction.shopee_account_id)
     ).group_by(AudienceBudgetAction.shopee_account_id).all()
     added_map = {a.shopee_account_id: a.total_added for a in added_today}
 
@@ -242,8 +242,8 @@ def upsert_spend(
     db: Session = Depends(get_db)
 ):
     # Check scope
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if req.account_id not in allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if req.account_id not in scope:
         raise HTTPException(status_code=403, detail="Not allowed")
 
     # Upsert logic based on Unique(date, account_id, spend_type)
@@ -283,8 +283,8 @@ def upsert_metrics(
 ):
     # Leader excluded here as per prompt "Role: owner/supervisor/partner/super_admin only" in Step 5-(3)
     # Check scope
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if req.account_id not in allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if req.account_id not in scope:
         raise HTTPException(status_code=403, detail="Not allowed")
 
     record = db.query(AdsDailyMetrics).filter(
@@ -321,8 +321,8 @@ def get_audience_settings(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if account_id not in allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if account_id not in scope:
         raise HTTPException(status_code=403, detail="Not allowed")
 
     setting = db.query(AudienceBudgetSetting).filter(AudienceBudgetSetting.shopee_account_id == account_id).first()
@@ -346,8 +346,8 @@ def upsert_audience_settings(
     current_user: User = Depends(require_role(["owner", "supervisor", "partner", "super_admin"])),
     db: Session = Depends(get_db)
 ):
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if req.account_id not in allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if req.account_id not in scope:
         raise HTTPException(status_code=403, detail="Not allowed")
         
     setting = db.query(AudienceBudgetSetting).filter(AudienceBudgetSetting.shopee_account_id == req.account_id).first()
@@ -384,8 +384,8 @@ def add_audience_budget(
 ):
     # Host forbidden implicitly by require_role list (no 'host')
     
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if req.account_id not in allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if req.account_id not in scope:
         raise HTTPException(status_code=403, detail="Not allowed")
 
     if req.added_amount <= 0:
@@ -433,16 +433,16 @@ def get_spend_logs(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if not allowed_ids: return []
+    scope = get_active_account_scope(db, current_user)
+    if not scope: return []
 
     query = db.query(AdsDailySpend).filter(
         AdsDailySpend.date >= from_date, 
         AdsDailySpend.date <= to_date,
-        AdsDailySpend.shopee_account_id.in_(allowed_ids)
+        scope.clause(AdsDailySpend.shopee_account_id)
     )
     if account_id:
-        if account_id not in allowed_ids: raise HTTPException(status_code=403, detail="Denied")
+        if account_id not in scope: raise HTTPException(status_code=403, detail="Denied")
         query = query.filter(AdsDailySpend.shopee_account_id == account_id)
         
     logs = query.order_by(desc(AdsDailySpend.date)).all()
@@ -462,16 +462,16 @@ def get_audience_logs(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if not allowed_ids: return []
+    scope = get_active_account_scope(db, current_user)
+    if not scope: return []
 
     query = db.query(AudienceBudgetAction).filter(
         AudienceBudgetAction.date >= from_date, 
         AudienceBudgetAction.date <= to_date,
-        AudienceBudgetAction.shopee_account_id.in_(allowed_ids)
+        scope.clause(AudienceBudgetAction.shopee_account_id)
     )
     if account_id:
-        if account_id not in allowed_ids: raise HTTPException(status_code=403, detail="Denied")
+        if account_id not in scope: raise HTTPException(status_code=403, detail="Denied")
         query = query.filter(AudienceBudgetAction.shopee_account_id == account_id)
         
     logs = query.order_by(desc(AudienceBudgetAction.created_at)).all()
@@ -492,16 +492,16 @@ def get_roas_logs(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if not allowed_ids: return []
+    scope = get_active_account_scope(db, current_user)
+    if not scope: return []
 
     query = db.query(AdsDailyMetrics).filter(
         AdsDailyMetrics.date >= from_date, 
         AdsDailyMetrics.date <= to_date,
-        AdsDailyMetrics.shopee_account_id.in_(allowed_ids)
+        scope.clause(AdsDailyMetrics.shopee_account_id)
     )
     if account_id:
-        if account_id not in allowed_ids: raise HTTPException(status_code=403, detail="Denied")
+        if account_id not in scope: raise HTTPException(status_code=403, detail="Denied")
         query = query.filter(AdsDailyMetrics.shopee_account_id == account_id)
         
     logs = query.order_by(desc(AdsDailyMetrics.date)).all()
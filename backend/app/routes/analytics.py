@@ -153,7 +153,7 @@ def get_shift_for_time(db: Session, order_time: datetime) -> Optional[ShiftTempl
 
 # Endpoints
 @router.get("/orders-hourly", response_model=List[HourlyData])
-async def get_hourly_orders(
+def get_hourly_orders(
     date: date = Query(..., description="Date in YYYY-MM-DD"),
     shop_id: Optional[int] = None,
     host_id: Optional[int] = None,
@@ -214,7 +214,7 @@ async def get_hourly_orders(
 
 
 @router.get("/orders-shift", response_model=List[ShiftData])
-async def get_shift_orders(
+def get_shift_orders(
     date: date = Query(...),
     shop_id: Optional[int] = None,
     host_id: Optional[int] = None,
@@ -266,7 +266,7 @@ async def get_shift_orders(
 
 
 @router.get("/bonus-shift", response_model=BonusShiftResponse)
-async def get_bonus_shift(
+def get_bonus_shift(
     date: date = Query(...),
     shop_id: Optional[int] = None,
     host_id: Optional[int] = None,
@@ -287,7 +287,7 @@ async def get_bonus_shift(
     # but we already did permission check above)
     # However, get_shift_orders expects params. We can just reuse logic or call function carefully.
     # Calling async function directly:
-    shift_orders_data = await get_shift_orders(date, shop_id, host_id, db, current_user)
+    shift_orders_data = get_shift_orders(date, shop_id, host_id, db, current_user)
     
     shift_results = []
     total_bonus = 0
@@ -317,7 +317,7 @@ async def get_bonus_shift(
 
 
 @router.get("/bonus-host-leaderboard", response_model=LeaderboardResponse)
-async def get_bonus_leaderboard(
+def get_bonus_leaderboard(
     date: date = Query(...),
     shop_id: Optional[int] = None,
     db: Session = Depends(get_db),
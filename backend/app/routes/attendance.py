@@ -11,7 +11,7 @@ from app.database import get_db
 from app.models.attendance import Attendance
 from app.models.employee import Employee
 from app.models.user import User
-from app.models.activity_log import ActivityLog
+from app.services.audit_log import audit_log
 from app.schemas.attendance import AttendanceCreate, AttendanceUpdate, AttendanceResponse
 from app.auth.dependencies import get_current_user, require_role
 
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/api/attendance", tags=["attendance"])
 
 
 @router.post("", response_model=AttendanceResponse, status_code=status.HTTP_201_CREATED)
-async def create_attendance(
+def create_attendance(
     attendance_data: AttendanceCreate,
     request: Request,
     db: Session = Depends(get_db),
@@ -86,7 +86,7 @@ async def create_attendance(
     db.refresh(db_attendance)
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="create_attendance",
         entity_type="attendance",
@@ -94,8 +94,6 @@ async def create_attendance(
         new_value={"employee_id": employee.id, "employee_name": employee.name, "date": str(attendance_data.date)},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     # Add employee name to response
     response_data = AttendanceResponse.from_orm(db_attendance)
@@ -105,7 +103,7 @@ async def create_attendance(
 
 
 @router.get("", response_model=List[AttendanceResponse])
-async def list_attendance(
+def list_attendance(
     employee_id: Optional[int] = Query(None, description="Filter by employee ID"),
     from_date: Optional[date] = Query(None, alias="from", description="Start date (YYYY-MM-DD)"),
     to_date: Optional[date] = Query(None, alias="to", description="End date (YYYY-MM-DD)"),
@@ -159,7 +157,7 @@ async def list_attendance(
 
 
 @router.get("/{attendance_id}", response_model=AttendanceResponse)
-async def get_attendance(
+def get_attendance(
     attendance_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -184,7 +182,7 @@ async def get_attendance(
 
 
 @router.put("/{attendance_id}", response_model=AttendanceResponse)
-async def update_attendance(
+def update_attendance(
     attendance_id: int,
     attendance_data: AttendanceUpdate,
     request: Request,
@@ -231,7 +229,7 @@ async def update_attendance(
     db.refresh(attendance)
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="update_attendance",
         entity_type="attendance",
@@ -240,8 +238,6 @@ async def update_attendance(
         new_value={"status": attendance.status},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     response = AttendanceResponse.from_orm(attendance)
     response.employee_name = attendance.employee.name if attendance.employee else "Unknown"
@@ -250,7 +246,7 @@ async def update_attendance(
 
 
 @router.delete("/{attendance_id}")
-async def delete_attendance(
+def delete_attendance(
     attendance_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -277,7 +273,7 @@ async def delete_attendance(
     db.commit()
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="delete_attendance",
         entity_type="attendance",
@@ -285,7 +281,5 @@ async def delete_attendance(
         old_value={"employee": employee_name, "date": str(attendance_date)},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return {"message": f"Attendance record for {employee_name} on {attendance_date} deleted successfully"}
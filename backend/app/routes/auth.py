@@ -7,7 +7,7 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models.user import User
-from app.models.activity_log import ActivityLog
+from app.services.audit_log import audit_log
 from app.auth.schemas import (
     LoginRequest,
     TokenResponse,
@@ -15,12 +15,15 @@ from app.auth.schemas import (
     UserResponse
 )
 from app.auth.jwt import (
-    verify_password,
     create_access_token,
     create_refresh_token,
     verify_token
 )
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_record, require_role
+from app.auth.user_state import token_claims
+from app.auth.access_code import access_code_cache
+from app.auth.login_throttle import login_throttle
+from app.auth.password_pool import password_pool
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
@@ -39,22 +42,34 @@ async def login(
     
     Returns access token and refresh token.
     """
+    ip_address = request.client.host if request.client else None
+    
+    # Refuse throttled clients before any query or bcrypt work
+    retry_after = login_throttle.retry_after(ip_address, credentials.username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Please try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+    
     # Find user by username or email
     user = db.query(User).filter(
         (User.username == credentials.username) | (User.email == credentials.username)
     ).first()
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    # bcrypt runs on the bounded password pool, off the event loop
+    if not user or not await password_pool.verify(credentials.password, user.password_hash):
+        login_throttle.record_failure(ip_address, credentials.username)
+        
         # Log failed login attempt
         if user:
-            log = ActivityLog(
+            audit_log.record(
                 user_id=user.id,
                 action="login_failed",
                 ip_address=request.client.host if request.client else None,
                 user_agent=request.headers.get("user-agent")
             )
-            db.add(log)
-            db.commit()
         
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,28 +83,24 @@ async def login(
             detail="User account is inactive"
         )
     
+    login_throttle.record_success(credentials.username)
+    
     # Update last login
     user.last_login = datetime.utcnow()
     db.commit()
     
     # Create tokens
-    token_data = {
-        "sub": str(user.id),  # Convert to string per JWT standard
-        "username": user.username,
-        "role": user.role
-    }
+    token_data = token_claims(user)
     access_token = create_access_token(token_data)
     refresh_token = create_refresh_token(token_data)
     
     # Log successful login
-    log = ActivityLog(
+    audit_log.record(
         user_id=user.id,
         action="login_success",
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent")
     )
-    db.add(log)
-    db.commit()
     
     return {
         "access_token": access_token,
@@ -136,12 +147,14 @@ async def refresh_token(
             detail="User not found or inactive"
         )
     
+    if payload.get("ver", 0) != (user.token_version or 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked"
+        )
+    
     # Create new tokens
-    token_data = {
-        "sub": str(user.id),  # Convert to string per JWT standard
-        "username": user.username,
-        "role": user.role
-    }
+    token_data = token_claims(user)
     access_token = create_access_token(token_data)
     new_refresh_token = create_refresh_token(token_data)
     
@@ -163,21 +176,19 @@ async def logout(
     Logout user (client should delete tokens).
     Logs the logout activity.
     """
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="logout",
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent")
     )
-    db.add(log)
-    db.commit()
     
     return {"message": "Successfully logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """
     Get current authenticated user information.
@@ -209,7 +220,7 @@ def generate_access_code() -> str:
 
 @router.post("/access-code/regenerate")
 async def regenerate_access_code(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -229,16 +240,15 @@ async def regenerate_access_code(
             current_user.access_code = new_code
             db.commit()
             db.refresh(current_user)
+            access_code_cache.invalidate_user(current_user.id)
             
             # Log activity
-            log = ActivityLog(
+            audit_log.record(
                 user_id=current_user.id,
                 action="access_code_regenerated",
                 entity_type="user",
                 entity_id=current_user.id
             )
-            db.add(log)
-            db.commit()
             
             return {
                 "access_code": new_code,
@@ -254,7 +264,7 @@ async def regenerate_access_code(
 
 @router.get("/access-code/me")
 async def get_my_access_code(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """
     Get current user's access code.
@@ -264,3 +274,22 @@ async def get_my_access_code(
         "access_code": current_user.access_code,
         "has_code": current_user.access_code is not None
     }
+
+
+@router.get("/access-code/cache-stats")
+def get_access_code_cache_stats(
+    current_user: User = Depends(require_role("admin"))
+):
+    """Hit rate and size of this worker's access-code resolution cache"""
+    return access_code_cache.stats()
+
+
+@router.get("/login-stats")
+def get_login_stats(
+    current_user: User = Depends(require_role("admin"))
+):
+    """This worker's password pool queueing and login throttle counters"""
+    return {
+        "password_pool": password_pool.stats(),
+        "throttle": login_throttle.stats(),
+    }
@@ -3,16 +3,22 @@ Bot Ingest Routes - API endpoints for 24H Playwright Bot
 Handles realtime snapshot ingestion and retrieval
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select
 from typing import Optional, List
 from datetime import datetime, timedelta
 import logging
 
-from app.database import get_db
-from app.auth.access_code import verify_access_code
+from app.database import get_db, get_async_db
+from app.auth.access_code import verify_access_code, verify_access_code_async
+from app.auth.dependencies import require_role
 from app.models.user import User
-from app.models.realtime_snapshot import RealtimeSnapshot, BotRun
+from app.models.realtime_snapshot import RealtimeSnapshot, RealtimeSnapshotLatest, RealtimeSnapshotRollup, BotRun, BotHeartbeat
+from app.services.bot_heartbeat import BotHeartbeatService, SCOPE_WORKER
+from app.services.bot_runs import BotRunService
+from app.services.realtime_snapshot import RealtimeSnapshotService
+from app.services.snapshot_retention import SnapshotRetentionService, RESOLUTIONS
 from app.schemas.realtime_snapshot import (
     IngestSnapshotRequest,
     IngestSnapshotResponse,
@@ -20,8 +26,18 @@ from app.schemas.realtime_snapshot import (
     IngestBatchResponse,
     SnapshotOut,
     SnapshotListResponse,
+    SnapshotRollupOut,
+    SnapshotRollupListResponse,
+    RetentionRunResponse,
     BotRunOut,
     BotRunListResponse,
+    BotRunStartRequest,
+    BotRunProgressRequest,
+    BotRunFinishRequest,
+    BotRunTrendResponse,
+    HeartbeatRequest,
+    HeartbeatResponse,
+    HeartbeatOut,
     CreatorLiveOverview,
     AdsOverview,
     SnapshotType
@@ -30,14 +46,39 @@ from app.schemas.realtime_snapshot import (
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/bot", tags=["Bot Ingest"])
 
+# Hot paths (ingest, heartbeat, progress, dashboards, status) run on an
+# AsyncSession; shared sync services are called through `db.run_sync`.
+# The remaining endpoints are plain `def` so FastAPI runs them in its threadpool.
+
+
+# ==================== HELPERS ====================
+
+def _latest_to_out(row: RealtimeSnapshotLatest) -> SnapshotOut:
+    """Map a realtime_snapshot_latest row to the public snapshot shape"""
+    return SnapshotOut(
+        id=row.snapshot_id,
+        shopee_account_id=row.shopee_account_id,
+        shop_name=row.shop_name,
+        snapshot_type=row.snapshot_type,
+        data=row.data or {},
+        scraped_at=row.scraped_at,
+        created_at=row.updated_at or row.scraped_at
+    )
+
+
+def _record_ingest(db: Session, snapshots: List[RealtimeSnapshot]) -> None:
+    """Mirror freshly inserted snapshots into the latest and heartbeat tables"""
+    RealtimeSnapshotService.upsert_latest(db, snapshots)
+    BotHeartbeatService.touch_from_snapshots(db, snapshots)
+
 
 # ==================== INGEST ENDPOINTS ====================
 
 @router.post("/realtime-snapshots/ingest", response_model=IngestSnapshotResponse)
 async def ingest_snapshot(
     payload: IngestSnapshotRequest,
-    current_user: User = Depends(verify_access_code),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ingest a single realtime snapshot from Playwright bot.
@@ -52,17 +93,30 @@ async def ingest_snapshot(
     print("=" * 60)
     
     try:
-        snapshot = RealtimeSnapshot(
+        snapshot = RealtimeSnapshotService.build_snapshot(
             shopee_account_id=payload.shopee_account_id,
             shop_name=payload.shop_name,
             snapshot_type=payload.snapshot_type.value,
             data=payload.data,
-            scraped_at=payload.scraped_at
+            scraped_at=payload.scraped_at,
+            client_snapshot_id=payload.client_snapshot_id
         )
         
-        db.add(snapshot)
-        db.commit()
-        db.refresh(snapshot)
+        inserted, _ = await db.run_sync(RealtimeSnapshotService.insert_snapshots, [snapshot])
+        if not inserted:
+            # Retry of an upload we already stored: report the original row
+            await db.rollback()
+            existing_id = await db.run_sync(RealtimeSnapshotService.find_by_dedup_key, snapshot.dedup_key)
+            logger.info(f"[BotIngest] Duplicate snapshot {existing_id} for {payload.shopee_account_id}")
+            return IngestSnapshotResponse(
+                success=True,
+                snapshot_id=existing_id,
+                deduplicated=True,
+                message=f"Snapshot already ingested for {payload.shopee_account_id}"
+            )
+        
+        await db.run_sync(_record_ingest, inserted)
+        await db.commit()
         
         logger.info(f"[BotIngest] Snapshot {snapshot.id} ingested for {payload.shopee_account_id}")
         
@@ -73,7 +127,7 @@ async def ingest_snapshot(
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"[BotIngest] Error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -84,45 +138,48 @@ async def ingest_snapshot(
 @router.post("/realtime-snapshots/ingest-batch", response_model=IngestBatchResponse)
 async def ingest_batch(
     payload: IngestBatchRequest,
-    current_user: User = Depends(verify_access_code),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Ingest multiple snapshots in one request"""
     print(f"🤖 BOT BATCH INGEST: {len(payload.snapshots)} snapshots")
     
-    ingested = 0
     failed = 0
+    built = []
     
     for snap in payload.snapshots:
         try:
-            snapshot = RealtimeSnapshot(
+            built.append(RealtimeSnapshotService.build_snapshot(
                 shopee_account_id=snap.shopee_account_id,
                 shop_name=snap.shop_name,
                 snapshot_type=snap.snapshot_type.value,
                 data=snap.data,
-                scraped_at=snap.scraped_at
-            )
-            db.add(snapshot)
-            ingested += 1
+                scraped_at=snap.scraped_at,
+                client_snapshot_id=snap.client_snapshot_id
+            ))
         except Exception as e:
             logger.error(f"[BotIngest] Batch error for {snap.shopee_account_id}: {e}")
             failed += 1
     
-    db.commit()
+    added, deduplicated = await db.run_sync(RealtimeSnapshotService.insert_snapshots, built)
+    await db.run_sync(_record_ingest, added)
+    await db.commit()
+    ingested = len(added)
     
     return IngestBatchResponse(
         success=failed == 0,
         total=len(payload.snapshots),
         ingested=ingested,
         failed=failed,
-        message=f"Ingested {ingested}/{len(payload.snapshots)} snapshots"
+        deduplicated=deduplicated,
+        message=f"Ingested {ingested}/{len(payload.snapshots)} snapshots ({deduplicated} duplicates skipped)"
     )
 
 
 # ==================== QUERY ENDPOINTS ====================
 
 @router.get("/realtime-snapshots", response_model=SnapshotListResponse)
-async def list_snapshots(
+def list_snapshots(
     snapshot_type: Optional[str] = Query(None, description="Filter by type"),
     account_id: Optional[str] = Query(None, description="Filter by account"),
     limit: int = Query(100, ge=1, le=1000),
@@ -151,141 +208,161 @@ async def list_snapshots(
 @router.get("/realtime-snapshots/latest")
 async def get_latest_snapshots(
     snapshot_type: Optional[str] = Query(None),
-    current_user: User = Depends(verify_access_code),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get latest snapshot per account (for dashboard overview)"""
-    # Subquery to get max scraped_at per account per type
-    subq = db.query(
-        RealtimeSnapshot.shopee_account_id,
-        func.max(RealtimeSnapshot.scraped_at).label('max_scraped')
-    ).group_by(RealtimeSnapshot.shopee_account_id)
+    latest = await db.run_sync(RealtimeSnapshotService.get_latest, snapshot_type)
     
-    if snapshot_type:
-        subq = subq.filter(RealtimeSnapshot.snapshot_type == snapshot_type)
-    
-    subq = subq.subquery()
+    return {
+        "success": True,
+        "total": len(latest),
+        "snapshots": [_latest_to_out(row) for row in latest]
+    }
+
+
+@router.get("/realtime-snapshots/rollups", response_model=SnapshotRollupListResponse)
+def list_snapshot_rollups(
+    account_id: str = Query(..., description="Shopee account identifier"),
+    snapshot_type: str = Query(..., description="Snapshot type"),
+    resolution: str = Query("1h", description="Bucket size: 5m or 1h"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    current_user: User = Depends(verify_access_code),
+    db: Session = Depends(get_db)
+):
+    """List downsampled metrics for snapshots older than the raw retention window"""
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid resolution '{resolution}'. Use one of: {', '.join(RESOLUTIONS)}"
+        )
     
-    # Join with main table to get full records
-    query = db.query(RealtimeSnapshot).join(
-        subq,
-        (RealtimeSnapshot.shopee_account_id == subq.c.shopee_account_id) &
-        (RealtimeSnapshot.scraped_at == subq.c.max_scraped)
+    query = db.query(RealtimeSnapshotRollup).filter(
+        RealtimeSnapshotRollup.shopee_account_id == account_id,
+        RealtimeSnapshotRollup.snapshot_type == snapshot_type,
+        RealtimeSnapshotRollup.resolution == resolution
     )
+    if start:
+        query = query.filter(RealtimeSnapshotRollup.bucket_start >= start)
+    if end:
+        query = query.filter(RealtimeSnapshotRollup.bucket_start < end)
     
-    if snapshot_type:
-        query = query.filter(RealtimeSnapshot.snapshot_type == snapshot_type)
-    
-    snapshots = query.all()
+    rollups = query.order_by(RealtimeSnapshotRollup.bucket_start).limit(5000).all()
     
-    return {
-        "success": True,
-        "total": len(snapshots),
-        "snapshots": [SnapshotOut.model_validate(s) for s in snapshots]
-    }
+    return SnapshotRollupListResponse(
+        success=True,
+        total=len(rollups),
+        rollups=[SnapshotRollupOut.model_validate(r) for r in rollups]
+    )
+
+
+@router.post("/maintenance/retention", response_model=RetentionRunResponse)
+def run_snapshot_retention(
+    retention_hours: Optional[int] = Query(None, ge=1, description="Override raw retention window"),
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """
+    Roll up and drop raw snapshots older than the retention window.
+    Destructive, so it needs an admin session rather than a bot access code;
+    the background retention loop normally does this.
+    """
+    SnapshotRetentionService.ensure_partitions(db)
+    result = SnapshotRetentionService.run(db, retention_hours=retention_hours)
+    return RetentionRunResponse(success=True, **result)
 
 
 # ==================== DASHBOARD AGGREGATION ====================
 
 @router.get("/dashboard/creator-live", response_model=CreatorLiveOverview)
 async def get_creator_live_overview(
-    current_user: User = Depends(verify_access_code),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get aggregated Creator Live overview for dashboard"""
-    # Get latest snapshots for creator_live type
-    subq = db.query(
-        RealtimeSnapshot.shopee_account_id,
-        func.max(RealtimeSnapshot.scraped_at).label('max_scraped')
-    ).filter(
-        RealtimeSnapshot.snapshot_type == 'creator_live'
-    ).group_by(RealtimeSnapshot.shopee_account_id).subquery()
+    latest = RealtimeSnapshotLatest
+    is_creator_live = latest.snapshot_type == SnapshotType.CREATOR_LIVE.value
     
-    snapshots = db.query(RealtimeSnapshot).join(
-        subq,
-        (RealtimeSnapshot.shopee_account_id == subq.c.shopee_account_id) &
-        (RealtimeSnapshot.scraped_at == subq.c.max_scraped)
-    ).filter(RealtimeSnapshot.snapshot_type == 'creator_live').all()
+    totals = (await db.execute(select(
+        func.count(),
+        func.coalesce(func.sum(latest.orders_ready_to_ship), 0),
+        func.coalesce(func.sum(latest.pending_orders), 0),
+        func.max(latest.scraped_at)
+    ).where(is_creator_live))).one()
     
-    total_orders_ready = 0
-    total_pending = 0
-    accounts = []
-    last_updated = None
+    rows = (await db.execute(select(
+        latest.shopee_account_id,
+        latest.shop_name,
+        latest.orders_ready_to_ship,
+        latest.pending_orders,
+        latest.scraped_at
+    ).where(is_creator_live).order_by(latest.shopee_account_id))).all()
     
-    for snap in snapshots:
-        data = snap.data or {}
-        total_orders_ready += data.get('orders_ready_to_ship', 0)
-        total_pending += data.get('pending_orders', 0)
-        
-        accounts.append({
-            "shopee_account_id": snap.shopee_account_id,
-            "shop_name": snap.shop_name,
-            "orders_ready_to_ship": data.get('orders_ready_to_ship', 0),
-            "pending_orders": data.get('pending_orders', 0),
-            "scraped_at": snap.scraped_at.isoformat() if snap.scraped_at else None
-        })
-        
-        if not last_updated or (snap.scraped_at and snap.scraped_at > last_updated):
-            last_updated = snap.scraped_at
+    accounts = [
+        {
+            "shopee_account_id": row.shopee_account_id,
+            "shop_name": row.shop_name,
+            "orders_ready_to_ship": row.orders_ready_to_ship or 0,
+            "pending_orders": row.pending_orders or 0,
+            "scraped_at": row.scraped_at.isoformat() if row.scraped_at else None
+        }
+        for row in rows
+    ]
     
     return CreatorLiveOverview(
-        total_accounts=len(snapshots),
-        total_orders_ready=total_orders_ready,
-        total_pending=total_pending,
-        last_updated=last_updated,
+        total_accounts=totals[0],
+        total_orders_ready=int(totals[1]),
+        total_pending=int(totals[2]),
+        last_updated=totals[3],
         accounts=accounts
     )
 
 
 @router.get("/dashboard/ads", response_model=AdsOverview)
 async def get_ads_overview(
-    current_user: User = Depends(verify_access_code),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get aggregated Ads overview for dashboard"""
-    subq = db.query(
-        RealtimeSnapshot.shopee_account_id,
-        func.max(RealtimeSnapshot.scraped_at).label('max_scraped')
-    ).filter(
-        RealtimeSnapshot.snapshot_type == 'ads'
-    ).group_by(RealtimeSnapshot.shopee_account_id).subquery()
+    latest = RealtimeSnapshotLatest
+    is_ads = latest.snapshot_type == SnapshotType.ADS.value
     
-    snapshots = db.query(RealtimeSnapshot).join(
-        subq,
-        (RealtimeSnapshot.shopee_account_id == subq.c.shopee_account_id) &
-        (RealtimeSnapshot.scraped_at == subq.c.max_scraped)
-    ).filter(RealtimeSnapshot.snapshot_type == 'ads').all()
+    totals = (await db.execute(select(
+        func.count(),
+        func.coalesce(func.sum(latest.spend_today), 0),
+        func.coalesce(func.sum(latest.budget_available), 0),
+        func.coalesce(func.sum(latest.coins), 0),
+        func.max(latest.scraped_at)
+    ).where(is_ads))).one()
     
-    total_spend = 0.0
-    total_budget = 0.0
-    total_coins = 0.0
-    accounts = []
-    last_updated = None
+    rows = (await db.execute(select(
+        latest.shopee_account_id,
+        latest.shop_name,
+        latest.spend_today,
+        latest.budget_available,
+        latest.coins,
+        latest.scraped_at
+    ).where(is_ads).order_by(latest.shopee_account_id))).all()
     
-    for snap in snapshots:
-        data = snap.data or {}
-        total_spend += float(data.get('spend_today', 0))
-        total_budget += float(data.get('budget_available', 0))
-        total_coins += float(data.get('coins', 0))
-        
-        accounts.append({
-            "shopee_account_id": snap.shopee_account_id,
-            "shop_name": snap.shop_name,
-            "spend_today": data.get('spend_today', 0),
-            "budget_available": data.get('budget_available', 0),
-            "coins": data.get('coins', 0),
-            "scraped_at": snap.scraped_at.isoformat() if snap.scraped_at else None
-        })
-        
-        if not last_updated or (snap.scraped_at and snap.scraped_at > last_updated):
-            last_updated = snap.scraped_at
+    accounts = [
+        {
+            "shopee_account_id": row.shopee_account_id,
+            "shop_name": row.shop_name,
+            "spend_today": float(row.spend_today or 0),
+            "budget_available": float(row.budget_available or 0),
+            "coins": float(row.coins or 0),
+            "scraped_at": row.scraped_at.isoformat() if row.scraped_at else None
+        }
+        for row in rows
+    ]
     
     return AdsOverview(
-        total_accounts=len(snapshots),
-        total_spend_today=total_spend,
-        total_budget_available=total_budget,
-        total_coins=total_coins,
-        last_updated=last_updated,
+        total_accounts=totals[0],
+        total_spend_today=float(totals[1]),
+        total_budget_available=float(totals[2]),
+        total_coins=float(totals[3]),
+        last_updated=totals[4],
         accounts=accounts
     )
 
@@ -293,7 +370,7 @@ async def get_ads_overview(
 # ==================== BOT STATUS ====================
 
 @router.get("/runs", response_model=BotRunListResponse)
-async def list_bot_runs(
+def list_bot_runs(
     limit: int = Query(10, ge=1, le=100),
     current_user: User = Depends(verify_access_code),
     db: Session = Depends(get_db)
@@ -307,30 +384,166 @@ async def list_bot_runs(
     )
 
 
-@router.get("/status")
-async def get_bot_status(
+@router.get("/runs/trends", response_model=BotRunTrendResponse)
+def get_bot_run_trends(
+    limit: int = Query(50, ge=1, le=500),
+    target_interval_ms: int = Query(60000, ge=1000, description="Desired SYNC_INTERVAL to size MAX_WORKERS for"),
+    current_user: User = Depends(verify_access_code),
+    db: Session = Depends(get_db)
+):
+    """Cycle duration, throughput and scrape-time trends with MAX_WORKERS / SYNC_INTERVAL suggestions"""
+    result = BotRunService.trends(db, limit=limit, target_interval_ms=target_interval_ms)
+    result["runs"] = [BotRunOut.model_validate(r) for r in result["runs"]]
+    return BotRunTrendResponse(success=True, **result)
+
+
+@router.post("/runs/start", response_model=BotRunOut)
+def start_bot_run(
+    payload: BotRunStartRequest,
+    current_user: User = Depends(verify_access_code),
+    db: Session = Depends(get_db)
+):
+    """Start a supervisor cycle"""
+    run = BotRunService.start(
+        db,
+        accounts_total=payload.accounts_total,
+        run_id=payload.run_id,
+        worker_id=payload.worker_id,
+        max_workers=payload.max_workers
+    )
+    db.commit()
+    db.refresh(run)
+    return BotRunOut.model_validate(run)
+
+
+@router.post("/runs/{run_id}/progress")
+async def report_bot_run_progress(
+    run_id: str,
+    payload: BotRunProgressRequest,
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Record one finished account in a running cycle"""
+    recorded = await db.run_sync(
+        BotRunService.record_progress,
+        run_id=run_id,
+        shopee_account_id=payload.shopee_account_id,
+        success=payload.success,
+        duration_ms=payload.duration_ms,
+        snapshots=payload.snapshots
+    )
+    if not recorded:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No running bot run '{run_id}'"
+        )
+    await db.commit()
+    return {"success": True, "run_id": run_id}
+
+
+@router.post("/runs/{run_id}/finish", response_model=BotRunOut)
+def finish_bot_run(
+    run_id: str,
+    payload: BotRunFinishRequest,
     current_user: User = Depends(verify_access_code),
     db: Session = Depends(get_db)
 ):
-    """Get current bot status based on recent snapshots"""
-    # Check if we have snapshots in last 5 minutes
-    five_min_ago = datetime.utcnow() - timedelta(minutes=5)
+    """Close a cycle and store its throughput metrics"""
+    run = BotRunService.finish(db, run_id, payload.status, payload.error_message)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bot run '{run_id}' not found"
+        )
+    db.commit()
+    db.refresh(run)
+    return BotRunOut.model_validate(run)
+
+
+@router.post("/heartbeat", response_model=HeartbeatResponse)
+async def post_heartbeat(
+    payload: HeartbeatRequest,
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Heartbeat from supervisor.js.
+    Send periodically while running; include per-account results and
+    cycle_duration_ms after each completed cycle.
+    """
+    updated = await db.run_sync(
+        BotHeartbeatService.record_heartbeat,
+        worker_id=payload.worker_id,
+        status=payload.status,
+        cycle_duration_ms=payload.cycle_duration_ms,
+        accounts=[a.model_dump() for a in payload.accounts]
+    )
+    await db.commit()
     
-    recent_count = db.query(RealtimeSnapshot).filter(
-        RealtimeSnapshot.scraped_at >= five_min_ago
-    ).count()
+    return HeartbeatResponse(success=True, worker_id=payload.worker_id, accounts_updated=updated)
+
+
+def _heartbeat_to_out(row: BotHeartbeat, now: datetime, stale_after: int) -> HeartbeatOut:
+    """Attach staleness to a heartbeat row"""
+    seen_at = row.last_snapshot_at if row.scope != SCOPE_WORKER and row.last_snapshot_at else row.last_seen_at
+    staleness = max((now - seen_at).total_seconds(), 0.0)
+    return HeartbeatOut(
+        scope=row.scope,
+        key=row.key,
+        worker_id=row.worker_id,
+        shop_name=row.shop_name,
+        status=row.status,
+        last_seen_at=row.last_seen_at,
+        last_snapshot_at=row.last_snapshot_at,
+        last_cycle_at=row.last_cycle_at,
+        last_cycle_duration_ms=row.last_cycle_duration_ms,
+        cycles_total=row.cycles_total or 0,
+        success_count=row.success_count or 0,
+        failure_count=row.failure_count or 0,
+        consecutive_failures=row.consecutive_failures or 0,
+        last_error=row.last_error,
+        staleness_seconds=round(staleness, 1),
+        is_stale=staleness > stale_after
+    )
+
+
+@router.get("/status")
+async def get_bot_status(
+    stale_after_seconds: int = Query(300, ge=30, description="Seconds without data before a worker/account is stale"),
+    current_user: User = Depends(verify_access_code_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get current bot status from the heartbeat table.
+    O(workers + accounts): no snapshot history is scanned.
+    """
+    now = datetime.utcnow()
+    window_start = now - timedelta(seconds=stale_after_seconds)
     
-    latest = db.query(RealtimeSnapshot).order_by(
-        desc(RealtimeSnapshot.scraped_at)
-    ).first()
+    heartbeats = await db.run_sync(BotHeartbeatService.get_all)
+    rows = [_heartbeat_to_out(r, now, stale_after_seconds) for r in heartbeats]
+    workers = [r for r in rows if r.scope == SCOPE_WORKER]
+    accounts = [r for r in rows if r.scope != SCOPE_WORKER]
+    
+    # Snapshots ingested in the window: an index range scan on scraped_at
+    # (on Postgres confined to the current daily partitions)
+    recent_count = (await db.execute(
+        select(func.count()).select_from(RealtimeSnapshot).where(
+            RealtimeSnapshot.scraped_at >= window_start
+        )
+    )).scalar()
+    last_snapshot_at = max((a.last_snapshot_at for a in accounts if a.last_snapshot_at), default=None)
     
-    is_active = recent_count > 0
+    is_active = recent_count > 0 or any(not w.is_stale and w.status != "stopped" for w in workers)
     
     return {
         "success": True,
         "is_active": is_active,
         "status": "active" if is_active else "inactive",
         "recent_snapshots_count": recent_count,
-        "last_snapshot_at": latest.scraped_at.isoformat() if latest else None,
-        "message": "Bot is running" if is_active else "No recent snapshots (>5 min)"
+        "last_snapshot_at": last_snapshot_at.isoformat() if last_snapshot_at else None,
+        "message": "Bot is running" if is_active else f"No recent snapshots (>{stale_after_seconds // 60} min)",
+        "stale_accounts": sum(1 for a in accounts if a.is_stale),
+        "workers": workers,
+        "accounts": accounts
     }
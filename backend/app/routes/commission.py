@@ -1,21 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, status, Query, Request, UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case
+from sqlalchemy import func, case
 from typing import Optional, List
 from datetime import datetime, date
-from decimal import Decimal
 from pydantic import BaseModel
 import csv
-import io
+import importlib.util
 import logging
 
 from app.database import get_db
 from app.models.order import Order
-from app.models.shopee_account import ShopeeAccount
+from app.models.payout_batch import PayoutBatch
 from app.models.user import User
 from app.auth.dependencies import get_current_user, require_role
-from app.core.permissions import verify_financial_access, apply_scope_restriction
+from app.core.permissions import FULL_ACCESS_ROLES, verify_financial_access, apply_scope_restriction
+from app.services.payout_batch import PayoutBatchService, parse_order_ids, record_mark_paid, run_payout_batch
+from app.services.payout_export import EXPORT_FORMATS, payout_export_query, stream_payouts
+from app.services.payout_history import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PayoutHistoryService, date_range_filter
+from app.services.payout_summary import PAYOUT_STATUSES, PayoutSummaryService
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -46,6 +49,8 @@ class PayoutRow(BaseModel):
 class PayoutHistoryResponse(BaseModel):
     summary: PayoutSummary
     rows: List[PayoutRow]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; None on the last page
+    total_count: Optional[int] = None  # Rows matching the filters (not computed for searches)
 
 
 class MarkPaidRequest(BaseModel):
@@ -54,18 +59,21 @@ class MarkPaidRequest(BaseModel):
 
 
 @router.get("/payout-history", response_model=PayoutHistoryResponse)
-async def get_payout_history(
+def get_payout_history(
     request: Request,
     from_date: date = Query(..., alias="from"),
     to_date: date = Query(..., alias="to"),
     status: Optional[str] = None,  # pending, paid, validating
     search: Optional[str] = None,
     account_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get payout history with status filtering and summary cards.
+    Rows are paged newest first; pass `next_cursor` back as `cursor` for the next page.
     RBAC: Owner/Admin/Leader (Full), Host (Scoped to handled orders)
     """
     # RBAC Logic
@@ -75,177 +83,200 @@ async def get_payout_history(
             detail="You do not have permission to view payout history"
         )
 
-    # Base query
-    query = db.query(Order).join(
-        ShopeeAccount, Order.shopee_account_id == ShopeeAccount.id
-    ).filter(
-        and_(
-            func.date(Order.date) >= from_date,
-            func.date(Order.date) <= to_date,
-            Order.status == 'completed'
+    try:
+        rows, next_cursor = PayoutHistoryService.page(
+            db, current_user, from_date, to_date,
+            status=status, search=search, account_id=account_id, cursor=cursor, limit=limit
         )
-    )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Calculate summary stats (ignoring status filter) - Optimized
-    summary_query = db.query(
-        func.sum(Order.commission_amount).label('total'),
-        func.sum(case((Order.payout_status == 'paid', Order.commission_amount), else_=0)).label('paid'),
-        func.sum(case((Order.payout_status == 'pending', Order.commission_amount), else_=0)).label('pending'),
-        func.sum(case((Order.payout_status == 'validating', Order.commission_amount), else_=0)).label('validating')
-    ).filter(
-        and_(
-            func.date(Order.date) >= from_date,
-            func.date(Order.date) <= to_date,
-            Order.status == 'completed'
-        )
-    )
-    
-    # Apply RBAC Scope
-    query = apply_scope_restriction(query, current_user, Order)
-    summary_query = apply_scope_restriction(summary_query, current_user, Order)
-
-    if account_id:
-        query = query.filter(Order.shopee_account_id == account_id)
-        summary_query = summary_query.filter(Order.shopee_account_id == account_id)
-        
-    # Apply filters to main query
-    if status and status != 'all':
-        query = query.filter(Order.payout_status == status)
-        
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Order.order_id.ilike(search_term),
-                ShopeeAccount.account_name.ilike(search_term)
-            )
-        )
-        
-    rows = query.order_by(Order.date.desc()).limit(500).all()  # Limit for performance
-    stats = summary_query.first()
-    
-    # Map Response
-    response_rows = []
-    for order in rows:
-        response_rows.append(PayoutRow(
-            order_id=order.order_id or f"ORDER-{order.id}",
-            account_id=order.shopee_account_id,
-            account_name=order.shopee_account.account_name if order.shopee_account else "Unknown",
-            commission_amount=float(order.commission_amount or 0),
-            payout_status=order.payout_status or 'pending',
-            payment_method=order.payment_method,
-            validated_at=order.validated_at,
-            completed_at=order.date, # Using order date as completion date for now
-            paid_at=order.paid_at,
-            date=order.date
-        ))
-        
-    # Handle case where stats might be None (if no rows match) or internal sums None
-    total_val = stats.total if stats and stats.total else 0
-    paid_val = stats.paid if stats and stats.paid else 0
-    pending_val = stats.pending if stats and stats.pending else 0
-    validating_val = stats.validating if stats and stats.validating else 0
+    # Summary cards (ignoring status filter)
+    total_count = None
+    if current_user.role in FULL_ACCESS_ROLES:
+        # Served from the payout rollup instead of aggregating orders
+        by_status = PayoutSummaryService.summarize(db, from_date, to_date, account_id)
+        totals = {s: by_status[s]["total"] for s in PAYOUT_STATUSES}
+        total_val = sum(totals.values())
+        if not search:
+            counts = {s: by_status[s]["count"] for s in PAYOUT_STATUSES}
+            total_count = counts.get(status, 0) if status and status != 'all' else sum(counts.values())
+    else:
+        # Scoped roles only see orders they handle, which the rollup does not track
+        summary_query = db.query(
+            func.sum(Order.commission_amount).label('total'),
+            func.sum(case((Order.payout_status == 'paid', Order.commission_amount), else_=0)).label('paid'),
+            func.sum(case((Order.payout_status == 'pending', Order.commission_amount), else_=0)).label('pending'),
+            func.sum(case((Order.payout_status == 'validating', Order.commission_amount), else_=0)).label('validating')
+        ).filter(date_range_filter(from_date, to_date))
+        summary_query = apply_scope_restriction(summary_query, current_user, Order)
+        if account_id:
+            summary_query = summary_query.filter(Order.shopee_account_id == account_id)
+        stats = summary_query.first()
+        totals = {s: (getattr(stats, s) if stats else None) or 0 for s in PAYOUT_STATUSES}
+        total_val = (stats.total if stats else None) or 0
 
     return PayoutHistoryResponse(
         summary=PayoutSummary(
             total_commission=float(total_val),
-            paid=float(paid_val),
-            pending=float(pending_val),
-            validating=float(validating_val)
+            paid=float(totals["paid"]),
+            pending=float(totals["pending"]),
+            validating=float(totals["validating"])
         ),
-        rows=response_rows
+        rows=[PayoutRow(**row) for row in rows],
+        next_cursor=next_cursor,
+        total_count=total_count
     )
 
 
 @router.post("/mark-paid")
-async def mark_commissions_paid(
+def mark_commissions_paid(
+    request: Request,
     payload: MarkPaidRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("admin"))
 ):
     """
-    Bulk mark commissions as PAID
+    Bulk mark commissions as PAID.
+    Runs chunked set-based UPDATEs in one transaction; for very large lists or
+    id files use POST /mark-paid/batches instead.
     """
-    orders = db.query(Order).filter(Order.order_id.in_(payload.order_ids)).all()
-    
-    if not orders:
+    result = PayoutBatchService.mark_paid(db, payload.order_ids, payload.payment_method)
+    if not result["matched"]:
         raise HTTPException(status_code=404, detail="No orders found")
-        
-    count = 0
-    now = datetime.utcnow()
-    
-    for order in orders:
-        if order.payout_status != 'paid':
-            order.payout_status = 'paid'
-            order.paid_at = now
-            order.payment_method = payload.payment_method
-            count += 1
-            
     db.commit()
-    
-    return {"message": f"Successfully marked {count} orders as PAID"}
+    record_mark_paid(
+        result, payload.payment_method,
+        user_id=current_user.id,
+        ip_address=request.client.host if request.client else None
+    )
+
+    return {"message": f"Successfully marked {result['updated']} orders as PAID", **result}
+
+
+def _get_batch(db: Session, batch_id: int, current_user: User) -> PayoutBatch:
+    batch = db.get(PayoutBatch, batch_id)
+    if not batch or (batch.user_id != current_user.id and current_user.role != "super_admin"):
+        raise HTTPException(status_code=404, detail="Payout batch not found")
+    return batch
+
+
+@router.post("/mark-paid/batches", status_code=status.HTTP_202_ACCEPTED)
+def create_payout_batch(
+    payload: MarkPaidRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Mark a list of order ids paid in the background, one transaction per chunk;
+    poll GET /mark-paid/batches/{id} for progress.
+    """
+    try:
+        batch = PayoutBatchService.create(db, payload.order_ids, current_user.id, payload.payment_method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    background_tasks.add_task(run_payout_batch, batch.id)
+    return batch.to_dict()
+
+
+@router.post("/mark-paid/batches/upload", status_code=status.HTTP_202_ACCEPTED)
+def upload_payout_batch(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    payment_method: str = Form("transfer"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Same as POST /mark-paid/batches, with the order ids read from an uploaded
+    CSV ("Order ID"/"order_id" column, else the first column) or text file.
+    """
+    try:
+        order_ids = parse_order_ids(file.file)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read order ids: {e}")
+    try:
+        batch = PayoutBatchService.create(
+            db, order_ids, current_user.id, payment_method, source="file", filename=file.filename
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    background_tasks.add_task(run_payout_batch, batch.id)
+    return batch.to_dict()
+
+
+@router.get("/mark-paid/batches")
+def list_payout_batches(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """Recent mark-paid batches started by the current user"""
+    batches = db.query(PayoutBatch).filter(
+        PayoutBatch.user_id == current_user.id
+    ).order_by(PayoutBatch.id.desc()).limit(min(limit, 100)).all()
+    return {"batches": [batch.to_dict() for batch in batches]}
+
+
+@router.get("/mark-paid/batches/{batch_id}")
+def get_payout_batch(
+    batch_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """Status, progress and per-chunk counts of a mark-paid batch"""
+    return _get_batch(db, batch_id, current_user).to_dict()
+
+
+@router.post("/mark-paid/batches/{batch_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+def resume_payout_batch(
+    batch_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """Retry a failed batch from its last committed chunk"""
+    batch = _get_batch(db, batch_id, current_user)
+    try:
+        PayoutBatchService.requeue(db, batch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    background_tasks.add_task(run_payout_batch, batch.id)
+    return batch.to_dict()
 
 
 @router.get("/export-csv")
-async def export_payout_csv(
+def export_payout_csv(
     request: Request,
     from_date: date = Query(..., alias="from"),
     to_date: date = Query(..., alias="to"),
     status: Optional[str] = None,
     account_id: Optional[int] = None,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|csv\\.gz|parquet)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Export payout history as CSV
+    Export payout history as CSV (optionally gzipped) or Parquet.
+    Rows stream from a server-side cursor as they are encoded.
     """
     # RBAC Logic
     if not verify_financial_access(current_user, "export-csv"):
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    query = db.query(Order).join(ShopeeAccount).filter(
-        and_(
-            func.date(Order.date) >= from_date,
-            func.date(Order.date) <= to_date,
-            Order.status == 'completed'
-        )
-    )
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=400, detail="Parquet export is not available on this server")
+
+    query = payout_export_query(db, current_user, from_date, to_date, status, account_id)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"payouts_{from_date}_{to_date}.{extension}"
 
-    # Apply Scope Restriction
-    query = apply_scope_restriction(query, current_user, Order)
-    
-    if account_id:
-        query = query.filter(Order.shopee_account_id == account_id)
-        
-    if status and status != 'all':
-        query = query.filter(Order.payout_status == status)
-        
-    results = query.order_by(Order.date.desc()).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow([
-        'Order ID', 'Date', 'Account', 'Commission (Rp)', 
-        'Status', 'Payment Method', 'Paid At'
-    ])
-    
-    for order in results:
-        writer.writerow([
-            order.order_id,
-            order.date.strftime('%Y-%m-%d %H:%M'),
-            order.shopee_account.account_name if order.shopee_account else '-',
-            f"{float(order.commission_amount):.2f}",
-            order.payout_status.upper(),
-            order.payment_method or '-',
-            order.paid_at.strftime('%Y-%m-%d %H:%M') if order.paid_at else '-'
-        ])
-        
-    output.seek(0)
-    filename = f"payouts_{from_date}_{to_date}.csv"
-    
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
+        stream_payouts(query, export_format),
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
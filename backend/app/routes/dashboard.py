@@ -23,7 +23,7 @@ router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
 
 @router.get("/owner")
-async def get_owner_dashboard(
+def get_owner_dashboard(
     date_param: Optional[str] = Query(None, alias="date"),
     account_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
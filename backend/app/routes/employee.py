@@ -9,7 +9,7 @@ from app.database import get_db
 from app.models.employee import Employee
 from app.models.studio import Studio
 from app.models.user import User
-from app.models.activity_log import ActivityLog
+from app.services.audit_log import audit_log
 from app.schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeResponse
 from app.auth.dependencies import get_current_user, require_role
 
@@ -61,7 +61,7 @@ async def create_employee(
     db.refresh(db_employee)
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="create_employee",
         entity_type="employee",
@@ -69,8 +69,6 @@ async def create_employee(
         new_value={"name": db_employee.name, "role": db_employee.role},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return db_employee
 
@@ -165,7 +163,7 @@ async def update_employee(
     db.refresh(employee)
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="update_employee",
         entity_type="employee",
@@ -174,8 +172,6 @@ async def update_employee(
         new_value={"name": employee.name, "email": employee.email, "role": employee.role},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return employee
 
@@ -205,7 +201,7 @@ async def delete_employee(
     db.commit()
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="delete_employee",
         entity_type="employee",
@@ -214,7 +210,5 @@ async def delete_employee(
         new_value={"is_active": False},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return {"message": f"Employee {employee.name} deleted successfully"}
@@ -1,20 +1,21 @@
 """
 CSV Import routes for Orders/Commissions
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
-from datetime import datetime
 import pandas as pd
-import io
+import json
 import numpy as np
 
+from app.config import settings
 from app.database import get_db
-from app.models.order import Order
 from app.models.shopee_account import ShopeeAccount
 from app.models.user import User
+from app.models.import_job import ImportJob
+from app.services.order_import import OrderImportService, read_csv
+from app.services.import_jobs import ImportJobService, count_csv_rows, detect_format, run_import_job
 from app.auth.dependencies import get_current_user, require_role
 
 router = APIRouter()
@@ -41,61 +42,40 @@ class ImportResult(BaseModel):
     failed: int
     failed_rows: List[Dict[str, Any]]
 
-# Helper to normalize dates
-def parse_date(date_str: Any) -> Optional[datetime]:
-    if not date_str or pd.isna(date_str):
-        return None
-    
-    date_str = str(date_str).strip()
-    
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%d-%m-%Y %H:%M",
-        "%d/%m/%Y %H:%M",
-        "%Y-%m-%d",
-        "%d-%m-%Y",
-        "%d/%m/%Y"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-            
-    return None
+def _read_preview(file: UploadFile, sample_size: int = 10):
+    """Header and first rows of an upload plus its row count, without loading the whole file"""
+    file_format = detect_format(file.filename)
+    if file_format == "csv":
+        df = pd.read_csv(file.file, nrows=sample_size)
+        file.file.seek(0)
+        return df, count_csv_rows(file.file)
 
-# Helper to normalize currency
-def parse_currency(val: Any) -> float:
-    if not val or pd.isna(val):
-        return 0.0
-    
-    if isinstance(val, (int, float)):
-        return float(val)
-        
-    s = str(val).strip()
-    # Remove currency symbols and separators
-    s = s.replace('Rp', '').replace('.', '').replace(',', '.')
+    from openpyxl import load_workbook
+    workbook = load_workbook(file.file, read_only=True, data_only=True)
     try:
-        return float(s)
-    except:
-        return 0.0
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True, max_row=sample_size + 1)
+        header = [str(name) for name in next(rows, ())]
+        df = pd.DataFrame.from_records(list(rows), columns=header)
+        return df, max((sheet.max_row or 1) - 1, 0)
+    finally:
+        workbook.close()
 
 @router.post("/csv/preview", response_model=ImportPreviewResponse)
-async def preview_csv(
+def preview_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_role("admin"))
 ):
     """
-    Parse CSV, detect headers, show preview, suggest mapping
+    Parse CSV/XLSX header and first rows, show preview, suggest mapping
     """
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(400, "File must be CSV")
+    try:
+        detect_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
         
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
+        df, total_rows = _read_preview(file)
         
         # Replace NaN with None for JSON compatibility
         df = df.replace({np.nan: None})
@@ -140,132 +120,133 @@ async def preview_csv(
             headers=headers,
             sample_rows=sample,
             suggested_mapping=mapping,
-            total_rows=len(df),
+            total_rows=total_rows,
             warnings=[]
         )
         
     except Exception as e:
-        raise HTTPException(400, f"Failed to parse CSV: {str(e)}")
+        raise HTTPException(400, f"Failed to parse file: {str(e)}")
+
+def _get_shop(db: Session, shop_id: int) -> ShopeeAccount:
+    shop = db.query(ShopeeAccount).filter(ShopeeAccount.id == shop_id).first()
+    if not shop:
+        raise HTTPException(404, "Shopee Account not found")
+    return shop
+
+def _parse_mapping(mapping: str) -> Dict[str, str]:
+    try:
+        field_mapping = json.loads(mapping)
+    except ValueError:
+        raise HTTPException(400, "mapping must be a JSON object")
+    if not isinstance(field_mapping, dict):
+        raise HTTPException(400, "mapping must be a JSON object")
+    return field_mapping
+
+def _get_job(db: Session, job_id: int, current_user: User) -> ImportJob:
+    job = db.get(ImportJob, job_id)
+    if not job or (job.user_id != current_user.id and current_user.role != "super_admin"):
+        raise HTTPException(404, "Import job not found")
+    return job
 
 @router.post("/csv/execute", response_model=ImportResult)
-async def execute_import(
+def execute_import(
     request: ImportExecuteRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("admin"))
 ):
     """
-    Execute import with mapping
+    Execute import with mapping (rows parsed by the browser)
     """
-    # Verify shop
-    shop = db.query(ShopeeAccount).filter(ShopeeAccount.id == request.shop_id).first()
-    if not shop:
-        raise HTTPException(404, "Shopee Account not found")
-    
-    stats = {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "failed_rows": []}
-    
-    for idx, row in enumerate(request.rows):
-        try:
-            # Check required fields via mapping
-            order_id_col = request.mapping.get("order_id")
-            if not order_id_col or not row.get(order_id_col):
-                stats["skipped"] += 1
-                continue
-                
-            raw_order_id = str(row[order_id_col]).strip()
-            
-            # Extract data
-            order_time = None
-            if request.mapping.get("order_time"):
-                order_time = parse_date(row.get(request.mapping["order_time"]))
-            
-            # If no date found, skip (required for DB)
-            if not order_time and request.import_type == 'sales':
-                 # Try to find existing order to keep date
-                 pass
-            elif not order_time:
-                 # Default to now if really needed, but better to fail row
-                 # Or skip if strictly sales import
-                 if request.import_type != 'commission': # Commission import might rely on existing order
-                     stats["failed"] += 1
-                     stats["failed_rows"].append({"row_index": idx, "reason": "Missing Order Time", "raw": row})
-                     continue
+    _get_shop(db, request.shop_id)
+    df = pd.DataFrame.from_records(request.rows)
+    return OrderImportService.execute(db, df, request.shop_id, request.import_type, request.mapping)
 
-            gmv = 0.0
-            if request.mapping.get("gmv"):
-                gmv = parse_currency(row.get(request.mapping["gmv"]))
-                
-            commission = 0.0
-            if request.mapping.get("commission_amount"):
-                commission = parse_currency(row.get(request.mapping["commission_amount"]))
-                
-            # Upsert Logic
-            existing = db.query(Order).filter(
-                Order.order_id == raw_order_id
-            ).first()
-            
-            if existing:
-                # UPDATE
-                # Only update if new value is valid/non-empty to avoid overwriting with nulls
-                if gmv > 0:
-                    existing.total_amount = gmv
-                if commission > 0:
-                    existing.commission_amount = commission
-                
-                # Update status/dates if provided
-                if request.mapping.get("payout_status"):
-                    status_val = str(row.get(request.mapping["payout_status"])).lower()
-                    if 'lunas' in status_val or 'paid' in status_val:
-                        existing.payout_status = 'paid'
-                    elif 'valid' in status_val:
-                        existing.payout_status = 'validating'
-                    else:
-                        existing.payout_status = 'pending'
-                        
-                if request.mapping.get("paid_at"):
-                    paid_date = parse_date(row.get(request.mapping["paid_at"]))
-                    if paid_date:
-                        existing.paid_at = paid_date
-                
-                # Check link to shop - if different, warn/error? We assume provided shop_id is correct source
-                # existing.shopee_account_id = request.shop_id 
-                
-                stats["updated"] += 1
-            else:
-                # INSERT
-                if not order_time:
-                     stats["failed"] += 1
-                     stats["failed_rows"].append({"row_index": idx, "reason": "New order missing date", "raw": row})
-                     continue
-                     
-                new_order = Order(
-                    shopee_account_id=request.shop_id,
-                    order_id=raw_order_id,
-                    date=order_time,
-                    total_amount=gmv,
-                    commission_amount=commission,
-                    status="completed", # Default
-                    payout_status="pending" # Default
-                )
-                
-                # Map extra fields
-                if request.mapping.get("payout_status"):
-                    status_val = str(row.get(request.mapping["payout_status"])).lower()
-                    if 'lunas' in status_val or 'paid' in status_val:
-                        new_order.payout_status = 'paid'
-                    elif 'valid' in status_val:
-                        new_order.payout_status = 'validating'
-                        
-                if request.mapping.get("paid_at"):
-                    paid_date = parse_date(row.get(request.mapping["paid_at"]))
-                    if paid_date:
-                        new_order.paid_at = paid_date
-                        
-                db.add(new_order)
-                stats["inserted"] += 1
-                
-        except Exception as e:
-            stats["failed"] += 1
-            stats["failed_rows"].append({"row_index": idx, "reason": str(e), "raw": row})
-            
-    db.commit()
-    return stats
+@router.post("/csv/execute-file", response_model=ImportResult)
+def execute_import_file(
+    file: UploadFile = File(...),
+    shop_id: int = Form(...),
+    import_type: str = Form(...),
+    mapping: str = Form(...),  # JSON object: target field -> CSV header
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Execute import with mapping on the uploaded CSV itself.
+    Parsing happens server-side in pandas, so large exports never travel as JSON rows.
+    The spooled upload is read IMPORT_CHUNK_ROWS rows at a time and imported in
+    one transaction; very large files belong in POST /jobs instead.
+    """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(400, "File must be CSV")
+    field_mapping = _parse_mapping(mapping)
+    _get_shop(db, shop_id)
+    try:
+        frames = read_csv(file.file, chunksize=settings.import_chunk_rows)
+        return OrderImportService.execute_chunks(db, frames, shop_id, import_type, field_mapping)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise HTTPException(400, f"Failed to parse CSV: {str(e)}")
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_import_job(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    shop_id: int = Form(...),
+    import_type: str = Form(...),
+    mapping: str = Form(...),  # JSON object: target field -> column header
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Start a server-side import of a CSV/XLSX upload.
+    The file is spooled to disk and imported in chunks, one transaction each;
+    poll GET /jobs/{id} for progress.
+    """
+    field_mapping = _parse_mapping(mapping)
+    _get_shop(db, shop_id)
+    try:
+        job = ImportJobService.create(
+            db, file.file, file.filename, current_user.id, shop_id, import_type, field_mapping
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    background_tasks.add_task(run_import_job, job.id)
+    return job.to_dict()
+
+@router.get("/jobs")
+def list_import_jobs(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """Recent import jobs started by the current user"""
+    jobs = db.query(ImportJob).filter(
+        ImportJob.user_id == current_user.id
+    ).order_by(ImportJob.id.desc()).limit(min(limit, 100)).all()
+    return {"jobs": [job.to_dict() for job in jobs]}
+
+@router.get("/jobs/{job_id}")
+def get_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """Status, progress and per-chunk stats of an import job"""
+    return _get_job(db, job_id, current_user).to_dict()
+
+@router.post("/jobs/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+def resume_import_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """Retry a failed job from its last committed chunk"""
+    job = _get_job(db, job_id, current_user)
+    try:
+        ImportJobService.requeue(db, job)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    background_tasks.add_task(run_import_job, job.id)
+    return job.to_dict()
@@ -94,7 +94,7 @@ def get_shift_name(dt: datetime) -> str:
 # --- Endpoints ---
 
 @router.get("/daily-summary", response_model=DailySummaryResponse)
-async def get_daily_summary(
+def get_daily_summary(
     date_str: str = Query(..., alias="date"),
     shop_id: Optional[int] = None,
     db: Session = Depends(get_db),
@@ -184,7 +184,7 @@ async def get_daily_summary(
     )
 
 @router.get("/daily", response_model=DailyInsightsResponse)
-async def get_daily_insights(
+def get_daily_insights(
     date_str: str = Query(..., alias="date"),
     shop_id: Optional[int] = None,
     db: Session = Depends(get_db),
@@ -13,6 +13,7 @@ from app.models.live_product_snapshot import LiveProductSnapshot
 from app.models.live_sync_log import LiveSyncLog
 from app.models.shopee_account import ShopeeAccount
 from app.auth.dependencies import get_current_user
+from app.core.rbac import ensure_account_access
 from app.models.user import User
 from app.schemas.live_product import (
     LiveProductSyncRequest,
@@ -43,22 +44,6 @@ def check_sync_permission(user: User) -> bool:
     return role in allowed_roles
 
 
-def can_access_account(user: User, account_id: int, db: Session) -> bool:
-    """
-    Check if user can access specific account based on scope
-    """
-    role = normalize_role(user.role)
-    
-    # Owner and super_admin can access all
-    if role in ["owner", "super_admin", "admin"]:
-        return True
-    
-    # For leader/host: check if they have access to this account
-    # This would require additional relationship checking
-    # For now, allowing access (TODO: implement proper scope check)
-    return True
-
-
 # ==================== Endpoints ====================
 
 @router.post("/sync", response_model=LiveProductSyncResponse)
@@ -203,8 +188,7 @@ def get_daily_snapshots(
     # Apply account filter if provided
     if account_id:
         # Check permission
-        if not can_access_account(current_user, account_id, db):
-            raise HTTPException(status_code=403, detail="Access denied to this account")
+        ensure_account_access(db, current_user, account_id)
         query = query.filter(LiveProductSnapshot.account_id == account_id)
     
     # Apply RBAC scope
@@ -284,8 +268,7 @@ def get_sync_logs(
     query = db.query(LiveSyncLog)
     
     if account_id:
-        if not can_access_account(current_user, account_id, db):
-            raise HTTPException(status_code=403, detail="Access denied to this account")
+        ensure_account_access(db, current_user, account_id)
         query = query.filter(LiveSyncLog.account_id == account_id)
     
     logs = query.order_by(desc(LiveSyncLog.synced_at)).limit(20).all()
@@ -8,10 +8,14 @@ from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
+from app.auth.dependencies import get_current_user
+from app.core.rbac import ensure_account_access
+from app.models.user import User
 from app.models.live_session import LiveSession
 from app.models.live_session_item import LiveSessionItem
 from app.models.live_analytics import LiveAnalytics
 from app.services.shopee_streaming import shopee_streaming_service
+from app.services.live_metrics import LiveMetricsService, RESOLUTIONS
 from app.schemas.live import (
     LiveSessionCreate,
     LiveSessionUpdate,
@@ -245,6 +249,36 @@ async def get_analytics_summary(
     }
 
 
+# ==================== LIVE METRIC CURVES ====================
+
+@router.get("/accounts/{account_id}/metric-sessions")
+def list_metric_sessions(
+    account_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Live sessions with recorded metric curves for a Shopee account"""
+    ensure_account_access(db, current_user, account_id)
+    return {"sessions": LiveMetricsService.list_sessions(db, account_id, limit)}
+
+
+@router.get("/accounts/{account_id}/metric-sessions/{session_key}/curve")
+def get_metric_curve(
+    account_id: int,
+    session_key: str,
+    resolution: str = Query("1m", pattern="^(" + "|".join(RESOLUTIONS) + ")$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Viewers/likes/sales/revenue curve of a session as columnar arrays"""
+    ensure_account_access(db, current_user, account_id)
+    curve = LiveMetricsService.get_curve(db, account_id, session_key, resolution)
+    if not curve["t"]:
+        raise HTTPException(status_code=404, detail="No metrics recorded for this session")
+    return curve
+
+
 # ==================== SHOPEE API PROXY ====================
 
 @router.post("/creator/user-info")
@@ -15,7 +15,7 @@ from app.models.order import Order
 from app.models.shopee_account import ShopeeAccount
 from app.models.ads import AdsDailySpend, AdsDailyMetrics
 from app.models.live_product_snapshot import LiveProductSnapshot
-from app.core.permissions import get_allowed_account_ids
+from app.core.rbac import AccountScope, get_active_account_scope
 
 router = APIRouter(prefix="/api/dashboard", tags=["premium"])
 
@@ -53,15 +53,15 @@ def get_premium_dashboard(
         raise HTTPException(status_code=403, detail="Premium features require owner/super_admin/supervisor role")
     
     # Get allowed accounts
-    allowed_ids = get_allowed_account_ids(db, current_user)
-    if not allowed_ids:
+    scope = get_active_account_scope(db, current_user)
+    if not scope:
         raise HTTPException(status_code=403, detail="No accounts accessible")
     
     # Apply account filter if provided
     if account_id:
-        if account_id not in allowed_ids:
+        if account_id not in scope:
             raise HTTPException(status_code=403, detail="Access denied to this account")
-        allowed_ids = [account_id]
+        scope = AccountScope.of([account_id])
     
     # ==================== FEATURE 1: Hourly Performance ====================
     hourly_performance = []
@@ -77,7 +77,7 @@ def get_premium_dashboard(
         
         orders_today = db.query(func.count(Order.id), func.sum(Order.total_amount)).filter(
             and_(
-                Order.shopee_account_id.in_(allowed_ids),
+                scope.clause(Order.shopee_account_id),
                 Order.date >= start_time,
                 Order.date < end_time,
                 Order.status == 'completed'
@@ -90,7 +90,7 @@ def get_premium_dashboard(
         
         orders_yesterday = db.query(func.sum(Order.total_amount)).filter(
             and_(
-                Order.shopee_account_id.in_(allowed_ids),
+                scope.clause(Order.shopee_account_id),
                 Order.date >= start_yesterday,
                 Order.date < end_yesterday,
                 Order.status == 'completed'
@@ -115,7 +115,7 @@ def get_premium_dashboard(
     ).filter(
         and_(
             func.date(Order.date) == date,
-            Order.shopee_account_id.in_(allowed_ids),
+            scope.clause(Order.shopee_account_id),
             Order.status == 'completed'
         )
     ).group_by(ShopeeAccount.id, ShopeeAccount.account_name).order_by(desc("gmv")).limit(5).all()
@@ -145,7 +145,7 @@ def get_premium_dashboard(
     ).filter(
         and_(
             LiveProductSnapshot.snapshot_date == date,
-            LiveProductSnapshot.account_id.in_(allowed_ids)
+            scope.clause(LiveProductSnapshot.account_id)
         )
     ).group_by(LiveProductSnapshot.product_name).order_by(desc("total_sold")).limit(5).all()
     
@@ -171,7 +171,7 @@ def get_premium_dashboard(
         and_(
             func.date(Order.date) == date,
             AdsDailySpend.date == date,
-            ShopeeAccount.id.in_(allowed_ids)
+            scope.clause(ShopeeAccount.id)
         )
     ).group_by(ShopeeAccount.id, ShopeeAccount.account_name).having(
         func.sum(Order.total_amount) / func.sum(AdsDailySpend.spend_amount) < 5
@@ -191,7 +191,7 @@ def get_premium_dashboard(
     drops = db.query(LiveProductSnapshot).filter(
         and_(
             LiveProductSnapshot.snapshot_date == date,
-            LiveProductSnapshot.account_id.in_(allowed_ids),
+            scope.clause(LiveProductSnapshot.account_id),
             LiveProductSnapshot.sold_qty < 5  # Mock condition
         )
     ).count()
@@ -212,7 +212,7 @@ def get_premium_dashboard(
     revenue_today = db.query(func.sum(Order.total_amount)).filter(
         and_(
             func.date(Order.date) == date,
-            Order.shopee_account_id.in_(allowed_ids),
+            scope.clause(Order.shopee_account_id),
             Order.status == 'completed'
         )
     ).scalar() or 0
@@ -221,7 +221,7 @@ def get_premium_dashboard(
     revenue_yesterday = db.query(func.sum(Order.total_amount)).filter(
         and_(
             func.date(Order.date) == yesterday,
-            Order.shopee_account_id.in_(allowed_ids),
+            scope.clause(Order.shopee_account_id),
             Order.status == 'completed'
         )
     ).scalar() or 0
@@ -234,7 +234,7 @@ def get_premium_dashboard(
     budget_used = db.query(func.sum(AdsDailySpend.spend_amount)).filter(
         and_(
             AdsDailySpend.date == date,
-            AdsDailySpend.shopee_account_id.in_(allowed_ids)
+            scope.clause(AdsDailySpend.shopee_account_id)
         )
     ).scalar() or 0
     
@@ -251,7 +251,7 @@ def get_premium_dashboard(
         AdsDailySpend, AdsDailySpend.shopee_account_id == ShopeeAccount.id, isouter=True
     ).filter(
         and_(
-            ShopeeAccount.id.in_(allowed_ids),
+            scope.clause(ShopeeAccount.id),
             func.date(Order.date) == date,
             AdsDailySpend.date == date
         )
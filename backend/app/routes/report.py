@@ -1,21 +1,19 @@
 """
-Report generation routes using Order data with CSV export
+Report generation routes using Order data with CSV export,
+and persisted daily/weekly/monthly studio reports
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from typing import Optional, List
 from datetime import datetime, date
-from decimal import Decimal
-import csv
-import io
 
 from app.database import get_db
 from app.models.user import User
-from app.models.order import Order
-from app.models.shopee_account import ShopeeAccount
+from app.models.report import Report
 from app.auth.dependencies import get_current_user, require_role
+from app.services.sales_report import SalesReportService, iter_csv
+from app.services.studio_reports import REPORT_TYPES, StudioReportService, iter_report_csv
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/reports", tags=["Reports"])
@@ -44,13 +42,14 @@ class ReportResponse(BaseModel):
 
 
 @router.post("/generate", response_model=ReportResponse)
-async def generate_report(
+def generate_report(
     filters: ReportFilters,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("leader"))  # Admin & Leader only
 ):
     """
     Generate sales report with filters.
+    Served from the daily (date, shop) fact rollup; closed ranges are cached.
     
     **Permissions:** Leader or higher
     
@@ -61,71 +60,15 @@ async def generate_report(
     - Total GMV
     - Total Commission
     """
-    # Build query - aggregate orders by date and account
-    query = db.query(
-        func.date(Order.date).label('date'),
-        ShopeeAccount.account_name.label('shop_name'),
-        func.count(Order.id).label('total_orders'),
-        func.sum(Order.total_amount).label('total_gmv'),
-        func.sum(Order.commission_amount).label('total_commission')
-    ).join(
-        ShopeeAccount, Order.shopee_account_id == ShopeeAccount.id
-    ).filter(
-        and_(
-            func.date(Order.date) >= filters.from_date,
-            func.date(Order.date) <= filters.to_date,
-            Order.status == 'completed'  # Only completed orders
-        )
-    )
-    
-    # Apply optional filters
-    if filters.account_id:
-        query = query.filter(Order.shopee_account_id == filters.account_id)
-    
-    # Group by date and shop
-    query = query.group_by(
-        func.date(Order.date),
-        ShopeeAccount.account_name
-    ).order_by(func.date(Order.date).desc())
-    
-    results = query.all()
-    
-    # Transform to response format
-    data = []
-    total_orders = 0
-    total_gmv = Decimal(0)
-    total_commission = Decimal(0)
-    
-    for row in results:
-        gmv = float(row.total_gmv) if row.total_gmv else 0
-        commission = float(row.total_commission) if row.total_commission else 0
-        orders = row.total_orders or 0
-        
-        data.append(ReportRow(
-            date=str(row.date),
-            shop_name=row.shop_name or "Unknown",
-            total_orders=orders,
-            total_gmv=gmv,
-            total_commission=commission
-        ))
-        
-        total_orders += orders
-        total_gmv += Decimal(str(gmv))
-        total_commission += Decimal(str(commission))
-    
+    report = SalesReportService.report(db, filters.from_date, filters.to_date, filters.account_id)
     return ReportResponse(
-        data=data,
-        summary={
-            "total_orders": total_orders,
-            "total_gmv": float(total_gmv),
-            "total_commission": float(total_commission),
-            "avg_order_value": float(total_gmv / total_orders) if total_orders > 0 else 0
-        }
+        data=[ReportRow(**row) for row in report["data"]],
+        summary=report["summary"]
     )
 
 
 @router.get("/export-csv")
-async def export_csv(
+def export_csv(
     from_date: date = Query(..., alias="from"),
     to_date: date = Query(..., alias="to"),
     account_id: Optional[int] = None,
@@ -133,68 +76,92 @@ async def export_csv(
     current_user: User = Depends(require_role("leader"))  # Admin & Leader only
 ):
     """
-    Export report as CSV file.
+    Export report as CSV file, streamed from the daily fact rows.
     
     **Permissions:** Leader or higher
     """
-    # Build query (same as generate_report)
-    query = db.query(
-        func.date(Order.date).label('date'),
-        ShopeeAccount.account_name.label('shop_name'),
-        func.count(Order.id).label('total_orders'),
-        func.sum(Order.total_amount).label('total_gmv'),
-        func.sum(Order.commission_amount).label('total_commission')
-    ).join(
-        ShopeeAccount, Order.shopee_account_id == ShopeeAccount.id
-    ).filter(
-        and_(
-            func.date(Order.date) >= from_date,
-            func.date(Order.date) <= to_date,
-            Order.status == 'completed'
-        )
-    )
-    
-    if account_id:
-        query = query.filter(Order.shopee_account_id == account_id)
-    
-    query = query.group_by(
-        func.date(Order.date),
-        ShopeeAccount.account_name
-    ).order_by(func.date(Order.date).desc())
-    
-    results = query.all()
-    
-    # Generate CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
-        'Date',
-        'Shop Name',
-        'Total Orders',
-        'Total GMV (Rp)',
-        'Total Commission (Rp)'
-    ])
-    
-    # Data rows
-    for row in results:
-        writer.writerow([
-            str(row.date),
-            row.shop_name or "Unknown",
-            row.total_orders or 0,
-            f"{float(row.total_gmv):,.2f}" if row.total_gmv else "0.00",
-            f"{float(row.total_commission):,.2f}" if row.total_commission else "0.00"
-        ])
+    names = SalesReportService.account_names(db)
+    rows = SalesReportService.fact_rows(db, from_date, to_date, account_id)
     
     # Filename
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
     filename = f"sales_report_{timestamp}.csv"
     
-    # Response
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter_csv(rows, names),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+class StudioReportRequest(BaseModel):
+    """Materialize the studio report of the period containing `date`"""
+    report_type: str  # daily, weekly, monthly
+    date: date
+    studio_id: Optional[int] = None
+
+
+@router.get("/studio-reports")
+def list_studio_reports(
+    studio_id: Optional[int] = None,
+    report_type: Optional[str] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("leader"))
+):
+    """
+    Persisted studio reports, newest period first.
+    `from`/`to` select reports whose period starts within the range.
+    """
+    query = db.query(Report)
+    if studio_id:
+        query = query.filter(Report.studio_id == studio_id)
+    if report_type:
+        query = query.filter(Report.report_type == report_type)
+    if from_date:
+        query = query.filter(Report.period_start >= from_date)
+    if to_date:
+        query = query.filter(Report.period_start <= to_date)
+    reports = query.order_by(Report.period_start.desc(), Report.studio_id).limit(limit).all()
+    return {"reports": [report.to_dict() for report in reports]}
+
+
+@router.post("/studio-reports/generate")
+def generate_studio_reports(
+    payload: StudioReportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    (Re)generate the daily, weekly or monthly studio reports of a period now,
+    instead of waiting for the scheduler. Every elapsed day of the period is
+    recomputed from current data; today and later days are left out.
+    """
+    if payload.report_type not in REPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"report_type must be one of {', '.join(REPORT_TYPES)}")
+    reports = StudioReportService.materialize_period(
+        db, payload.report_type, payload.date, payload.studio_id, recompute=True
+    )
+    db.commit()
+    return {"reports": [report.to_dict() for report in reports]}
+
+
+@router.get("/studio-reports/{report_id}/download")
+def download_studio_report(
+    report_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("leader"))
+):
+    """Studio report as CSV; weekly and monthly reports include their daily rows"""
+    report = db.get(Report, report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    filename = f"studio_{report.studio_id}_{report.report_type}_{report.period}.csv"
+    return StreamingResponse(
+        iter_report_csv(report, StudioReportService.daily_breakdown(db, report)),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
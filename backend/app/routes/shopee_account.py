@@ -8,6 +8,7 @@ from app.models.studio import Studio
 from app.models.user import User
 from app.auth.dependencies import get_current_user
 from app.core.permissions import verify_financial_access, apply_scope_restriction
+from app.core.rbac import account_scope_cache, get_account_scope
 
 # Setup Logger
 logger = logging.getLogger(__name__)
@@ -33,24 +34,18 @@ def list_accounts(
     start_time = time.time()
     logger.info(f"Accounts List: User={current_user.username} Role={current_user.role}")
 
-    # RBAC Check - import here to avoid circular dependency
-    from app.core.rbac import get_allowed_account_ids
+    # Accounts this user can access (cached; unrestricted roles add no filter)
+    scope = get_account_scope(db, current_user)
     
-    # Get allowed account IDs for this user
-    allowed_account_ids = get_allowed_account_ids(db, current_user)
+    logger.info(f"RBAC: User {current_user.id} can access {scope.describe()} accounts")
     
-    logger.info(f"RBAC: User {current_user.id} can access {len(allowed_account_ids)} accounts")
+    if not scope:
+        # User has no assigned accounts
+        logger.warning(f"User {current_user.id} has no assigned accounts")
+        return []
     
     # Build query with RBAC filtering
-    query = db.query(ShopeeAccount)
-    
-    # Apply RBAC scope (unless user has full access)
-    if current_user.role not in ['super_admin', 'owner', 'supervisor']:
-        if not allowed_account_ids:
-            # User has no assigned accounts
-            logger.warning(f"User {current_user.id} has no assigned accounts")
-            return []
-        query = query.filter(ShopeeAccount.id.in_(allowed_account_ids))
+    query = db.query(ShopeeAccount).filter(scope.clause(ShopeeAccount.id))
     
     # Apply optional studio filter
     if studio_id:
@@ -73,17 +68,13 @@ def get_my_accounts(
     Get accounts assigned to current user only.
     Always returns scoped view regardless of role.
     """
-    from app.core.rbac import get_allowed_account_ids
-    
-    allowed_account_ids = get_allowed_account_ids(db, current_user)
+    scope = get_account_scope(db, current_user)
     
-    if not allowed_account_ids:
+    if not scope:
         logger.info(f"User {current_user.id} has no assigned accounts")
         return []
     
-    accounts = db.query(ShopeeAccount).filter(
-        ShopeeAccount.id.in_(allowed_account_ids)
-    ).all()
+    accounts = db.query(ShopeeAccount).filter(scope.clause(ShopeeAccount.id)).all()
     
     logger.info(f"User {current_user.id} retrieved {len(accounts)} assigned accounts")
     return accounts
@@ -114,6 +105,7 @@ def create_account(
     )
     db.add(db_account)
     db.commit()
+    account_scope_cache.clear()
     db.refresh(db_account)
     return {"id": db_account.id, "account_name": db_account.account_name}
 
@@ -157,6 +149,7 @@ def update_account(
             setattr(db_account, key, value)
     
     db.commit()
+    account_scope_cache.clear()
     return {"message": "Account updated"}
 
 
@@ -177,4 +170,5 @@ def delete_account(
     
     db.delete(db_account)
     db.commit()
+    account_scope_cache.clear()
     return {"message": "Account deleted"}
@@ -7,6 +7,7 @@ from app.auth.dependencies import get_current_user
 from app.models.user import User
 from app.models.shopee_account import ShopeeAccount
 from app.models.order import Order  # Use Order instead of Transaction
+from app.services.order_upsert import OrderUpsertService
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -87,42 +88,27 @@ async def sync_shopee_data(
             except:
                 pass
         
-        # 3. Persist products as orders
-        synced_count = 0
+        # 3. Persist products as orders (one bulk upsert)
+        rows = []
         for product in payload.products:
             # Create order for each product sync
             # Using product_id as order_id (might want to generate unique IDs instead)
-            order_id = f"SYNC-{product.product_id}-{sync_date.strftime('%Y%m%d')}"
-            
-            existing = db.query(Order).filter(
-                Order.order_id == order_id
-            ).first()
-            
-            if existing:
-                # Update existing order
-                existing.total_amount = product.gmv
-                existing.commission_amount = product.commission
-                existing.product_name = product.product_name
-                existing.product_id = product.product_id
-                existing.updated_at = datetime.utcnow()
-            else:
-                # Create new order
-                order = Order(
-                    shopee_account_id=account.id if account else None,
-                    order_id=order_id,
-                    total_amount=product.gmv,
-                    commission_amount=product.commission,
-                    status="completed",
-                    date=datetime.combine(sync_date, datetime.min.time()),
-                    product_name=product.product_name,
-                    product_id=product.product_id,
-                    handler_user_id=current_user.id,
-                    created_at=datetime.utcnow()
-                )
-                db.add(order)
-            
-            synced_count += 1
+            rows.append({
+                "order_id": f"SYNC-{product.product_id}-{sync_date.strftime('%Y%m%d')}",
+                "shopee_account_id": account.id if account else None,
+                "total_amount": product.gmv,
+                "commission_amount": product.commission,
+                "status": "completed",
+                "date": datetime.combine(sync_date, datetime.min.time()),
+                "product_name": product.product_name,
+                "product_id": product.product_id,
+                "handler_user_id": current_user.id,
+            })
         
+        OrderUpsertService.bulk_upsert(
+            db, rows, update_columns=("total_amount", "commission_amount", "product_name", "product_id")
+        )
+        synced_count = len(rows)
         db.commit()
         
         return SyncStatusResponse(
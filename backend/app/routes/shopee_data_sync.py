@@ -9,12 +9,14 @@ from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
+import time
 
 from app.database import get_db
 from app.auth.access_code import verify_access_code
 from app.models.user import User
-from app.models.order import Order
 from app.services.auto_connect import AutoConnectService
+from app.services.account_cache import account_resolution_cache
+from app.services.order_upsert import OrderUpsertService
 from app.routes.shopee_data_sync_helpers import _process_live_streaming
 
 logger = logging.getLogger(__name__)
@@ -54,7 +56,7 @@ class SyncResponse(BaseModel):
 # ==================== ENDPOINTS ====================
 
 @router.post("/sync", response_model=SyncResponse)
-async def sync_data_from_extension(
+def sync_data_from_extension(
     payload: SyncRequest,
     current_user: User = Depends(verify_access_code),
     db: Session = Depends(get_db)
@@ -91,13 +93,14 @@ async def sync_data_from_extension(
     if 'affiliate_dashboard' in payload.data:
         print(f"Affiliate Dashboard keys: {list(payload.data['affiliate_dashboard'].keys())}")
     
-    if 'live_streaming' in payload.data:
+    if isinstance(payload.data.get('live_streaming'), dict):
         print(f"Live Streaming keys: {list(payload.data['live_streaming'].keys())}")
         print(f"Live Streaming data: {payload.data['live_streaming']}")
     
     print("=" * 60)
     
     logger.info(f"[SyncEndpoint] Received sync request from user_id={current_user.id}, type={payload.type}")
+    started = time.perf_counter()
     
     try:
         # ✅ VALIDATION: Prioritize shopee_account_id, fallback to account_id
@@ -155,10 +158,13 @@ async def sync_data_from_extension(
                 account_id=shopee_account.id,
                 payload_type='identity',
                 success=True,
-                raw_payload=payload.dict()
+                raw_payload=payload.dict(),
+                duration_ms=int((time.perf_counter() - started) * 1000)
             )
             
             db.commit()
+            # Default account may have changed: drop cached resolutions for this user
+            account_resolution_cache.invalidate_user(current_user.id)
             
             print("=" * 60)
             print("✅ IDENTITY SYNC SUCCESS")
@@ -181,11 +187,18 @@ async def sync_data_from_extension(
         
         # REGULAR SYNC: Use resolved account
         # Priority: User's default account > Payload account_id > REJECT
-        resolved_account_id = AutoConnectService.resolve_account_id(
+        # Served from the resolution cache when this tab synced recently
+        display_name = AutoConnectService.get_display_name(payload.account.dict())
+        resolve_payload = {'account': payload.account.dict(), 'data': payload.data, 'url': payload.url}
+        
+        # STEPS 2-4: Resolve account, ensure studio, UPSERT account and assignment
+        resolved, account_created, assignment_created = AutoConnectService.resolve_sync_account(
             db=db,
             user=current_user,
-            payload={'account': payload.account.dict(), 'data': payload.data, 'url': payload.url}
+            payload=resolve_payload,
+            display_name=display_name
         )
+        resolved_account_id = resolved.account_identifier
         
         print("=" * 60)
         print("✅ RESOLVED ACCOUNT")
@@ -194,30 +207,8 @@ async def sync_data_from_extension(
         print(f"Resolved Account ID: {resolved_account_id}")
         print("=" * 60)
         
-        # Get display name
-        display_name = AutoConnectService.get_display_name(payload.account.dict())
-        
         logger.info(f"[SyncEndpoint] Resolved account - identifier={resolved_account_id}, display={display_name}")
         
-        # STEP 2: Ensure studio exists (required for shopee_accounts FK)
-        studio_id = AutoConnectService.ensure_studio_exists(db, current_user)
-        
-        # STEP 3: UPSERT shopee_account with resolved ID
-        shopee_account, account_created = AutoConnectService.upsert_shopee_account(
-            db=db,
-            account_identifier=resolved_account_id,
-            display_name=display_name,
-            studio_id=studio_id
-        )
-        
-        # STEP 4: UPSERT assignment (NOT default, only identity sets default)
-        assignment, assignment_created = AutoConnectService.ensure_assignment(
-            db=db,
-            user=current_user,
-            shopee_account=shopee_account,
-            set_as_default=False  # Regular sync doesn't change default
-        )
-        
         # STEP 5: Process data based on type
         inserted = 0
         updated = 0
@@ -225,10 +216,10 @@ async def sync_data_from_extension(
         ads_rows = 0
         
         if payload.type in ["transactions", "affiliate_dashboard"]:
-            inserted, updated = _process_orders(db, shopee_account.id, payload.data)
+            inserted, updated = _process_orders(db, resolved.account_id, payload.data)
         elif payload.type == "live_streaming":
             # Save live streaming metrics
-            live_rows = _process_live_streaming(db, shopee_account.id, payload.data)
+            live_rows = _process_live_streaming(db, resolved.account_id, payload.data)
         elif payload.type == "ads":
             # Future: Process ads data
             ads_rows = 0
@@ -237,20 +228,24 @@ async def sync_data_from_extension(
         AutoConnectService.log_sync(
             db=db,
             user_id=current_user.id,
-            account_id=shopee_account.id,
+            account_id=resolved.account_id,
             payload_type=payload.type,
             success=True,
-            raw_payload=payload.dict()
+            raw_payload=payload.dict(),
+            inserted=inserted,
+            updated=updated,
+            duration_ms=int((time.perf_counter() - started) * 1000)
         )
         
         # STEP 7: Commit all changes
         db.commit()
+        AutoConnectService.remember_sync_account(current_user.id, resolve_payload, resolved)
         
-        logger.info(f"[SyncEndpoint] SUCCESS - account_id={shopee_account.id}, created={account_created}, orders={inserted+updated}, live={live_rows}")
+        logger.info(f"[SyncEndpoint] SUCCESS - account_id={resolved.account_id}, created={account_created}, orders={inserted+updated}, live={live_rows}")
         
         print("=" * 60)
         print("✅ SYNC SUCCESS")
-        print(f"Account ID: {account_identifier}")
+        print(f"Account ID: {resolved_account_id}")
         print(f"Account Name: {display_name}")
         print(f"Orders Upserted: {inserted + updated}")
         print(f"Live Rows: {live_rows}")
@@ -259,8 +254,8 @@ async def sync_data_from_extension(
         return SyncResponse(
             success=True,
             user_id=current_user.id,
-            account_id=account_identifier,
-            db_account_id=shopee_account.id,
+            account_id=resolved_account_id,
+            db_account_id=resolved.account_id,
             account_created=account_created,
             assignment_created=assignment_created,
             message=f"Synced successfully. Account: {display_name}. Orders: {inserted+updated}, Live: {live_rows}",
@@ -279,6 +274,7 @@ async def sync_data_from_extension(
         
     except IntegrityError as e:
         db.rollback()
+        account_resolution_cache.invalidate_user(current_user.id)
         logger.error(f"[SyncEndpoint] Database integrity error: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -286,6 +282,7 @@ async def sync_data_from_extension(
         )
     except Exception as e:
         db.rollback()
+        account_resolution_cache.invalidate_user(current_user.id)
         logger.error(f"[SyncEndpoint] Unexpected error: {e}")
         
         # Log failed sync
@@ -297,7 +294,8 @@ async def sync_data_from_extension(
                 payload_type=payload.type,
                 success=False,
                 raw_payload=payload.dict(),
-                error_message=str(e)
+                error_message=str(e),
+                duration_ms=int((time.perf_counter() - started) * 1000)
             )
             db.commit()
         except:
@@ -313,17 +311,15 @@ async def sync_data_from_extension(
 
 def _process_orders(db: Session, account_id: int, data: Dict[str, Any]) -> tuple:
     """
-    Process order/transaction data.
+    Process order/transaction data with one bulk upsert.
     Returns: (inserted_count, updated_count)
     """
-    inserted = 0
-    updated = 0
-    
     # Extract orders from data (format may vary)
     orders_data = data.get("orders", []) or data.get("transactions", []) or []
     
     logger.info(f"[ProcessOrders] Processing {len(orders_data)} orders for account_id={account_id}")
     
+    rows = []
     for order_data in orders_data:
         order_id = order_data.get("order_id") or order_data.get("id")
         
@@ -331,34 +327,25 @@ def _process_orders(db: Session, account_id: int, data: Dict[str, Any]) -> tuple
             logger.warning(f"[ProcessOrders] Skipping order without ID")
             continue
         
-        # Check if exists
-        existing = db.query(Order).filter(Order.order_id == str(order_id)).first()
-        
-        if existing:
-            # Update existing (only if new data has more info)
-            if "total_amount" in order_data and order_data["total_amount"]:
-                existing.total_amount = float(order_data["total_amount"])
-            if "commission_amount" in order_data and order_data["commission_amount"]:
-                existing.commission_amount = float(order_data["commission_amount"])
-            if "status" in order_data:
-                existing.status = order_data["status"]
-            updated += 1
-        else:
-            # Create new
-            try:
-                order = Order(
-                    shopee_account_id=account_id,
-                    order_id=str(order_id),
-                    total_amount=float(order_data.get("total_amount", 0)),
-                    commission_amount=float(order_data.get("commission_amount", 0)),
-                    date=_parse_date(order_data.get("date")),
-                    status=order_data.get("status", "completed")
-                )
-                db.add(order)
-                inserted += 1
-            except Exception as e:
-                logger.error(f"[ProcessOrders] Error creating order {order_id}: {e}")
-                continue
+        try:
+            # Empty amounts never overwrite an existing order (None = keep)
+            rows.append({
+                "order_id": str(order_id),
+                "shopee_account_id": account_id,
+                "total_amount": float(order_data["total_amount"]) if order_data.get("total_amount") else None,
+                "commission_amount": float(order_data["commission_amount"]) if order_data.get("commission_amount") else None,
+                "status": order_data.get("status"),
+                "date": _parse_date(order_data.get("date")),
+            })
+        except Exception as e:
+            logger.error(f"[ProcessOrders] Error reading order {order_id}: {e}")
+            continue
+    
+    result = OrderUpsertService.bulk_upsert(
+        db, rows, update_columns=("total_amount", "commission_amount", "status")
+    )
+    inserted = result["inserted"]
+    updated = result["updated"] + result["unchanged"]
     
     logger.info(f"[ProcessOrders] Result - inserted={inserted}, updated={updated}")
     return (inserted, updated)
@@ -3,9 +3,10 @@ Helper function to process live streaming data
 """
 from sqlalchemy.orm import Session
 from typing import Dict, Any
-from datetime import datetime
 import logging
 
+from app.services.live_metrics import LiveMetricsService, parse_samples
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,6 +14,9 @@ def _process_live_streaming(db: Session, account_id: int, data: Dict[str, Any])
     """
     Process live streaming metrics and save to database.
     
+    Samples are merged into per-minute points of the session's metric curve
+    (live_metric_points); the caller commits.
+    
     Args:
         db: Database session
         account_id: Shopee account ID
@@ -23,22 +27,14 @@ def _process_live_streaming(db: Session, account_id: int, data: Dict[str, Any])
     """
     live_data = data.get('live_streaming', {}) or data
     
-    if not live_data or not isinstance(live_data, dict):
+    if not live_data or not isinstance(live_data, (dict, list)):
         logger.warning(f"[ProcessLive] No live streaming data found")
         return 0
     
-    # For now, just log the data (TODO: Create live_sessions table)
-    logger.info(f"[ProcessLive] Live data for account_id={account_id}: {live_data}")
-    
-    # Extract metrics
-    viewers = live_data.get('viewers', 0)
-    likes = live_data.get('likes', 0)
-    total_sales = live_data.get('totalSales', 0) or live_data.get('total_sales', 0)
-    revenue = live_data.get('revenue', 0)
-    duration = live_data.get('duration', '0:00')
-    
-    logger.info(f"[ProcessLive] Metrics - viewers={viewers}, sales={total_sales}, revenue={revenue}")
+    samples = parse_samples(live_data)
+    if not samples:
+        return 0
     
-    # TODO: Save to live_sessions or live_metrics table when schema is ready
-    # For now, just return 1 to indicate data was processed
-    return 1 if any([viewers, likes, total_sales, revenue]) else 0
+    rows = LiveMetricsService.record_samples(db, account_id, samples)
+    logger.info(f"[ProcessLive] account_id={account_id}: {len(samples)} samples -> {rows} minute points")
+    return rows
@@ -15,8 +15,9 @@ import re
 from app.database import get_db
 from app.config import settings
 from app.models.shopee_account import ShopeeAccount
-from app.models.order import Order
 from app.models.ads import AdsDailySpend, AdsDailyMetrics
+from app.services.order_upsert import OrderUpsertService
+from app.services.account_write_buffer import account_write_buffer
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -129,10 +130,9 @@ def find_or_create_account(db: Session, data: ShopeeDataSync, shop_name: str) ->
     
     if account:
         logger.info(f"Found existing account: {account.account_name} (ID: {account.id})")
-        # Update session token if provided
+        # Update session token if provided (buffered; flushed within seconds)
         if data.sessionToken and data.sessionToken != account.access_token:
-            account.access_token = data.sessionToken
-            db.commit()
+            account_write_buffer.queue(db, account.id, access_token=data.sessionToken)
         return account
     
     # Try to find by account_name (fuzzy match)
@@ -171,62 +171,38 @@ def save_transactions(db: Session, account: ShopeeAccount, transactions: list) -
     Save transactions to orders table
     Returns: (created_count, updated_count, skipped_count)
     """
-    created = 0
-    updated = 0
     skipped = 0
+    rows = []
     
     for txn in transactions:
         if not txn.get("orderId"):
             skipped += 1
             continue
         
-        # Check if order exists
-        existing_order = db.query(Order).filter(
-            Order.order_id == txn["orderId"]
-        ).first()
+        order_date = datetime.utcnow()
+        if txn.get("date"):
+            try:
+                order_date = datetime.fromisoformat(txn["date"].replace("Z", "+00:00"))
+            except:
+                pass
         
-        if existing_order:
-            # Update if values changed
-            changed = False
-            if txn.get("amount") and existing_order.total_amount != txn["amount"]:
-                existing_order.total_amount = txn["amount"]
-                changed = True
-            if txn.get("commission") and existing_order.commission_amount != txn["commission"]:
-                existing_order.commission_amount = txn["commission"]
-                changed = True
-            if txn.get("status") and existing_order.status != txn["status"]:
-                existing_order.status = txn["status"]
-                changed = True
-            
-            if changed:
-                existing_order.updated_at = datetime.utcnow()
-                updated += 1
-            else:
-                skipped += 1
-        else:
-            # Create new order
-            order_date = datetime.utcnow()
-            if txn.get("date"):
-                try:
-                    order_date = datetime.fromisoformat(txn["date"].replace("Z", "+00:00"))
-                except:
-                    pass
-            
-            new_order = Order(
-                shopee_account_id=account.id,
-                order_id=txn["orderId"],
-                total_amount=txn.get("amount", 0),
-                commission_amount=txn.get("commission", 0),
-                status=txn.get("status", "completed"),
-                date=order_date,
-                product_name=txn.get("product_name"),
-                product_id=txn.get("product_id")
-            )
-            db.add(new_order)
-            created += 1
+        # Empty values keep what is stored (None = not provided)
+        rows.append({
+            "order_id": txn["orderId"],
+            "shopee_account_id": account.id,
+            "total_amount": txn.get("amount") or None,
+            "commission_amount": txn.get("commission") or None,
+            "status": txn.get("status") or None,
+            "date": order_date,
+            "product_name": txn.get("product_name"),
+            "product_id": txn.get("product_id"),
+        })
     
+    result = OrderUpsertService.bulk_upsert(
+        db, rows, update_columns=("total_amount", "commission_amount", "status")
+    )
     db.commit()
-    return (created, updated, skipped)
+    return (result["inserted"], result["updated"], skipped + result["unchanged"])
 
 
 def save_affiliate_metrics(db: Session, account: ShopeeAccount, payload: dict, sync_date: date) -> bool:
@@ -8,7 +8,7 @@ from typing import List, Optional
 
 from app.database import get_db
 from app.models.user import User
-from app.models.activity_log import ActivityLog
+from app.services.audit_log import audit_log
 from app.auth.schemas import (
     UserCreate,
     UserUpdate,
@@ -17,14 +17,15 @@ from app.auth.schemas import (
     UserChangePassword,
     AssignLeaderRequest
 )
-from app.auth.jwt import get_password_hash, verify_password
+from app.auth.password_pool import password_pool
 from app.auth.dependencies import get_current_user, require_role
+from app.auth.user_state import revoke_tokens
 
 router = APIRouter(prefix="/api/users", tags=["User Management"])
 
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(
+def create_user(
     user_data: UserCreate,
     request: Request,
     db: Session = Depends(get_db),
@@ -70,7 +71,7 @@ async def create_user(
     new_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_pool.hash_sync(user_data.password),
         full_name=user_data.full_name,
         phone=user_data.phone,
         role=user_data.role,
@@ -82,7 +83,7 @@ async def create_user(
     db.refresh(new_user)
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="create_user",
         entity_type="user",
@@ -90,14 +91,12 @@ async def create_user(
         new_value={"username": new_user.username, "role": new_user.role},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return new_user.to_dict()
 
 
 @router.get("", response_model=List[UserResponse])
-async def list_users(
+def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     role: Optional[str] = None,
@@ -146,7 +145,7 @@ async def list_users(
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -187,7 +186,7 @@ async def get_user(
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     request: Request,
@@ -215,11 +214,15 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
     
+    # Tokens carry the role; make outstanding ones re-authenticate
+    if user.role != old_values["role"] or user.is_active != old_values["is_active"]:
+        revoke_tokens(user)
+    
     db.commit()
     db.refresh(user)
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="update_user",
         entity_type="user",
@@ -228,14 +231,12 @@ async def update_user(
         new_value=user.to_dict(),
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return user.to_dict()
 
 
 @router.delete("/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -262,10 +263,11 @@ async def delete_user(
     
     # Soft delete
     user.is_active = False
+    revoke_tokens(user)
     db.commit()
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="delete_user",
         entity_type="user",
@@ -274,14 +276,12 @@ async def delete_user(
         new_value={"is_active": False},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return {"message": "User deleted successfully"}
 
 
 @router.post("/{user_id}/change-password")
-async def change_password(
+def change_password(
     user_id: int,
     password_data: UserChangePassword,
     request: Request,
@@ -311,32 +311,30 @@ async def change_password(
     
     # Verify current password if user is changing own password
     if current_user.id == user_id:
-        if not verify_password(password_data.current_password, user.password_hash):
+        if not password_pool.verify_sync(password_data.current_password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
     
     # Update password
-    user.password_hash = get_password_hash(password_data.new_password)
+    user.password_hash = password_pool.hash_sync(password_data.new_password)
     db.commit()
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="change_password",
         entity_type="user",
         entity_id=user.id,
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return {"message": "Password changed successfully"}
 
 
 @router.get("/leaders/list", response_model=List[UserResponse])
-async def list_leaders(
+def list_leaders(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("admin"))
 ):
@@ -354,7 +352,7 @@ async def list_leaders(
 
 
 @router.post("/{affiliate_id}/assign-leader")
-async def assign_leader(
+def assign_leader(
     affiliate_id: int,
     assignment: AssignLeaderRequest,
     request: Request,
@@ -400,7 +398,7 @@ async def assign_leader(
     db.commit()
     
     # Log activity
-    log = ActivityLog(
+    audit_log.record(
         user_id=current_user.id,
         action="assign_leader",
         entity_type="user",
@@ -409,14 +407,12 @@ async def assign_leader(
         new_value={"leader_id": assignment.leader_id},
         ip_address=request.client.host if request.client else None
     )
-    db.add(log)
-    db.commit()
     
     return {"message": "Leader assigned successfully"}
 
 
 @router.get("/{leader_id}/team", response_model=List[UserResponse])
-async def get_team_members(
+def get_team_members(
     leader_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -14,6 +14,18 @@ class SnapshotType(str, Enum):
     SUMMARY = "summary"
 
 
+# Metrics copied from `data` into typed columns at ingest, per snapshot type
+SNAPSHOT_METRIC_FIELDS = {
+    SnapshotType.CREATOR_LIVE: ("orders_ready_to_ship", "pending_orders", "total_orders_today"),
+    SnapshotType.ADS: ("spend_today", "budget_available", "coins"),
+    SnapshotType.COINS: ("coins",),
+    SnapshotType.SUMMARY: (
+        "orders_ready_to_ship", "pending_orders", "total_orders_today",
+        "spend_today", "budget_available", "coins",
+    ),
+}
+
+
 # ==================== REQUEST SCHEMAS ====================
 
 class IngestSnapshotRequest(BaseModel):
@@ -23,6 +35,10 @@ class IngestSnapshotRequest(BaseModel):
     snapshot_type: SnapshotType
     data: Dict[str, Any]
     scraped_at: datetime
+    client_snapshot_id: Optional[str] = Field(
+        None, max_length=100,
+        description="Optional idempotency id; defaults to a hash of (account, type, scraped_at)"
+    )
 
     class Config:
         json_schema_extra = {
@@ -51,6 +67,7 @@ class IngestSnapshotResponse(BaseModel):
     """Response after ingesting a snapshot"""
     success: bool
     snapshot_id: int
+    deduplicated: bool = False
     message: str = "Snapshot ingested successfully"
 
 
@@ -60,6 +77,7 @@ class IngestBatchResponse(BaseModel):
     total: int
     ingested: int
     failed: int
+    deduplicated: int = 0
     message: str
 
 
@@ -84,6 +102,37 @@ class SnapshotListResponse(BaseModel):
     snapshots: List[SnapshotOut]
 
 
+class SnapshotRollupOut(BaseModel):
+    """Output schema for a downsampled snapshot bucket"""
+    shopee_account_id: str
+    snapshot_type: str
+    resolution: str
+    bucket_start: datetime
+    sample_count: int
+    metrics: Dict[str, Dict[str, float]]
+    last_scraped_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SnapshotRollupListResponse(BaseModel):
+    """Response for listing snapshot rollups"""
+    success: bool
+    total: int
+    rollups: List[SnapshotRollupOut]
+
+
+class RetentionRunResponse(BaseModel):
+    """Result of a retention pass"""
+    success: bool
+    cutoff: str
+    days_processed: int
+    raw_rows_rolled_up: int
+    buckets_written: int
+    partitions_dropped: int
+
+
 # ==================== BOT RUN SCHEMAS ====================
 
 class BotRunOut(BaseModel):
@@ -98,6 +147,12 @@ class BotRunOut(BaseModel):
     error_message: Optional[str]
     started_at: datetime
     ended_at: Optional[datetime]
+    worker_id: Optional[str] = None
+    max_workers: Optional[int] = None
+    snapshots_count: Optional[int] = 0
+    duration_ms: Optional[int] = None
+    snapshots_per_second: Optional[float] = None
+    p95_scrape_ms: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -109,6 +164,90 @@ class BotRunListResponse(BaseModel):
     runs: List[BotRunOut]
 
 
+class BotRunStartRequest(BaseModel):
+    """Start of a supervisor cycle"""
+    run_id: Optional[str] = Field(None, max_length=36, description="Client-generated UUID; generated if omitted")
+    worker_id: Optional[str] = Field(None, max_length=100)
+    accounts_total: int = Field(..., ge=0)
+    max_workers: Optional[int] = Field(None, ge=1)
+
+
+class BotRunProgressRequest(BaseModel):
+    """One account finished within a cycle"""
+    shopee_account_id: str = Field(..., min_length=1, max_length=100)
+    success: bool
+    duration_ms: Optional[int] = Field(None, ge=0)
+    snapshots: int = Field(0, ge=0)
+
+
+class BotRunFinishRequest(BaseModel):
+    """End of a supervisor cycle"""
+    status: str = Field("completed", pattern="^(completed|error|stopped)$")
+    error_message: Optional[str] = None
+
+
+class BotRunTrendResponse(BaseModel):
+    """Throughput trend across recent completed runs"""
+    success: bool
+    runs_analyzed: int
+    avg_accounts_total: Optional[float]
+    avg_duration_ms: Optional[float]
+    p95_duration_ms: Optional[int]
+    avg_snapshots_per_second: Optional[float]
+    p95_scrape_ms: Optional[int]
+    failure_rate: Optional[float]
+    target_interval_ms: int
+    suggested_max_workers: Optional[int]
+    suggested_sync_interval_ms: Optional[int]
+    runs: List[BotRunOut]
+
+
+# ==================== HEARTBEAT SCHEMAS ====================
+
+class AccountHeartbeat(BaseModel):
+    """Outcome of one account scrape within a supervisor cycle"""
+    shopee_account_id: str = Field(..., min_length=1, max_length=100)
+    shop_name: Optional[str] = Field(None, max_length=255)
+    success: bool
+    duration_ms: Optional[int] = Field(None, ge=0)
+    error: Optional[str] = None
+
+
+class HeartbeatRequest(BaseModel):
+    """Heartbeat from supervisor.js; include accounts + cycle_duration_ms after a cycle"""
+    worker_id: str = Field(..., min_length=1, max_length=100)
+    status: str = Field("running", max_length=20)
+    cycle_duration_ms: Optional[int] = Field(None, ge=0)
+    accounts: List[AccountHeartbeat] = []
+
+
+class HeartbeatResponse(BaseModel):
+    """Response after recording a heartbeat"""
+    success: bool
+    worker_id: str
+    accounts_updated: int
+
+
+class HeartbeatOut(BaseModel):
+    """Liveness view of one worker or account"""
+    scope: str
+    key: str
+    worker_id: Optional[str]
+    shop_name: Optional[str]
+    status: Optional[str]
+    last_seen_at: datetime
+    last_snapshot_at: Optional[datetime]
+    last_cycle_at: Optional[datetime]
+    last_cycle_duration_ms: Optional[int]
+    cycles_total: int
+    success_count: int
+    failure_count: int
+    consecutive_failures: int
+    last_error: Optional[str]
+    staleness_seconds: float
+    is_stale: bool
+
+
 # ==================== DASHBOARD AGGREGATION ====================
 
 class CreatorLiveOverview(BaseModel):
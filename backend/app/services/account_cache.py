@@ -0,0 +1,37 @@
+"""
+Account Resolution Cache
+In-process cache of extension sync account resolution.
+
+The extension syncs every few seconds per open tab, while the mapping
+user -> default account -> assignment almost never changes. Entries expire
+after a TTL so other workers' changes are picked up, and are invalidated
+locally on identity syncs and assignment changes.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+from app.config import settings
+from app.core.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class ResolvedAccount:
+    """Outcome of resolving a sync payload to a shopee_accounts row"""
+    account_id: int  # shopee_accounts.id
+    account_identifier: str  # shopee_accounts.shopee_account_id
+    display_name: str
+    assignment_id: int
+
+
+class AccountResolutionCache(TTLCache[Tuple[int, str], ResolvedAccount]):
+    """Keyed by resolution_key(user_id, payload account id)"""
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.invalidate_where(lambda key, _: key[0] == user_id)
+
+
+def resolution_key(user_id: int, payload_account_id) -> Tuple[int, str]:
+    return (user_id, str(payload_account_id))
+
+
+account_resolution_cache = AccountResolutionCache(settings.account_resolution_cache_ttl_seconds)
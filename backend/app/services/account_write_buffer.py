@@ -0,0 +1,147 @@
+"""
+Account Write Buffer
+Coalesces shopee_accounts metadata writes (account_name, last_synced_at,
+is_active, access_token) from the sync hot path.
+
+Syncs queue their changes here instead of dirtying the row inside the
+request transaction. A background task flushes every few seconds with at
+most one UPDATE per account, and rows whose values already match are
+skipped by the WHERE clause, so many tabs syncing one account no longer
+contend on its row lock. These fields are therefore not committed together
+with the sync that produced them: they land up to ACCOUNT_WRITE_FLUSH_SECONDS
+later, and a crash before the flush loses them (the next sync re-queues
+them). With ACCOUNT_WRITE_FLUSH_SECONDS=0 nothing is buffered and the UPDATE
+runs inline in the caller's transaction.
+"""
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+from typing import Any, Dict, FrozenSet, List, Optional
+import asyncio
+import logging
+import threading
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.shopee_account import ShopeeAccount
+
+logger = logging.getLogger(__name__)
+
+BUFFERED_FIELDS = ("account_name", "last_synced_at", "is_active", "access_token")
+
+
+def _apply(db: Session, pending: Dict[int, Dict[str, Any]]) -> int:
+    """
+    UPDATE shopee_accounts from {account id: fields}. Accounts with the same
+    set of fields share one executemany UPDATE; each row is only touched when
+    some value actually differs. Does not commit.
+
+    Returns:
+        Number of rows updated
+    """
+    groups: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+    for account_id, fields in pending.items():
+        params = {f"b_{name}": value for name, value in fields.items()}
+        params["b_id"] = account_id
+        groups.setdefault(frozenset(fields), []).append(params)
+
+    table = ShopeeAccount.__table__
+    updated = 0
+    for fields, params in groups.items():
+        names = sorted(fields)
+        stmt = update(table).where(
+            table.c.id == bindparam("b_id"),
+            or_(*[table.c[name].is_distinct_from(bindparam(f"b_{name}")) for name in names])
+        ).values({name: bindparam(f"b_{name}") for name in names})
+        result = db.execute(stmt, params)
+        updated += max(result.rowcount or 0, 0)
+    return updated
+
+
+class AccountWriteBuffer:
+    """Pending per-account field updates, merged until the next flush"""
+
+    def __init__(self):
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def queue(self, db: Session, account_id: int, **fields) -> None:
+        """
+        Merge field updates for an account; later values win, last_synced_at
+        keeps the newest. When buffering is off (ACCOUNT_WRITE_FLUSH_SECONDS=0)
+        the update is applied in `db` instead and commits with it.
+        """
+        unknown = set(fields) - set(BUFFERED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unbuffered shopee_accounts fields: {sorted(unknown)}")
+
+        if settings.account_write_flush_seconds <= 0:
+            _apply(db, {account_id: fields})
+            return
+
+        with self._lock:
+            pending = self._pending.setdefault(account_id, {})
+            for name, value in fields.items():
+                if name == "last_synced_at" and pending.get(name) and pending[name] > value:
+                    continue
+                pending[name] = value
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def discard(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def flush(self, db: Session) -> int:
+        """
+        Write all pending updates and commit.
+
+        Returns:
+            Number of rows updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            updated = _apply(db, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the batch back (newer queued values win) so it is retried next flush
+            with self._lock:
+                for account_id, fields in pending.items():
+                    merged = dict(fields)
+                    merged.update(self._pending.get(account_id, {}))
+                    self._pending[account_id] = merged
+            raise
+
+        logger.info(f"[AccountWriteBuffer] Flushed {len(pending)} accounts, {updated} rows changed")
+        return updated
+
+
+account_write_buffer = AccountWriteBuffer()
+
+
+def flush_account_writes(db: Optional[Session] = None) -> int:
+    """Flush the shared buffer, with its own session unless one is given"""
+    if db is not None:
+        return account_write_buffer.flush(db)
+
+    session = SessionLocal()
+    try:
+        return account_write_buffer.flush(session)
+    finally:
+        session.close()
+
+
+async def account_flush_loop(interval_seconds: int) -> None:
+    """Background task: flush buffered account writes every `interval_seconds`"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(flush_account_writes)
+        except Exception as e:
+            logger.error(f"[AccountWriteBuffer] Flush failed: {e}")
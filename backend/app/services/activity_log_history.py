@@ -0,0 +1,100 @@
+"""
+Activity Log History Service
+Keyset-paginated audit trail reads for the activity log page.
+
+Pages are ordered by (created_at, id) descending and continue from an opaque
+cursor, so browsing months back costs the same per page as the first one.
+Every filter combination the page offers is served by a composite index
+ending in (created_at, id) (migration 024). The optional total is an
+estimate: the planner's row estimate on Postgres, a capped count elsewhere.
+"""
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Query, Session
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+import json
+
+from app.models.activity_log import ActivityLog
+from app.services.payout_history import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+COUNT_CAP = 10000  # Non-Postgres totals stop counting here
+
+
+def filtered_query(
+    db: Session,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Query:
+    """Activity logs matching the filters; date_to is inclusive"""
+    query = db.query(ActivityLog)
+    if user_id:
+        query = query.filter(ActivityLog.user_id == user_id)
+    if action:
+        query = query.filter(ActivityLog.action == action)
+    if entity_type:
+        query = query.filter(ActivityLog.entity_type == entity_type)
+    if date_from:
+        query = query.filter(ActivityLog.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(ActivityLog.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    return query
+
+
+def estimate_total(db: Session, query: Query) -> int:
+    """
+    Approximate number of rows `query` matches. Postgres: the planner's
+    estimate from EXPLAIN, without executing the query. Otherwise an exact
+    count that stops at COUNT_CAP.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        compiled = query.statement.compile(dialect=db.get_bind().dialect)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    capped = query.with_entities(ActivityLog.id).limit(COUNT_CAP).subquery()
+    return db.execute(select(func.count()).select_from(capped)).scalar() or 0
+
+
+class ActivityLogHistoryService:
+    """Paged activity log reads"""
+
+    @staticmethod
+    def page(
+        db: Session,
+        user_id: Optional[int] = None,
+        action: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        include_total: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[int]]:
+        """
+        One page of activity logs, newest first.
+
+        Returns:
+            (rows, next_cursor, approximate_total) where next_cursor is None on
+            the last page and approximate_total is None unless requested
+        """
+        query = filtered_query(db, user_id, action, entity_type, date_from, date_to)
+        total = estimate_total(db, query) if include_total else None
+
+        if cursor:
+            after_created, after_id = decode_cursor(cursor)
+            query = query.filter(tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(after_created, after_id))
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        found = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(found) > limit:
+            last = found[limit - 1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return [log.to_dict() for log in found[:limit]], next_cursor, total
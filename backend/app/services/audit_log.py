@@ -0,0 +1,301 @@
+"""
+Audit Log Writer
+Buffers activity_logs events in memory and writes them in batches.
+
+Request handlers call `audit_log.record(...)` instead of adding an
+ActivityLog and committing in the request path. A background task inserts
+pending events every ACTIVITY_LOG_FLUSH_SECONDS with one executemany
+INSERT; the event time is taken at record time, not at flush. Reads do
+not wait for pending events: each worker's events reach the table within
+one flush interval.
+
+On Postgres activity_logs is range-partitioned by month (migration 023).
+The maintenance pass creates the next months' partitions ahead of time and
+retention drops whole partitions instead of deleting rows. Elsewhere
+(SQLite dev/test) the table is a single table and retention deletes by
+month range.
+"""
+from collections import deque
+from datetime import date, datetime
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import logging
+import re
+import threading
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.activity_log import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^activity_logs_(\d{4})(\d{2})$")
+
+
+class AuditLogBuffer:
+    """Bounded FIFO of pending activity_logs rows"""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max(max_pending, 1)
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0  # Overflow or rows the database rejected
+
+    def record(
+        self,
+        action: str,
+        user_id: Optional[int] = None,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        old_value: Any = None,
+        new_value: Any = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> None:
+        """Queue an event; never blocks on the database"""
+        row = {
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_value": old_value,
+            "new_value": new_value,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.utcnow(),
+        }
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(row)
+            self.recorded += 1
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def discard(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            if room < len(rows):
+                self.dropped += len(rows) - max(room, 0)
+                rows = rows[len(rows) - max(room, 0):]
+            self._pending.extendleft(reversed(rows))
+
+    def flush(self, db: Session) -> int:
+        """
+        Insert all pending events and commit.
+
+        If the batch violates a constraint (e.g. the user was deleted since
+        the event was recorded) rows are retried one by one and the rejected
+        ones dropped; any other failure puts the batch back for the next flush.
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+        if not rows:
+            return 0
+
+        table = ActivityLog.__table__
+        try:
+            db.execute(insert(table), rows)
+            db.commit()
+            written = len(rows)
+        except IntegrityError:
+            db.rollback()
+            written = 0
+            for row in rows:
+                try:
+                    db.execute(insert(table), [row])
+                    db.commit()
+                    written += 1
+                except IntegrityError:
+                    db.rollback()
+            with self._lock:
+                self.dropped += len(rows) - written
+            logger.warning(f"[AuditLog] Dropped {len(rows) - written} rejected events")
+        except Exception:
+            db.rollback()
+            self._requeue(rows)
+            raise
+
+        with self._lock:
+            self.written += written
+        return written
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+            }
+
+
+audit_log = AuditLogBuffer(settings.activity_log_max_pending)
+
+
+def flush_audit_log(db: Optional[Session] = None) -> int:
+    """Flush the shared buffer, with its own session unless one is given"""
+    if db is not None:
+        return audit_log.flush(db)
+
+    session = SessionLocal()
+    try:
+        return audit_log.flush(session)
+    finally:
+        session.close()
+
+
+# ==================== Partitions ====================
+
+def _month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"activity_logs_{month:%Y%m}"
+
+
+def is_partitioned(db: Session) -> bool:
+    """Whether activity_logs is a Postgres partitioned table"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'activity_logs'"
+    )).first() is not None
+
+
+def list_partitions(db: Session) -> Dict[date, str]:
+    """Monthly partitions of activity_logs by first day of month"""
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'activity_logs'"
+    )).scalars()
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_partitions(db: Session, today: Optional[date] = None, months_ahead: int = 2) -> List[str]:
+    """
+    Create monthly partitions from the current month through `months_ahead`
+    months ahead. No-op unless activity_logs is partitioned. Commits.
+
+    Returns:
+        Names of the partitions created
+    """
+    if not is_partitioned(db):
+        return []
+    existing = list_partitions(db)
+    month = _month_start(today or datetime.utcnow().date())
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _add_months(month, offset)
+        if start in existing:
+            continue
+        name = partition_name(start)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF activity_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+        ))
+        created.append(name)
+    db.commit()
+    return created
+
+
+def drop_before(db: Session, cutoff: date) -> int:
+    """
+    Remove audit history older than the month containing `cutoff`.
+    Partitioned: detach and drop whole monthly partitions (returns the
+    number dropped). Otherwise: delete the rows (returns rows deleted).
+    Commits.
+    """
+    cutoff = _month_start(cutoff)
+    if is_partitioned(db):
+        dropped = 0
+        for month, name in sorted(list_partitions(db).items()):
+            if month >= cutoff:
+                break
+            db.execute(text(f"ALTER TABLE activity_logs DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+        db.commit()
+        return dropped
+
+    deleted = db.query(ActivityLog).filter(
+        ActivityLog.created_at < datetime.combine(cutoff, datetime.min.time())
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def run_maintenance(db: Session, today: Optional[date] = None) -> None:
+    """Create upcoming partitions and apply ACTIVITY_LOG_RETENTION_MONTHS"""
+    today = today or datetime.utcnow().date()
+    created = ensure_partitions(db, today)
+    if created:
+        logger.info(f"[AuditLog] Created partitions {created}")
+    if settings.activity_log_retention_months > 0:
+        cutoff = _add_months(_month_start(today), -settings.activity_log_retention_months)
+        removed = drop_before(db, cutoff)
+        if removed:
+            logger.info(f"[AuditLog] Retention before {cutoff}: removed {removed}")
+
+
+def _run_maintenance() -> None:
+    db = SessionLocal()
+    try:
+        run_maintenance(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def audit_flush_loop(interval_seconds: int) -> None:
+    """Background task: write buffered audit events every `interval_seconds`"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(flush_audit_log)
+        except Exception as e:
+            logger.error(f"[AuditLog] Flush failed: {e}")
+
+
+async def audit_maintenance_loop(interval_hours: int) -> None:
+    """Background task: partition creation and retention"""
+    while True:
+        try:
+            await asyncio.to_thread(_run_maintenance)
+        except Exception as e:
+            logger.error(f"[AuditLog] Maintenance failed: {e}")
+        await asyncio.sleep(interval_hours * 3600)
@@ -13,6 +13,9 @@ from app.models.user import User
 from app.models.shopee_account import ShopeeAccount
 from app.models.shopee_account_assignment import ShopeeAccountAssignment
 from app.models.studio import Studio
+from app.services.account_cache import ResolvedAccount, account_resolution_cache, resolution_key
+from app.core.rbac import account_scope_cache
+from app.services.account_write_buffer import account_write_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -170,12 +173,15 @@ class AutoConnectService:
         ).first()
         
         if existing:
-            # Update existing account
-            existing.account_name = display_name
-            existing.last_synced_at = datetime.utcnow()
-            existing.is_active = True
-            logger.info(f"[AutoConnect] Updated existing account_id={existing.id}, identifier={account_identifier}")
-            db.flush()
+            # Metadata goes through the write buffer so concurrent syncs don't lock the row
+            account_write_buffer.queue(
+                db,
+                existing.id,
+                account_name=display_name,
+                last_synced_at=datetime.utcnow(),
+                is_active=True
+            )
+            logger.info(f"[AutoConnect] Queued update for account_id={existing.id}, identifier={account_identifier}")
             return (existing, False)
         
         # Create new account
@@ -188,6 +194,7 @@ class AutoConnectService:
         )
         db.add(new_account)
         db.flush()
+        account_scope_cache.clear()
         logger.info(f"[AutoConnect] Created new account_id={new_account.id}, identifier={account_identifier}, name={display_name}")
         return (new_account, True)
     
@@ -224,6 +231,7 @@ class AutoConnectService:
                 
                 existing.is_default = True
                 db.flush()
+                account_resolution_cache.invalidate_user(user.id)
                 logger.info(f"[AutoConnect] Set account_id={shopee_account.id} as default for user_id={user.id}")
             
             logger.info(f"[AutoConnect] Assignment exists: user_id={user.id}, account_id={shopee_account.id}")
@@ -247,6 +255,8 @@ class AutoConnectService:
         )
         db.add(new_assignment)
         db.flush()
+        account_resolution_cache.invalidate_user(user.id)
+        account_scope_cache.invalidate_user(user.id)
         logger.info(f"[AutoConnect] Created assignment: user_id={user.id}, account_id={shopee_account.id}, role={role_scope}, default={set_as_default}")
         return (new_assignment, True)
     
@@ -309,6 +319,73 @@ class AutoConnectService:
         logger.error(f"[AutoConnect] No valid account found for user_id={user.id}")
         raise ValueError("No connected account found. Please use Connect Account first.")
     
+    @staticmethod
+    def resolve_sync_account(
+        db: Session,
+        user: User,
+        payload: Dict[str, Any],
+        display_name: str
+    ) -> Tuple[ResolvedAccount, bool, bool]:
+        """
+        Resolve, upsert and assign the account for a regular sync.
+        
+        A cache hit for (user, payload account id) with the same display name
+        skips every lookup; last_synced_at is queued on the account write
+        buffer either way. A miss runs the full
+        resolve -> studio -> account -> assignment flow. Call
+        remember_sync_account() after the transaction commits to cache it.
+        
+        Returns:
+            (ResolvedAccount, account_created, assignment_created)
+        """
+        payload_account_id = str(payload.get('account', {}).get('account_id') or '')
+        cached = account_resolution_cache.get(resolution_key(user.id, payload_account_id))
+        if cached and cached.display_name == display_name:
+            account_write_buffer.queue(db, cached.account_id, last_synced_at=datetime.utcnow())
+            logger.info(f"[AutoConnect] Cached resolution: user_id={user.id} -> account_id={cached.account_id}")
+            return (cached, False, False)
+        
+        account_identifier = AutoConnectService.resolve_account_id(db=db, user=user, payload=payload)
+        studio_id = AutoConnectService.ensure_studio_exists(db, user)
+        shopee_account, account_created = AutoConnectService.upsert_shopee_account(
+            db=db,
+            account_identifier=account_identifier,
+            display_name=display_name,
+            studio_id=studio_id
+        )
+        assignment, assignment_created = AutoConnectService.ensure_assignment(
+            db=db,
+            user=user,
+            shopee_account=shopee_account,
+            set_as_default=False  # Regular sync doesn't change default
+        )
+        resolved = ResolvedAccount(
+            account_id=shopee_account.id,
+            account_identifier=account_identifier,
+            display_name=display_name,
+            assignment_id=assignment.id
+        )
+        return (resolved, account_created, assignment_created)
+    
+    @staticmethod
+    def remember_sync_account(user_id: int, payload: Dict[str, Any], resolved: ResolvedAccount) -> None:
+        """Cache a committed resolution for subsequent syncs of the same tab"""
+        payload_account_id = str(payload.get('account', {}).get('account_id') or '')
+        account_resolution_cache.put(resolution_key(user_id, payload_account_id), resolved)
+    
+    @staticmethod
+    def summarize_payload(raw_payload: Dict[str, Any]) -> Tuple[bytes, int]:
+        """
+        Canonical JSON encoding of a sync payload and the number of rows it carries.
+
+        Returns:
+            (encoded payload, item count across list values in payload['data'])
+        """
+        encoded = json.dumps(raw_payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        data = raw_payload.get("data") or {}
+        item_count = sum(len(v) for v in data.values() if isinstance(v, list)) if isinstance(data, dict) else 0
+        return encoded, item_count
+
     @staticmethod
     def log_sync(
         db: Session,
@@ -317,33 +394,48 @@ class AutoConnectService:
         payload_type: str,
         success: bool,
         raw_payload: Dict[str, Any],
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        inserted: int = 0,
+        updated: int = 0,
+        duration_ms: Optional[int] = None
     ):
         """
         Log sync activity for debugging and audit.
         
-        Note: Stores in activity_logs for now.
-        TODO: Create dedicated shopee_sync_logs table if needed.
+        Writes a compact sync_events row (type, counts, size, hash, duration).
+        The raw payload goes to the gzip blob store only when
+        settings.sync_payload_blobs asks for it ('all', or 'errors' on failure).
         """
-        from app.models.activity_log import ActivityLog
-        
-        # Build sync details (use new_value field which accepts JSON)
-        sync_details = {
-            'payload_type': payload_type,
-            'success': success,
-            'account_id': account_id,
-            'raw_payload': raw_payload
-        }
-        
-        if error_message:
-            sync_details['error'] = error_message
-        
-        log = ActivityLog(
+        from app.config import settings
+        from app.models.sync_event import SyncEvent
+        from app.services.sync_blob_store import SyncBlobStore
+        
+        encoded, item_count = AutoConnectService.summarize_payload(raw_payload)
+        sha256 = SyncBlobStore.digest(encoded)
+        
+        blob_stored = False
+        mode = settings.sync_payload_blobs
+        if mode == "all" or (mode == "errors" and not success):
+            try:
+                SyncBlobStore().put(encoded)
+                blob_stored = True
+            except OSError as e:
+                # Losing the raw copy must never fail the sync itself
+                logger.warning(f"[AutoConnect] Could not store sync payload blob: {e}")
+        
+        event = SyncEvent(
             user_id=user_id,
-            action='extension_auto_connect_sync',
-            entity_type='shopee_account',
-            entity_id=account_id,
-            new_value=sync_details  # FIXED: Use new_value instead of details
+            account_id=account_id or None,
+            payload_type=payload_type,
+            success=success,
+            item_count=item_count,
+            inserted=inserted,
+            updated=updated,
+            payload_bytes=len(encoded),
+            payload_sha256=sha256,
+            blob_stored=blob_stored,
+            duration_ms=duration_ms,
+            error_message=error_message[:2000] if error_message else None
         )
-        db.add(log)
-        logger.info(f"[AutoConnect] Logged sync: user_id={user_id}, account_id={account_id}, success={success}")
+        db.add(event)
+        logger.info(f"[AutoConnect] Logged sync: user_id={user_id}, account_id={account_id}, success={success}, bytes={len(encoded)}")
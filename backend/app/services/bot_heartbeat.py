@@ -0,0 +1,156 @@
+"""
+Bot Heartbeat Service
+Tracks liveness and cycle stats per bot worker and per account
+"""
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import logging
+
+from app.database import dialect_insert
+from app.models.realtime_snapshot import BotHeartbeat, RealtimeSnapshot
+
+logger = logging.getLogger(__name__)
+
+SCOPE_WORKER = "worker"
+SCOPE_ACCOUNT = "account"
+
+
+def _later(column, incoming):
+    """SQL expression keeping the later of the stored and incoming timestamps"""
+    return case((column > incoming, column), else_=incoming)
+
+
+def _keep_if_null(column, incoming):
+    """SQL expression keeping the stored value when the incoming one is NULL"""
+    return case((incoming.is_(None), column), else_=incoming)
+
+
+class BotHeartbeatService:
+    """Upserts heartbeat rows; every write is a single statement per batch"""
+
+    @staticmethod
+    def _upsert(db: Session, rows: List[Dict[str, Any]], counters: bool) -> None:
+        if not rows:
+            return
+
+        table = BotHeartbeat.__table__
+        stmt = dialect_insert(db, table).values(rows)
+        excluded = stmt.excluded
+        set_ = {
+            "last_seen_at": excluded.last_seen_at,
+            "worker_id": _keep_if_null(table.c.worker_id, excluded.worker_id),
+            "shop_name": _keep_if_null(table.c.shop_name, excluded.shop_name),
+            "last_snapshot_at": case(
+                (excluded.last_snapshot_at.is_(None), table.c.last_snapshot_at),
+                else_=_later(table.c.last_snapshot_at, excluded.last_snapshot_at)
+            ),
+        }
+        if counters:
+            set_.update({
+                "status": _keep_if_null(table.c.status, excluded.status),
+                "last_cycle_at": _keep_if_null(table.c.last_cycle_at, excluded.last_cycle_at),
+                "last_cycle_duration_ms": _keep_if_null(table.c.last_cycle_duration_ms, excluded.last_cycle_duration_ms),
+                "cycles_total": table.c.cycles_total + excluded.cycles_total,
+                "success_count": table.c.success_count + excluded.success_count,
+                "failure_count": table.c.failure_count + excluded.failure_count,
+                # Failures extend the streak, a success resets it, a bare ping keeps it
+                "consecutive_failures": case(
+                    (excluded.failure_count > 0, table.c.consecutive_failures + excluded.failure_count),
+                    (excluded.success_count > 0, 0),
+                    else_=table.c.consecutive_failures
+                ),
+                "last_error": _keep_if_null(table.c.last_error, excluded.last_error),
+            })
+        db.execute(stmt.on_conflict_do_update(index_elements=["scope", "key"], set_=set_))
+
+    @staticmethod
+    def _row(scope: str, key: str, now: datetime, **values) -> Dict[str, Any]:
+        row = {
+            "scope": scope,
+            "key": key,
+            "worker_id": None,
+            "shop_name": None,
+            "status": None,
+            "last_seen_at": now,
+            "last_snapshot_at": None,
+            "last_cycle_at": None,
+            "last_cycle_duration_ms": None,
+            "cycles_total": 0,
+            "success_count": 0,
+            "failure_count": 0,
+            "consecutive_failures": 0,
+            "last_error": None,
+        }
+        row.update(values)
+        row["consecutive_failures"] = row["failure_count"]  # Streak on first insert
+        return row
+
+    @staticmethod
+    def touch_from_snapshots(db: Session, snapshots: List[RealtimeSnapshot]) -> None:
+        """Mark accounts as seen after an ingest (does not touch cycle counters)"""
+        now = datetime.utcnow()
+        per_account: Dict[str, Dict[str, Any]] = {}
+        for snap in snapshots:
+            row = per_account.get(snap.shopee_account_id)
+            if row is None or snap.scraped_at > row["last_snapshot_at"]:
+                per_account[snap.shopee_account_id] = BotHeartbeatService._row(
+                    SCOPE_ACCOUNT, snap.shopee_account_id, now,
+                    shop_name=snap.shop_name,
+                    last_snapshot_at=snap.scraped_at
+                )
+        BotHeartbeatService._upsert(db, list(per_account.values()), counters=False)
+
+    @staticmethod
+    def record_heartbeat(
+        db: Session,
+        worker_id: str,
+        status: str,
+        cycle_duration_ms: Optional[int],
+        accounts: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Record a supervisor heartbeat and, when account results are included,
+        the outcome of the cycle that just finished.
+
+        Returns:
+            Number of account rows updated
+        """
+        now = datetime.utcnow()
+        failures = sum(1 for a in accounts if not a.get("success"))
+        completed_cycle = cycle_duration_ms is not None
+
+        BotHeartbeatService._upsert(db, [BotHeartbeatService._row(
+            SCOPE_WORKER, worker_id, now,
+            worker_id=worker_id,
+            status=status,
+            last_cycle_at=now if completed_cycle else None,
+            last_cycle_duration_ms=cycle_duration_ms,
+            cycles_total=1 if completed_cycle else 0,
+            success_count=len(accounts) - failures,
+            failure_count=failures,
+        )], counters=True)
+
+        account_rows = {}
+        for account in accounts:
+            success = bool(account.get("success"))
+            account_rows[account["shopee_account_id"]] = BotHeartbeatService._row(
+                SCOPE_ACCOUNT, account["shopee_account_id"], now,
+                worker_id=worker_id,
+                shop_name=account.get("shop_name"),
+                status="ok" if success else "error",
+                last_cycle_at=now,
+                last_cycle_duration_ms=account.get("duration_ms"),
+                cycles_total=1,
+                success_count=1 if success else 0,
+                failure_count=0 if success else 1,
+                last_error=None if success else (account.get("error") or "unknown error"),
+            )
+        BotHeartbeatService._upsert(db, list(account_rows.values()), counters=True)
+        return len(account_rows)
+
+    @staticmethod
+    def get_all(db: Session) -> List[BotHeartbeat]:
+        """All heartbeat rows: one per worker plus one per account"""
+        return db.query(BotHeartbeat).order_by(BotHeartbeat.scope, BotHeartbeat.key).all()
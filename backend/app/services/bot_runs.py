@@ -0,0 +1,178 @@
+"""
+Bot Run Service
+Lifecycle (start / progress / finish) and throughput trends for bot cycles
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import math
+import uuid
+import logging
+
+from app.models.realtime_snapshot import BotRun, BotRunScrape
+
+logger = logging.getLogger(__name__)
+
+# supervisor.js sleeps this long between batches
+BATCH_PAUSE_MS = 1000
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class BotRunService:
+    """Service for bot cycle lifecycle and sizing metrics"""
+
+    @staticmethod
+    def start(
+        db: Session,
+        accounts_total: int,
+        run_id: Optional[str] = None,
+        worker_id: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> BotRun:
+        """Create a running BotRun (idempotent on a client-supplied run_id)"""
+        run_id = run_id or str(uuid.uuid4())
+        existing = db.query(BotRun).filter(BotRun.run_id == run_id).first()
+        if existing:
+            return existing
+
+        run = BotRun(
+            run_id=run_id,
+            status="running",
+            accounts_total=accounts_total,
+            worker_id=worker_id,
+            max_workers=max_workers,
+            started_at=datetime.utcnow()
+        )
+        db.add(run)
+        db.flush()
+        return run
+
+    @staticmethod
+    def record_progress(
+        db: Session,
+        run_id: str,
+        shopee_account_id: str,
+        success: bool,
+        duration_ms: Optional[int],
+        snapshots: int
+    ) -> bool:
+        """
+        Count one finished account with a single atomic UPDATE
+        (SET x = x + 1), safe under concurrent progress calls.
+
+        Returns:
+            False if the run does not exist or is no longer running
+        """
+        updated = db.query(BotRun).filter(
+            BotRun.run_id == run_id,
+            BotRun.status == "running"
+        ).update({
+            BotRun.accounts_processed: BotRun.accounts_processed + 1,
+            BotRun.accounts_success: BotRun.accounts_success + (1 if success else 0),
+            BotRun.accounts_failed: BotRun.accounts_failed + (0 if success else 1),
+            BotRun.snapshots_count: BotRun.snapshots_count + snapshots,
+        }, synchronize_session=False)
+
+        if not updated:
+            return False
+
+        db.add(BotRunScrape(
+            run_id=run_id,
+            shopee_account_id=shopee_account_id,
+            success=success,
+            duration_ms=duration_ms,
+            snapshots=snapshots
+        ))
+        return True
+
+    @staticmethod
+    def finish(db: Session, run_id: str, status: str, error_message: Optional[str] = None) -> Optional[BotRun]:
+        """Close a run and store duration, snapshots/s and p95 per-account scrape time"""
+        run = db.query(BotRun).filter(BotRun.run_id == run_id).first()
+        if not run:
+            return None
+        if run.status != "running":
+            return run
+
+        durations = [
+            d for (d,) in db.query(BotRunScrape.duration_ms).filter(
+                BotRunScrape.run_id == run_id,
+                BotRunScrape.duration_ms.isnot(None)
+            )
+        ]
+        ended_at = datetime.utcnow()
+        duration_ms = int((ended_at - run.started_at).total_seconds() * 1000)
+
+        run.status = status
+        run.error_message = error_message
+        run.ended_at = ended_at
+        run.duration_ms = duration_ms
+        run.snapshots_per_second = round((run.snapshots_count or 0) / (duration_ms / 1000), 3) if duration_ms > 0 else None
+        p95 = percentile(durations, 95)
+        run.p95_scrape_ms = int(p95) if p95 is not None else None
+        db.flush()
+        return run
+
+    @staticmethod
+    def trends(db: Session, limit: int, target_interval_ms: int) -> Dict[str, Any]:
+        """
+        Summarize recent completed runs and derive supervisor sizing.
+
+        A cycle takes about ceil(accounts / workers) * (scrape + batch pause),
+        so fitting a cycle into `target_interval_ms` needs
+        ceil(accounts * (p95 scrape + pause) / target) workers.
+        """
+        runs = db.query(BotRun).filter(
+            BotRun.status == "completed",
+            BotRun.duration_ms.isnot(None)
+        ).order_by(BotRun.started_at.desc()).limit(limit).all()
+
+        result: Dict[str, Any] = {
+            "runs_analyzed": len(runs),
+            "avg_accounts_total": None,
+            "avg_duration_ms": None,
+            "p95_duration_ms": None,
+            "avg_snapshots_per_second": None,
+            "p95_scrape_ms": None,
+            "failure_rate": None,
+            "target_interval_ms": target_interval_ms,
+            "suggested_max_workers": None,
+            "suggested_sync_interval_ms": None,
+            "runs": runs,
+        }
+        if not runs:
+            return result
+
+        durations = [r.duration_ms for r in runs]
+        throughputs = [r.snapshots_per_second for r in runs if r.snapshots_per_second is not None]
+        scrape_p95s = [r.p95_scrape_ms for r in runs if r.p95_scrape_ms is not None]
+        processed = sum(r.accounts_processed or 0 for r in runs)
+        failed = sum(r.accounts_failed or 0 for r in runs)
+        accounts = sum(r.accounts_total or 0 for r in runs) / len(runs)
+
+        p95_cycle = percentile(durations, 95)
+        p95_scrape = percentile(scrape_p95s, 95)
+
+        result.update({
+            "avg_accounts_total": round(accounts, 1),
+            "avg_duration_ms": round(sum(durations) / len(durations), 1),
+            "p95_duration_ms": int(p95_cycle),
+            "avg_snapshots_per_second": round(sum(throughputs) / len(throughputs), 3) if throughputs else None,
+            "p95_scrape_ms": int(p95_scrape) if p95_scrape is not None else None,
+            "failure_rate": round(failed / processed, 4) if processed else None,
+            # Leave 20% headroom over the slowest typical cycle, rounded up to 5s
+            "suggested_sync_interval_ms": int(math.ceil(p95_cycle * 1.2 / 5000) * 5000),
+        })
+        if p95_scrape is not None and accounts:
+            result["suggested_max_workers"] = max(
+                1, math.ceil(accounts * (p95_scrape + BATCH_PAUSE_MS) / target_interval_ms)
+            )
+        return result
@@ -0,0 +1,345 @@
+"""
+Import Job Service
+Chunked, resumable server-side order imports from CSV/XLSX uploads.
+
+The upload is spooled to disk, then read `chunk_size` rows at a time (pandas
+chunksize for CSV, openpyxl read-only mode for XLSX), so memory stays bounded
+whatever the file size. Every chunk commits together with the job's counters;
+a job interrupted by a restart resumes at `chunks_done`. Completed jobs delete
+their upload; failed ones keep it for IMPORT_FAILED_RETENTION_DAYS so they can
+be resumed.
+"""
+from sqlalchemy import or_, and_, update
+from sqlalchemy.orm import Session
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.import_job import ImportJob
+from app.services.order_import import MAX_FAILED_ROWS_REPORTED, OrderImportService
+
+logger = logging.getLogger(__name__)
+
+FILE_FORMATS = {".csv": "csv", ".xlsx": "xlsx"}
+SPOOL_BLOCK_BYTES = 1 << 20
+MAX_CHUNK_STATS = 200  # Most recent per-chunk entries kept on the job
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """csv or xlsx from the upload's extension; ValueError otherwise"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in FILE_FORMATS:
+        raise ValueError("File must be CSV or XLSX")
+    return FILE_FORMATS[ext]
+
+
+def spool_upload(source: BinaryIO, file_format: str, directory: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Copy an upload stream to disk block by block.
+
+    Returns:
+        (path, bytes written)
+    """
+    directory = directory or settings.import_spool_dir
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.{file_format}")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(source, out, SPOOL_BLOCK_BYTES)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return (path, os.path.getsize(path))
+
+
+def count_csv_rows(source: BinaryIO) -> int:
+    """Data rows in a CSV stream by counting line breaks (quoted newlines overcount)"""
+    lines = 0
+    last = b""
+    for block in iter(lambda: source.read(SPOOL_BLOCK_BYTES), b""):
+        lines += block.count(b"\n")
+        last = block
+    if last and not last.endswith(b"\n"):
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def estimate_rows(path: str, file_format: str) -> Optional[int]:
+    """Data row count of a spooled file without loading it"""
+    if file_format == "csv":
+        with open(path, "rb") as f:
+            return count_csv_rows(f)
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True)
+    try:
+        max_row = workbook.active.max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        workbook.close()
+
+
+def _xlsx_chunks(path: str, chunk_size: int, skip_rows: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"column_{i}" for i, name in enumerate(header)]
+
+        batch: List[tuple] = []
+        for position, values in enumerate(rows):
+            if position < skip_rows:
+                continue
+            batch.append(values)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(path: str, file_format: str, chunk_size: int, start_chunk: int = 0) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Yield (chunk number, frame) from `start_chunk` on.
+    Frames are indexed by their data row number in the whole file.
+    CSV chunks before `start_chunk` are parsed and discarded rather than
+    skipped by line, since a quoted field may span several lines.
+    """
+    if file_format == "csv":
+        frames = pd.read_csv(path, dtype=str, skipinitialspace=True, chunksize=chunk_size)
+        frames = itertools.islice(frames, start_chunk, None)
+    else:
+        frames = _xlsx_chunks(path, chunk_size, start_chunk * chunk_size)
+
+    for offset, frame in enumerate(frames):
+        chunk = start_chunk + offset
+        frame.index = pd.RangeIndex(chunk * chunk_size, chunk * chunk_size + len(frame))
+        yield chunk, frame
+
+
+class ImportJobService:
+    """Creates, claims and runs import jobs"""
+
+    @staticmethod
+    def create(
+        db: Session,
+        upload: BinaryIO,
+        filename: str,
+        user_id: Optional[int],
+        shop_id: int,
+        import_type: str,
+        mapping: Dict[str, str],
+        chunk_size: Optional[int] = None
+    ) -> ImportJob:
+        """Spool the upload and record a queued job (committed)"""
+        file_format = detect_format(filename)
+        path, size = spool_upload(upload, file_format)
+        try:
+            total_rows = estimate_rows(path, file_format)
+        except Exception as e:
+            os.remove(path)
+            raise ValueError(f"Failed to read {file_format.upper()}: {e}")
+
+        job = ImportJob(
+            user_id=user_id,
+            shop_id=shop_id,
+            import_type=import_type,
+            mapping=mapping,
+            filename=filename,
+            file_path=path,
+            file_format=file_format,
+            file_bytes=size,
+            status="queued",
+            chunk_size=chunk_size or settings.import_chunk_rows,
+            total_rows=total_rows,
+            failed_rows=[],
+            chunk_stats=[],
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def claim(db: Session, job_id: int, now: Optional[datetime] = None) -> bool:
+        """
+        Atomically mark a job running for this worker.
+        Succeeds for queued jobs and for running jobs whose last progress is
+        older than the stale window (their worker died mid-import).
+        """
+        now = now or datetime.utcnow()
+        stale_before = now - timedelta(minutes=settings.import_job_stale_minutes)
+        table = ImportJob.__table__
+        result = db.execute(
+            update(table).where(
+                table.c.id == job_id,
+                or_(
+                    table.c.status == "queued",
+                    and_(table.c.status == "running", table.c.updated_at < stale_before)
+                )
+            ).values(status="running", updated_at=now)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def claimable_ids(db: Session, now: Optional[datetime] = None) -> List[int]:
+        """Queued jobs and running jobs without progress for the stale window"""
+        now = now or datetime.utcnow()
+        stale_before = now - timedelta(minutes=settings.import_job_stale_minutes)
+        rows = db.query(ImportJob.id).filter(or_(
+            ImportJob.status == "queued",
+            and_(ImportJob.status == "running", ImportJob.updated_at < stale_before)
+        )).order_by(ImportJob.id).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def run(db: Session, job: ImportJob) -> ImportJob:
+        """
+        Import the remaining chunks of a claimed job.
+        Each chunk's orders and the job counters commit in one transaction.
+        """
+        if job.started_at is None:
+            job.started_at = datetime.utcnow()
+            db.commit()
+
+        try:
+            for chunk, frame in iter_chunks(job.file_path, job.file_format, job.chunk_size, job.chunks_done or 0):
+                started = time.perf_counter()
+                failed_rows = list(job.failed_rows or [])
+                stats = OrderImportService.import_frame(
+                    db, frame, job.shop_id, job.import_type, job.mapping,
+                    max_failed_rows=MAX_FAILED_ROWS_REPORTED - len(failed_rows)
+                )
+
+                job.chunks_done = chunk + 1
+                job.rows_processed = (job.rows_processed or 0) + len(frame)
+                for field in ("inserted", "updated", "skipped", "failed"):
+                    setattr(job, field, (getattr(job, field) or 0) + stats[field])
+                job.failed_rows = failed_rows + stats["failed_rows"]
+                job.chunk_stats = (list(job.chunk_stats or []) + [{
+                    "chunk": chunk,
+                    "rows": len(frame),
+                    **{field: stats[field] for field in ("inserted", "updated", "skipped", "failed")},
+                    "ms": int((time.perf_counter() - started) * 1000),
+                }])[-MAX_CHUNK_STATS:]
+                job.updated_at = datetime.utcnow()
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error_message = str(e)[:1000]
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            logger.error(f"[ImportJob] Job {job.id} failed at chunk {job.chunks_done}: {e}")
+            return job
+
+        job.status = "completed"
+        job.finished_at = job.updated_at = datetime.utcnow()
+        db.commit()
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        logger.info(f"[ImportJob] Job {job.id} completed: {job.rows_processed} rows in {job.chunks_done} chunks")
+        return job
+
+    @staticmethod
+    def purge_failed(db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Delete the spooled uploads of jobs that failed more than
+        IMPORT_FAILED_RETENTION_DAYS ago. The job rows stay for their
+        history; resuming them then asks for a new upload.
+
+        Returns:
+            Number of files removed
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=settings.import_failed_retention_days)
+        removed = 0
+        for (path,) in db.query(ImportJob.file_path).filter(
+            ImportJob.status == "failed",
+            ImportJob.updated_at < cutoff
+        ):
+            if path and os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def requeue(db: Session, job: ImportJob) -> ImportJob:
+        """Queue a failed job again; it resumes after its last committed chunk"""
+        if job.status != "failed":
+            raise ValueError(f"Only failed jobs can be resumed (status: {job.status})")
+        if not os.path.exists(job.file_path):
+            raise ValueError("Spooled upload is gone; upload the file again")
+        job.status = "queued"
+        job.error_message = None
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        return job
+
+
+def run_import_job(job_id: int) -> None:
+    """Claim and run one job with its own session (executed in a worker thread)"""
+    db = SessionLocal()
+    try:
+        if not ImportJobService.claim(db, job_id):
+            return
+        job = db.get(ImportJob, job_id)
+        ImportJobService.run(db, job)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[ImportJob] Job {job_id} could not run: {e}")
+    finally:
+        db.close()
+
+
+def _claimable_ids() -> List[int]:
+    db = SessionLocal()
+    try:
+        return ImportJobService.claimable_ids(db)
+    finally:
+        db.close()
+
+
+def _purge_failed() -> None:
+    db = SessionLocal()
+    try:
+        removed = ImportJobService.purge_failed(db)
+        if removed:
+            logger.info(f"[ImportJob] Removed {removed} spooled uploads of old failed jobs")
+    finally:
+        db.close()
+
+
+async def import_job_resume_loop(interval_seconds: int = 60) -> None:
+    """
+    Background task: pick up queued jobs, resume ones abandoned by a dead
+    worker and delete the uploads of long-failed jobs
+    """
+    while True:
+        try:
+            for job_id in await asyncio.to_thread(_claimable_ids):
+                await asyncio.to_thread(run_import_job, job_id)
+            await asyncio.to_thread(_purge_failed)
+        except Exception as e:
+            logger.error(f"[ImportJob] Resume pass failed: {e}")
+        await asyncio.sleep(interval_seconds)
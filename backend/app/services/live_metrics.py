@@ -0,0 +1,354 @@
+"""
+Live Metrics Service
+Time series of live streaming metrics pushed by the extension.
+
+Samples are merged into one '1m' point per (account, session, minute) with a
+single multi-row upsert, so a tab pushing every few seconds appends at most
+one row a minute. Minute points older than the retention window are folded
+into '15m' points by the rollup.
+"""
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.models.live_metric import LiveMetricPoint
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+}
+LAST_VALUE_FIELDS = ("viewers", "likes", "total_sales", "revenue")
+CHUNK_SIZE = 500
+
+
+def _bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Floor a timestamp to the start of its bucket"""
+    step = int(RESOLUTIONS[resolution].total_seconds() // 60)
+    minutes = ts.hour * 60 + ts.minute
+    minutes -= minutes % step
+    return ts.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(float(value)) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _decimal_or_none(value: Any) -> Optional[Decimal]:
+    try:
+        return Decimal(str(value)) if value not in (None, "") else None
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _parse_sampled_at(value: Any, default: datetime) -> datetime:
+    """Sample timestamp as naive UTC; epoch millis, ISO strings or the receive time"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.utcfromtimestamp(value / 1000 if value > 1e11 else value)
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            return parsed
+        except ValueError:
+            pass
+    return default
+
+
+def session_key_for(sample: Dict[str, Any], sampled_at: datetime) -> str:
+    """Session id sent by the extension, else one session per account per UTC day"""
+    session_id = sample.get("session_id") or sample.get("sessionId")
+    if session_id:
+        return str(session_id)[:100]
+    return sampled_at.strftime("%Y-%m-%d")
+
+
+def parse_samples(live_data: Any, received_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Normalize a live_streaming payload into point dicts.
+    Accepts one sample dict, a list of them, or {"samples": [...]}.
+    """
+    received_at = received_at or datetime.utcnow()
+    if isinstance(live_data, dict) and isinstance(live_data.get("samples"), list):
+        raw = live_data["samples"]
+    elif isinstance(live_data, list):
+        raw = live_data
+    else:
+        raw = [live_data]
+
+    samples = []
+    for item in raw:
+        if not isinstance(item, dict):
+            continue
+        point = {
+            "viewers": _int_or_none(item.get("viewers")),
+            "likes": _int_or_none(item.get("likes")),
+            "total_sales": _int_or_none(item.get("totalSales", item.get("total_sales"))),
+            "revenue": _decimal_or_none(item.get("revenue")),
+        }
+        if all(value is None for value in point.values()):
+            continue
+        sampled_at = _parse_sampled_at(item.get("timestamp") or item.get("sampled_at"), received_at)
+        point.update({
+            "session_key": session_key_for(item, sampled_at),
+            "sampled_at": sampled_at,
+        })
+        samples.append(point)
+    return samples
+
+
+def merge_point(target: Dict[str, Any], source: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge two points of the same bucket, mirroring the upsert's SET clause:
+    counts add up, the peak is the max, other values come from the later sample.
+    """
+    source_is_newer = source["last_sample_at"] >= target["last_sample_at"]
+    target["sample_count"] += source["sample_count"]
+    if source["viewers_peak"] is not None and (
+        target["viewers_peak"] is None or source["viewers_peak"] > target["viewers_peak"]
+    ):
+        target["viewers_peak"] = source["viewers_peak"]
+    for field in LAST_VALUE_FIELDS:
+        if source[field] is not None and (target[field] is None or source_is_newer):
+            target[field] = source[field]
+    target["last_sample_at"] = max(target["last_sample_at"], source["last_sample_at"])
+    return target
+
+
+def _keep_newer(column, incoming, incoming_is_newer):
+    """SQL expression picking the incoming value when it is set and newer (or nothing is stored)"""
+    return case(
+        (incoming.is_(None), column),
+        (column.is_(None), incoming),
+        (incoming_is_newer, incoming),
+        else_=column
+    )
+
+
+def _point_key(point: Dict[str, Any]) -> Tuple[int, str, str, datetime]:
+    return (point["account_id"], point["session_key"], point["resolution"], point["bucket_start"])
+
+
+def _point_dict(point: LiveMetricPoint) -> Dict[str, Any]:
+    return {
+        "account_id": point.account_id,
+        "session_key": point.session_key,
+        "resolution": point.resolution,
+        "bucket_start": point.bucket_start,
+        "sample_count": point.sample_count or 0,
+        "viewers_peak": point.viewers_peak,
+        **{field: getattr(point, field) for field in LAST_VALUE_FIELDS},
+        "last_sample_at": point.last_sample_at,
+    }
+
+
+class LiveMetricsService:
+    """Write path, rollup and curve reads for live_metric_points"""
+
+    @staticmethod
+    def upsert_points(db: Session, points: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert points, merging into any stored point of the same bucket.
+        Points sharing a bucket are collapsed first (one VALUES row per key).
+        Does not commit.
+
+        Returns:
+            Number of buckets written
+        """
+        collapsed: Dict[Tuple[int, str, str, datetime], Dict[str, Any]] = {}
+        for point in points:
+            key = _point_key(point)
+            if key in collapsed:
+                merge_point(collapsed[key], dict(point))
+            else:
+                collapsed[key] = dict(point)
+        if not collapsed:
+            return 0
+
+        table = LiveMetricPoint.__table__
+        rows = list(collapsed.values())
+        for offset in range(0, len(rows), CHUNK_SIZE):
+            stmt = dialect_insert(db, table).values(rows[offset:offset + CHUNK_SIZE])
+            excluded = stmt.excluded
+            incoming_is_newer = excluded.last_sample_at >= table.c.last_sample_at
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["account_id", "session_key", "resolution", "bucket_start"],
+                set_={
+                    "sample_count": table.c.sample_count + excluded.sample_count,
+                    "viewers_peak": case(
+                        (excluded.viewers_peak.is_(None), table.c.viewers_peak),
+                        (table.c.viewers_peak.is_(None), excluded.viewers_peak),
+                        (excluded.viewers_peak > table.c.viewers_peak, excluded.viewers_peak),
+                        else_=table.c.viewers_peak
+                    ),
+                    **{
+                        field: _keep_newer(table.c[field], excluded[field], incoming_is_newer)
+                        for field in LAST_VALUE_FIELDS
+                    },
+                    "last_sample_at": case(
+                        (table.c.last_sample_at > excluded.last_sample_at, table.c.last_sample_at),
+                        else_=excluded.last_sample_at
+                    ),
+                }
+            )
+            db.execute(stmt)
+        return len(rows)
+
+    @staticmethod
+    def record_samples(db: Session, account_id: int, samples: List[Dict[str, Any]]) -> int:
+        """Append parsed samples as '1m' points. Does not commit."""
+        return LiveMetricsService.upsert_points(db, (
+            {
+                "account_id": account_id,
+                "session_key": sample["session_key"],
+                "resolution": "1m",
+                "bucket_start": _bucket_start(sample["sampled_at"], "1m"),
+                "sample_count": 1,
+                "viewers_peak": sample["viewers"],
+                "viewers": sample["viewers"],
+                "likes": sample["likes"],
+                "total_sales": sample["total_sales"],
+                "revenue": sample["revenue"],
+                "last_sample_at": sample["sampled_at"],
+            }
+            for sample in samples
+        ))
+
+    @staticmethod
+    def rollup(db: Session, now: Optional[datetime] = None, retention_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fold '1m' points older than the retention window into '15m' points
+        and delete them, one UTC day at a time with a commit per day.
+        """
+        now = now or datetime.utcnow()
+        days = retention_days if retention_days is not None else settings.live_metrics_minute_retention_days
+        cutoff = _bucket_start(now - timedelta(days=days), "15m")
+        result = {"cutoff": cutoff.isoformat(), "points_rolled_up": 0, "buckets_written": 0}
+
+        oldest = db.query(func.min(LiveMetricPoint.bucket_start)).filter(
+            LiveMetricPoint.resolution == "1m",
+            LiveMetricPoint.bucket_start < cutoff
+        ).scalar()
+        if oldest is None:
+            return result
+
+        day_start = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day_start < cutoff:
+            window = and_(
+                LiveMetricPoint.resolution == "1m",
+                LiveMetricPoint.bucket_start >= day_start,
+                LiveMetricPoint.bucket_start < min(day_start + timedelta(days=1), cutoff)
+            )
+            minute_points = db.query(LiveMetricPoint).filter(window).all()
+            written = LiveMetricsService.upsert_points(db, (
+                dict(_point_dict(point), resolution="15m", bucket_start=_bucket_start(point.bucket_start, "15m"))
+                for point in minute_points
+            ))
+            db.query(LiveMetricPoint).filter(window).delete(synchronize_session=False)
+            db.commit()
+
+            result["points_rolled_up"] += len(minute_points)
+            result["buckets_written"] += written
+            day_start += timedelta(days=1)
+
+        logger.info(f"[LiveMetrics] Rollup complete: {result}")
+        return result
+
+    @staticmethod
+    def list_sessions(db: Session, account_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        """Sessions with recorded metrics for an account, most recent first"""
+        rows = db.query(
+            LiveMetricPoint.session_key,
+            func.min(LiveMetricPoint.bucket_start),
+            func.max(LiveMetricPoint.last_sample_at),
+            func.max(LiveMetricPoint.viewers_peak),
+            func.sum(LiveMetricPoint.sample_count)
+        ).filter(
+            LiveMetricPoint.account_id == account_id
+        ).group_by(
+            LiveMetricPoint.session_key
+        ).order_by(
+            func.max(LiveMetricPoint.last_sample_at).desc()
+        ).limit(limit).all()
+
+        return [
+            {
+                "session_key": session_key,
+                "started_at": started_at.isoformat() if started_at else None,
+                "last_sample_at": last_sample_at.isoformat() if last_sample_at else None,
+                "viewers_peak": viewers_peak,
+                "samples": int(samples or 0),
+            }
+            for session_key, started_at, last_sample_at, viewers_peak, samples in rows
+        ]
+
+    @staticmethod
+    def get_curve(db: Session, account_id: int, session_key: str, resolution: str = "1m") -> Dict[str, Any]:
+        """
+        A session's metric curve as columnar arrays, one entry per bucket.
+        Stored points are downsampled on read when a coarser resolution is asked
+        for; already rolled-up ranges stay at 15 minutes.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        points = db.query(LiveMetricPoint).filter(
+            LiveMetricPoint.account_id == account_id,
+            LiveMetricPoint.session_key == session_key
+        ).order_by(LiveMetricPoint.bucket_start).all()
+
+        buckets: Dict[datetime, Dict[str, Any]] = {}
+        for point in points:
+            start = point.bucket_start
+            if RESOLUTIONS[resolution] > RESOLUTIONS[point.resolution]:
+                start = _bucket_start(start, resolution)
+            if start in buckets:
+                merge_point(buckets[start], _point_dict(point))
+            else:
+                buckets[start] = _point_dict(point)
+
+        ordered = sorted(buckets.items())
+        return {
+            "account_id": account_id,
+            "session_key": session_key,
+            "resolution": resolution,
+            "t": [start.isoformat() for start, _ in ordered],
+            "samples": [b["sample_count"] for _, b in ordered],
+            "viewers": [b["viewers"] for _, b in ordered],
+            "viewers_peak": [b["viewers_peak"] for _, b in ordered],
+            "likes": [b["likes"] for _, b in ordered],
+            "total_sales": [b["total_sales"] for _, b in ordered],
+            "revenue": [float(b["revenue"]) if b["revenue"] is not None else None for _, b in ordered],
+        }
+
+
+def _run_once() -> None:
+    """Run one rollup pass with its own session (executed in a worker thread)"""
+    db = SessionLocal()
+    try:
+        LiveMetricsService.rollup(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[LiveMetrics] Rollup failed: {e}")
+    finally:
+        db.close()
+
+
+async def rollup_loop(interval_minutes: int) -> None:
+    """Background task: fold old minute points every `interval_minutes`"""
+    while True:
+        await asyncio.to_thread(_run_once)
+        await asyncio.sleep(interval_minutes * 60)
@@ -0,0 +1,171 @@
+"""
+Order Upsert Service
+Set-based insert/update of orders keyed by Shopee order_id
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Sequence
+from datetime import datetime
+from decimal import Decimal
+import logging
+
+from app.database import dialect_insert
+from app.models.order import Order
+from app.services.payout_summary import PayoutSummaryService
+
+logger = logging.getLogger(__name__)
+
+# Rows per IN (...) lookup and per multi-row INSERT
+CHUNK_SIZE = 500
+
+# Applied to new orders when the caller leaves a column as None
+INSERT_DEFAULTS = {
+    "total_amount": 0,
+    "commission_amount": 0,
+    "status": "completed",
+    "payout_status": "pending",
+}
+
+# NOT NULL columns every VALUES row must carry, even for rows that end up updating
+_REQUIRED_COLUMNS = ("shopee_account_id", "total_amount", "date")
+
+
+def _chunks(items: Sequence, size: int = CHUNK_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _uniform(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Multi-row VALUES need the same keys on every row"""
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    return [{c: row.get(c) for c in columns} for row in rows]
+
+
+def _differs(current: Any, incoming: Any) -> bool:
+    """Compare a stored value with an incoming one (Numeric columns come back as Decimal)"""
+    if isinstance(current, Decimal) and incoming is not None:
+        try:
+            return current != Decimal(str(incoming))
+        except Exception:
+            return True
+    return current != incoming
+
+
+class OrderUpsertService:
+    """Bulk upsert for the orders table shared by every sync and import path"""
+
+    @staticmethod
+    def bulk_upsert(
+        db: Session,
+        rows: List[Dict[str, Any]],
+        update_columns: Sequence[str]
+    ) -> Dict[str, Any]:
+        """
+        Insert new orders and update existing ones in a few statements.
+
+        Each row is a dict of Order columns and must contain `order_id`.
+        A None value means "not provided": new orders get INSERT_DEFAULTS,
+        existing orders keep their stored value. Only `update_columns` are
+        ever written to existing orders. Repeated order_ids in one payload
+        are merged, later non-None values winning.
+
+        Existing orders are read with one IN query per chunk. New orders are
+        written with INSERT ... ON CONFLICT (order_id) DO NOTHING; ids another
+        transaction inserted since the read go through the update path again,
+        so their stored values are never replaced by INSERT_DEFAULTS. Existing
+        orders are written with INSERT ... ON CONFLICT (order_id) DO UPDATE.
+        Both use multi-row VALUES. The payout rollup is refreshed for the
+        written rows' (account, day) cells. Does not commit.
+
+        Returns:
+            {"inserted", "updated", "unchanged", "rejected": [order_id, ...]}
+            where rejected are new orders missing a date.
+        """
+        result = {"inserted": 0, "updated": 0, "unchanged": 0, "rejected": []}
+
+        incoming: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            order_id = str(row["order_id"])
+            merged = incoming.setdefault(order_id, {})
+            merged.update({k: v for k, v in row.items() if v is not None or k not in merged})
+            merged["order_id"] = order_id
+        if not incoming:
+            return result
+
+        read_columns = list(dict.fromkeys([*_REQUIRED_COLUMNS, *update_columns]))
+        existing: Dict[str, Dict[str, Any]] = {}
+        for chunk in _chunks(list(incoming)):
+            query = db.query(Order.order_id, *[getattr(Order, c) for c in read_columns])
+            for found in query.filter(Order.order_id.in_(chunk)):
+                existing[found[0]] = dict(zip(read_columns, found[1:]))
+
+        now = datetime.utcnow()
+        values: List[Dict[str, Any]] = []
+        for order_id, row in incoming.items():
+            current = existing.get(order_id)
+            if current is None:
+                if row.get("date") is None:
+                    result["rejected"].append(order_id)
+                    continue
+                values.append({
+                    **row,
+                    **{k: v for k, v in INSERT_DEFAULTS.items() if row.get(k) is None},
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                result["inserted"] += 1
+                continue
+
+            changes = {
+                column: row[column]
+                for column in update_columns
+                if row.get(column) is not None and _differs(current[column], row[column])
+            }
+            if not changes:
+                result["unchanged"] += 1
+                continue
+            values.append({**row, **current, **changes, "updated_at": now})
+            result["updated"] += 1
+
+        if not values:
+            return result
+
+        table = Order.__table__
+        written: List[Dict[str, Any]] = []
+        raced: List[str] = []  # New here, but inserted by another transaction meanwhile
+        for chunk in _chunks([v for v in values if v["order_id"] not in existing]):
+            stmt = dialect_insert(db, table).values(_uniform(chunk))
+            stmt = stmt.on_conflict_do_nothing(index_elements=["order_id"]).returning(table.c.order_id)
+            inserted_ids = set(db.execute(stmt).scalars())
+            for value in chunk:
+                if value["order_id"] in inserted_ids:
+                    written.append(value)
+                else:
+                    raced.append(value["order_id"])
+
+        for chunk in _chunks([v for v in values if v["order_id"] in existing]):
+            stmt = dialect_insert(db, table).values(_uniform(chunk))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["order_id"],
+                set_={
+                    **{c: getattr(stmt.excluded, c) for c in update_columns},
+                    "updated_at": stmt.excluded.updated_at,
+                }
+            )
+            db.execute(stmt)
+            written.extend(chunk)
+
+        # Keep the payout rollup in step; updates never move an order's account or date
+        PayoutSummaryService.refresh(db, ((v["shopee_account_id"], v["date"]) for v in written))
+
+        if raced:
+            result["inserted"] -= len(raced)
+            retried = OrderUpsertService.bulk_upsert(db, [incoming[order_id] for order_id in raced], update_columns)
+            for key in ("inserted", "updated", "unchanged"):
+                result[key] += retried[key]
+            result["rejected"] += retried["rejected"]
+
+        logger.info(
+            f"[OrderUpsert] inserted={result['inserted']}, updated={result['updated']}, "
+            f"unchanged={result['unchanged']}, rejected={len(result['rejected'])}, raced={len(raced)}"
+        )
+        return result
@@ -0,0 +1,323 @@
+"""
+Payout Batch Service
+Set-based bulk mark-paid.
+
+Order ids are marked paid `chunk_size` at a time with one
+UPDATE ... WHERE order_id IN (...) AND payout_status <> 'paid' per chunk, so a
+20k-id payout is a few dozen statements instead of 20k ORM updates. Large
+batches (or uploaded id files) run as background jobs that commit per chunk
+and report progress; every batch writes a single activity log entry. Inline
+requests queue it on the audit log buffer once their transaction commits
+(record_mark_paid); background batches add it in their final transaction.
+"""
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import csv
+import io
+import logging
+import time
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.activity_log import ActivityLog
+from app.models.order import Order
+from app.models.payout_batch import PayoutBatch
+from app.services.audit_log import audit_log
+from app.services.payout_summary import PayoutSummaryService
+
+logger = logging.getLogger(__name__)
+
+ORDER_ID_HEADERS = {"order_id", "order id", "orderid"}
+MAX_CHUNK_STATS = 200  # Most recent per-chunk entries kept on the batch
+
+
+def dedupe_ids(order_ids: Iterable[str]) -> List[str]:
+    """Stripped, non-empty ids in first-seen order"""
+    return list(dict.fromkeys(s for s in (str(i).strip() for i in order_ids) if s))
+
+
+def parse_order_ids(source: BinaryIO) -> List[str]:
+    """
+    Order ids from an uploaded CSV or plain list (one id per line).
+    Uses the "Order ID"/"order_id" column when the first row names one
+    (so payout exports can be fed back), otherwise the first column.
+    """
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        first = next(reader, None)
+        if first is None:
+            return []
+        names = [cell.strip().lower() for cell in first]
+        column = next((i for i, name in enumerate(names) if name in ORDER_ID_HEADERS), None)
+        rows: Iterable[List[str]] = reader
+        if column is None:
+            column = 0
+            rows = _prepend(first, reader)
+        return dedupe_ids(row[column] for row in rows if len(row) > column)
+    finally:
+        text.detach()
+
+
+def _prepend(first: List[str], rows: Iterable[List[str]]) -> Iterable[List[str]]:
+    yield first
+    yield from rows
+
+
+def mark_paid_chunk(db: Session, order_ids: List[str], payment_method: str, now: datetime) -> Tuple[int, int]:
+    """
+    Mark one chunk of order ids paid and refresh the payout rollup for them.
+    Does not commit.
+
+    Returns:
+        (matched, updated): ids that exist as orders, orders newly marked paid
+    """
+    table = Order.__table__
+    spans = db.execute(
+        select(
+            table.c.shopee_account_id,
+            func.min(table.c.date),
+            func.max(table.c.date),
+            func.count()
+        ).where(table.c.order_id.in_(order_ids)).group_by(table.c.shopee_account_id)
+    ).all()
+    matched = sum(count for *_, count in spans)
+    if not matched:
+        return (0, 0)
+
+    result = db.execute(
+        update(table).where(
+            table.c.order_id.in_(order_ids),
+            or_(table.c.payout_status != 'paid', table.c.payout_status.is_(None))
+        ).values(payout_status='paid', paid_at=now, payment_method=payment_method, updated_at=now)
+    )
+    if result.rowcount:
+        PayoutSummaryService.refresh(db, (
+            key for account_id, low, high, _ in spans for key in ((account_id, low), (account_id, high))
+        ))
+    return (matched, result.rowcount)
+
+
+def _chunks(order_ids: List[str], chunk_size: int, start_chunk: int = 0) -> Iterable[Tuple[int, List[str]]]:
+    for chunk in range(start_chunk, (len(order_ids) + chunk_size - 1) // chunk_size):
+        yield chunk, order_ids[chunk * chunk_size:(chunk + 1) * chunk_size]
+
+
+def _audit(db: Session, user_id: Optional[int], details: Dict[str, Any], batch_id: int) -> None:
+    db.add(ActivityLog(
+        user_id=user_id,
+        action="mark_paid",
+        entity_type="payout_batch",
+        entity_id=batch_id,
+        new_value=details
+    ))
+
+
+def record_mark_paid(result: Dict[str, Any], payment_method: str,
+                     user_id: Optional[int] = None, ip_address: Optional[str] = None) -> None:
+    """Audit an inline mark_paid() after its transaction committed (buffered, never blocks)"""
+    if not result["updated"]:
+        return
+    audit_log.record(
+        user_id=user_id,
+        action="mark_paid",
+        entity_type="payout_batch",
+        new_value={
+            "payment_method": payment_method,
+            **{key: result[key] for key in ("total_ids", "matched", "updated")},
+        },
+        ip_address=ip_address
+    )
+
+
+class PayoutBatchService:
+    """Bulk mark-paid, inline or as a background batch"""
+
+    @staticmethod
+    def mark_paid(
+        db: Session,
+        order_ids: List[str],
+        payment_method: str,
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Mark ids paid in chunked UPDATEs within the caller's transaction.
+        Does not commit; audit with record_mark_paid() once committed.
+        """
+        chunk_size = chunk_size or settings.payout_batch_chunk_ids
+        order_ids = dedupe_ids(order_ids)
+        now = datetime.utcnow()
+        chunks = []
+        for chunk, ids in _chunks(order_ids, chunk_size):
+            matched, updated = mark_paid_chunk(db, ids, payment_method, now)
+            chunks.append({"chunk": chunk, "ids": len(ids), "matched": matched, "updated": updated})
+
+        result = {
+            "total_ids": len(order_ids),
+            "matched": sum(c["matched"] for c in chunks),
+            "updated": sum(c["updated"] for c in chunks),
+            "chunks": chunks,
+        }
+        return result
+
+    @staticmethod
+    def create(
+        db: Session,
+        order_ids: List[str],
+        user_id: Optional[int],
+        payment_method: str,
+        source: str = "ids",
+        filename: Optional[str] = None,
+        chunk_size: Optional[int] = None
+    ) -> PayoutBatch:
+        """Record a queued batch (committed); ValueError when there are no ids"""
+        order_ids = dedupe_ids(order_ids)
+        if not order_ids:
+            raise ValueError("No order ids given")
+
+        batch = PayoutBatch(
+            user_id=user_id,
+            payment_method=payment_method,
+            source=source,
+            filename=filename,
+            order_ids=order_ids,
+            status="queued",
+            chunk_size=chunk_size or settings.payout_batch_chunk_ids,
+            total_ids=len(order_ids),
+            chunk_stats=[],
+        )
+        db.add(batch)
+        db.commit()
+        db.refresh(batch)
+        return batch
+
+    @staticmethod
+    def claim(db: Session, batch_id: int, now: Optional[datetime] = None) -> bool:
+        """
+        Atomically mark a batch running for this worker: queued batches, and
+        running ones whose worker went silent for the stale window.
+        """
+        now = now or datetime.utcnow()
+        stale_before = now - timedelta(minutes=settings.import_job_stale_minutes)
+        table = PayoutBatch.__table__
+        result = db.execute(
+            update(table).where(
+                table.c.id == batch_id,
+                or_(
+                    table.c.status == "queued",
+                    and_(table.c.status == "running", table.c.updated_at < stale_before)
+                )
+            ).values(status="running", updated_at=now)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def claimable_ids(db: Session, now: Optional[datetime] = None) -> List[int]:
+        """Queued batches and running batches without progress for the stale window"""
+        now = now or datetime.utcnow()
+        stale_before = now - timedelta(minutes=settings.import_job_stale_minutes)
+        rows = db.query(PayoutBatch.id).filter(or_(
+            PayoutBatch.status == "queued",
+            and_(PayoutBatch.status == "running", PayoutBatch.updated_at < stale_before)
+        )).order_by(PayoutBatch.id).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def run(db: Session, batch: PayoutBatch) -> PayoutBatch:
+        """
+        Mark the remaining chunks of a claimed batch paid.
+        Each chunk's UPDATE, rollup refresh and the batch counters commit together.
+        """
+        if batch.started_at is None:
+            batch.started_at = datetime.utcnow()
+            db.commit()
+
+        try:
+            for chunk, ids in _chunks(batch.order_ids, batch.chunk_size, batch.chunks_done or 0):
+                started = time.perf_counter()
+                matched, updated = mark_paid_chunk(db, ids, batch.payment_method, datetime.utcnow())
+
+                batch.chunks_done = chunk + 1
+                batch.ids_processed = (batch.ids_processed or 0) + len(ids)
+                batch.matched = (batch.matched or 0) + matched
+                batch.updated = (batch.updated or 0) + updated
+                batch.chunk_stats = (list(batch.chunk_stats or []) + [{
+                    "chunk": chunk,
+                    "ids": len(ids),
+                    "matched": matched,
+                    "updated": updated,
+                    "ms": int((time.perf_counter() - started) * 1000),
+                }])[-MAX_CHUNK_STATS:]
+                batch.updated_at = datetime.utcnow()
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            batch.status = "failed"
+            batch.error_message = str(e)[:1000]
+            batch.updated_at = datetime.utcnow()
+            db.commit()
+            logger.error(f"[PayoutBatch] Batch {batch.id} failed at chunk {batch.chunks_done}: {e}")
+            return batch
+
+        batch.status = "completed"
+        batch.finished_at = batch.updated_at = datetime.utcnow()
+        _audit(db, batch.user_id, {
+            "payment_method": batch.payment_method,
+            "source": batch.source,
+            "filename": batch.filename,
+            "total_ids": batch.total_ids,
+            "matched": batch.matched,
+            "updated": batch.updated,
+        }, batch_id=batch.id)
+        db.commit()
+        logger.info(f"[PayoutBatch] Batch {batch.id} completed: {batch.updated}/{batch.total_ids} marked paid")
+        return batch
+
+    @staticmethod
+    def requeue(db: Session, batch: PayoutBatch) -> PayoutBatch:
+        """Queue a failed batch again; it resumes after its last committed chunk"""
+        if batch.status != "failed":
+            raise ValueError(f"Only failed batches can be resumed (status: {batch.status})")
+        batch.status = "queued"
+        batch.error_message = None
+        batch.updated_at = datetime.utcnow()
+        db.commit()
+        return batch
+
+
+def run_payout_batch(batch_id: int) -> None:
+    """Claim and run one batch with its own session (executed in a worker thread)"""
+    db = SessionLocal()
+    try:
+        if not PayoutBatchService.claim(db, batch_id):
+            return
+        batch = db.get(PayoutBatch, batch_id)
+        PayoutBatchService.run(db, batch)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[PayoutBatch] Batch {batch_id} could not run: {e}")
+    finally:
+        db.close()
+
+
+def _claimable_ids() -> List[int]:
+    db = SessionLocal()
+    try:
+        return PayoutBatchService.claimable_ids(db)
+    finally:
+        db.close()
+
+
+async def payout_batch_resume_loop(interval_seconds: int = 60) -> None:
+    """Background task: pick up queued batches and resume ones abandoned by a dead worker"""
+    while True:
+        try:
+            for batch_id in await asyncio.to_thread(_claimable_ids):
+                await asyncio.to_thread(run_payout_batch, batch_id)
+        except Exception as e:
+            logger.error(f"[PayoutBatch] Resume pass failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,179 @@
+"""
+Payout Export Service
+Streams payout history as CSV, gzipped CSV or Parquet.
+
+Rows are read as projected tuples (account name joined in SQL) through a
+server-side cursor, and output is yielded a chunk at a time, so exporting a
+year of payouts keeps memory flat and the first bytes go out immediately.
+"""
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import func
+from typing import Iterable, Iterator, Optional, Tuple
+from datetime import date
+import csv
+import io
+import zlib
+
+from app.models.order import Order
+from app.models.shopee_account import ShopeeAccount
+from app.models.user import User
+from app.core.permissions import apply_scope_restriction
+from app.services.payout_history import date_range_filter
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+HEADER = ['Order ID', 'Date', 'Account', 'Commission (Rp)', 'Status', 'Payment Method', 'Paid At']
+FETCH_ROWS = 2000  # Rows per server-side cursor fetch
+CSV_CHUNK_ROWS = 1000  # Rows per yielded CSV chunk
+
+
+def payout_export_query(
+    db: Session,
+    user: User,
+    from_date: date,
+    to_date: date,
+    status: Optional[str] = None,
+    account_id: Optional[int] = None
+) -> Query:
+    """Projected, scope-restricted payout rows, newest first"""
+    query = db.query(
+        Order.order_id,
+        Order.date,
+        func.coalesce(ShopeeAccount.account_name, '-'),
+        Order.commission_amount,
+        Order.payout_status,
+        Order.payment_method,
+        Order.paid_at
+    ).join(
+        ShopeeAccount, Order.shopee_account_id == ShopeeAccount.id
+    ).filter(date_range_filter(from_date, to_date))
+
+    query = apply_scope_restriction(query, user, Order)
+    if account_id:
+        query = query.filter(Order.shopee_account_id == account_id)
+    if status and status != 'all':
+        query = query.filter(Order.payout_status == status)
+
+    return query.order_by(Order.date.desc()).execution_options(yield_per=FETCH_ROWS)
+
+
+def _format_row(row: Tuple) -> list:
+    order_id, order_date, account_name, commission, payout_status, payment_method, paid_at = row
+    return [
+        order_id,
+        order_date.strftime('%Y-%m-%d %H:%M'),
+        account_name,
+        f"{float(commission or 0):.2f}",
+        (payout_status or 'pending').upper(),
+        payment_method or '-',
+        paid_at.strftime('%Y-%m-%d %H:%M') if paid_at else '-'
+    ]
+
+
+def iter_csv(rows: Iterable[Tuple], chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """UTF-8 CSV, yielded every `chunk_rows` rows (the header goes out first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _drain() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(HEADER)
+    yield _drain()
+
+    pending = 0
+    for row in rows:
+        writer.writerow(_format_row(row))
+        pending += 1
+        if pending == chunk_rows:
+            yield _drain()
+            pending = 0
+    if pending:
+        yield _drain()
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a byte stream incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents are handed out and cleared after each row group"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def iter_parquet(rows: Iterable[Tuple], row_group_rows: int = 50000) -> Iterator[bytes]:
+    """
+    Parquet with typed columns, one row group per `row_group_rows` rows.
+    Requires pyarrow (imported lazily; raises ImportError when missing).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("order_id", pa.string()),
+        ("date", pa.timestamp("us")),
+        ("account", pa.string()),
+        ("commission", pa.float64()),
+        ("status", pa.string()),
+        ("payment_method", pa.string()),
+        ("paid_at", pa.timestamp("us")),
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+
+    def _write(batch: list) -> None:
+        columns = list(zip(*batch))
+        columns[3] = [float(value) if value is not None else None for value in columns[3]]
+        writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(tuple(row))
+        if len(batch) == row_group_rows:
+            _write(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        _write(batch)
+    writer.close()
+    yield sink.drain()
+
+
+def stream_payouts(query: Query, export_format: str) -> Iterator[bytes]:
+    """Encode the query's rows in `export_format` (a key of EXPORT_FORMATS)"""
+    rows = iter(query)
+    if export_format == "parquet":
+        return iter_parquet(rows)
+    chunks = iter_csv(rows)
+    return iter_gzip(chunks) if export_format == "csv.gz" else chunks
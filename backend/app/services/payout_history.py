@@ -0,0 +1,137 @@
+"""
+Payout History Service
+Keyset-paginated payout rows for the commissions page.
+
+Pages are ordered by (date, id) descending and continue from an opaque
+cursor, so every order in a range is reachable and deep pages cost the same
+as the first. Account names are joined in SQL; search is an order_id prefix
+match (index-friendly) or a match on the handful of account names.
+"""
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+import base64
+import json
+
+from app.models.order import Order
+from app.models.shopee_account import ShopeeAccount
+from app.models.user import User
+from app.core.permissions import apply_scope_restriction
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(order_date: datetime, order_pk: int) -> str:
+    raw = json.dumps([order_date.isoformat(), order_pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(date, id) of the last row of the previous page; ValueError when malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_date, order_pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(order_date), int(order_pk)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def date_range_filter(from_date: date, to_date: date):
+    """
+    Completed orders dated within [from_date, to_date].
+    A half-open range on the raw column instead of DATE(orders.date), so the
+    (date, id) index applies.
+    """
+    return and_(
+        Order.date >= datetime.combine(from_date, time.min),
+        Order.date < datetime.combine(to_date + timedelta(days=1), time.min),
+        Order.status == 'completed'
+    )
+
+
+class PayoutHistoryService:
+    """Paged payout history reads"""
+
+    @staticmethod
+    def page(
+        db: Session,
+        user: User,
+        from_date: date,
+        to_date: date,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        account_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of payout rows, newest first.
+
+        Returns:
+            (rows, next_cursor) where next_cursor is None on the last page
+        """
+        query = db.query(
+            Order.id,
+            Order.order_id,
+            Order.shopee_account_id,
+            ShopeeAccount.account_name,
+            Order.commission_amount,
+            Order.payout_status,
+            Order.payment_method,
+            Order.validated_at,
+            Order.paid_at,
+            Order.date
+        ).join(
+            ShopeeAccount, Order.shopee_account_id == ShopeeAccount.id
+        ).filter(date_range_filter(from_date, to_date))
+
+        query = apply_scope_restriction(query, user, Order)
+        if account_id:
+            query = query.filter(Order.shopee_account_id == account_id)
+        if status and status != 'all':
+            query = query.filter(Order.payout_status == status)
+
+        term = (search or "").strip()
+        if term:
+            pattern = escape_like(term)
+            # Accounts are few: resolve name matches first instead of ILIKE-ing every order row
+            account_ids = [row[0] for row in db.query(ShopeeAccount.id).filter(
+                ShopeeAccount.account_name.ilike(f"%{pattern}%", escape="\\")
+            )]
+            conditions = [Order.order_id.like(f"{pattern}%", escape="\\")]
+            if account_ids:
+                conditions.append(Order.shopee_account_id.in_(account_ids))
+            query = query.filter(or_(*conditions))
+
+        if cursor:
+            after_date, after_pk = decode_cursor(cursor)
+            query = query.filter(tuple_(Order.date, Order.id) < tuple_(after_date, after_pk))
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        found = query.order_by(Order.date.desc(), Order.id.desc()).limit(limit + 1).all()
+        rows = [
+            {
+                "order_id": row.order_id or f"ORDER-{row.id}",
+                "account_id": row.shopee_account_id,
+                "account_name": row.account_name or "Unknown",
+                "commission_amount": float(row.commission_amount or 0),
+                "payout_status": row.payout_status or 'pending',
+                "payment_method": row.payment_method,
+                "validated_at": row.validated_at,
+                "completed_at": row.date,  # Using order date as completion date for now
+                "paid_at": row.paid_at,
+                "date": row.date,
+            }
+            for row in found[:limit]
+        ]
+        next_cursor = None
+        if len(found) > limit:
+            last = found[limit - 1]
+            next_cursor = encode_cursor(last.date, last.id)
+        return rows, next_cursor
@@ -0,0 +1,136 @@
+"""
+Payout Summary Service
+Maintains payout_daily_summary, the (account, day, payout status) rollup of
+completed orders behind the payout summary cards, row counts and sales
+reports.
+
+Writers report the (account, order date) cells they touched; each account's
+touched day range is recomputed from orders with one DELETE and one
+INSERT ... SELECT, so the rollup cannot drift from the orders it summarizes.
+Cached sales reports overlapping a refreshed range are dropped in the same
+transaction.
+
+Concurrent refreshes of one account (two syncs, a sync during an import or
+mark-paid) are serialized: on Postgres each refresh takes a transaction-level
+advisory lock per account before its DELETE, so the second one waits for the
+first to commit and then sees its rows instead of colliding with them on the
+primary key. SQLite serializes writers on its own.
+"""
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from app.models.order import Order
+from app.models.payout_summary import PayoutDailySummary
+from app.services.sales_report import invalidate_report_cache
+
+PAYOUT_STATUSES = ("paid", "pending", "validating")
+REFRESH_LOCK_CLASS = 41  # First key of pg_advisory_xact_lock(class, account_id)
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _aggregate_select(*filters):
+    day = func.date(Order.date)
+    return select(
+        Order.shopee_account_id,
+        day,
+        func.coalesce(Order.payout_status, 'pending'),
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.total_amount), 0),
+        func.coalesce(func.sum(Order.commission_amount), 0)
+    ).where(
+        Order.status == 'completed',
+        *filters
+    ).group_by(
+        Order.shopee_account_id, day, func.coalesce(Order.payout_status, 'pending')
+    )
+
+
+def _lock_accounts(db: Session, account_ids: Iterable[int]) -> None:
+    """Hold each account's refresh lock until the transaction ends (Postgres only)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for account_id in sorted(account_ids):  # One order everywhere, so waits cannot deadlock
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_class, :account_id)"),
+            {"lock_class": REFRESH_LOCK_CLASS, "account_id": account_id}
+        )
+
+
+_COLUMNS = ["shopee_account_id", "day", "payout_status", "order_count", "gmv_total", "commission_total"]
+
+
+class PayoutSummaryService:
+    """Refresh and read the payout rollup"""
+
+    @staticmethod
+    def refresh(db: Session, keys: Iterable[Tuple[int, object]]) -> int:
+        """
+        Recompute the rollup for (account_id, date or datetime) cells.
+        Does not commit.
+
+        Returns:
+            Number of accounts refreshed
+        """
+        ranges: Dict[int, Tuple[date, date]] = {}
+        for account_id, when in keys:
+            if account_id is None or when is None:
+                continue
+            day = _as_date(when)
+            low, high = ranges.get(account_id, (day, day))
+            ranges[account_id] = (min(low, day), max(high, day))
+
+        table = PayoutDailySummary.__table__
+        _lock_accounts(db, ranges)
+        for account_id, (low, high) in ranges.items():
+            db.query(PayoutDailySummary).filter(
+                PayoutDailySummary.shopee_account_id == account_id,
+                PayoutDailySummary.day >= low,
+                PayoutDailySummary.day <= high
+            ).delete(synchronize_session=False)
+            db.execute(insert(table).from_select(_COLUMNS, _aggregate_select(
+                Order.shopee_account_id == account_id,
+                Order.date >= datetime.combine(low, time.min),
+                Order.date < datetime.combine(high + timedelta(days=1), time.min)
+            )))
+            invalidate_report_cache(db, account_id, low, high)
+        return len(ranges)
+
+    @staticmethod
+    def rebuild(db: Session) -> None:
+        """Recompute the whole rollup from orders. Does not commit."""
+        db.query(PayoutDailySummary).delete(synchronize_session=False)
+        db.execute(insert(PayoutDailySummary.__table__).from_select(_COLUMNS, _aggregate_select()))
+        invalidate_report_cache(db)
+
+    @staticmethod
+    def summarize(
+        db: Session,
+        from_date: date,
+        to_date: date,
+        account_id: Optional[int] = None
+    ) -> Dict[str, Dict[str, object]]:
+        """
+        {payout_status: {"count", "total"}} for completed orders in [from_date, to_date].
+        Statuses without orders are reported as zero.
+        """
+        query = db.query(
+            PayoutDailySummary.payout_status,
+            func.sum(PayoutDailySummary.order_count),
+            func.sum(PayoutDailySummary.commission_total)
+        ).filter(
+            PayoutDailySummary.day >= from_date,
+            PayoutDailySummary.day <= to_date
+        )
+        if account_id:
+            query = query.filter(PayoutDailySummary.shopee_account_id == account_id)
+
+        result = {status: {"count": 0, "total": Decimal("0")} for status in PAYOUT_STATUSES}
+        for status, count, total in query.group_by(PayoutDailySummary.payout_status):
+            result[status] = {"count": int(count or 0), "total": Decimal(str(total or 0))}
+        return result
@@ -0,0 +1,194 @@
+"""
+Realtime Snapshot Service Layer
+Handles snapshot persistence for the 24H Playwright Bot
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import hashlib
+import logging
+
+from app.database import dialect_insert
+from app.models.realtime_snapshot import RealtimeSnapshot, RealtimeSnapshotLatest
+from app.schemas.realtime_snapshot import SnapshotType, SNAPSHOT_METRIC_FIELDS
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = (
+    "orders_ready_to_ship", "pending_orders", "total_orders_today",
+    "spend_today", "budget_available", "coins",
+)
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """Coerce a scraped metric to a number; None when it is missing or not numeric"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        cleaned = value.strip().replace(",", "")
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+    return None
+
+
+def compute_dedup_key(
+    shopee_account_id: str,
+    snapshot_type: str,
+    scraped_at: datetime,
+    client_snapshot_id: Optional[str] = None
+) -> str:
+    """
+    Idempotency key for a snapshot: the client-supplied id when given,
+    otherwise (account, type, scraped_at). Hashed to a fixed 64 chars.
+    """
+    if client_snapshot_id:
+        source = f"client|{client_snapshot_id}"
+    else:
+        source = f"{shopee_account_id}|{snapshot_type}|{scraped_at.isoformat()}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class RealtimeSnapshotService:
+    """Service for realtime snapshot ingest and latest-state reads"""
+
+    @staticmethod
+    def extract_metrics(snapshot_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pull the known hot metrics for a snapshot type out of its JSON payload.
+
+        Returns:
+            {column: value} for every metric column (None when absent)
+        """
+        metrics = dict.fromkeys(METRIC_COLUMNS)
+        fields = SNAPSHOT_METRIC_FIELDS.get(SnapshotType(snapshot_type), ())
+        for field in fields:
+            value = _to_number((data or {}).get(field))
+            if value is not None and field in ("orders_ready_to_ship", "pending_orders", "total_orders_today"):
+                value = int(value)
+            metrics[field] = value
+        return metrics
+
+    @staticmethod
+    def build_snapshot(
+        shopee_account_id: str,
+        shop_name: Optional[str],
+        snapshot_type: str,
+        data: Dict[str, Any],
+        scraped_at: datetime,
+        client_snapshot_id: Optional[str] = None
+    ) -> RealtimeSnapshot:
+        """Create a (transient) RealtimeSnapshot with metric columns and dedup key filled"""
+        if scraped_at.tzinfo is not None:
+            # Columns are naive UTC, like every datetime.utcnow() comparison in the app
+            scraped_at = scraped_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return RealtimeSnapshot(
+            shopee_account_id=shopee_account_id,
+            shop_name=shop_name,
+            snapshot_type=snapshot_type,
+            data=data,
+            scraped_at=scraped_at,
+            dedup_key=compute_dedup_key(shopee_account_id, snapshot_type, scraped_at, client_snapshot_id),
+            **RealtimeSnapshotService.extract_metrics(snapshot_type, data)
+        )
+
+    @staticmethod
+    def insert_snapshots(db: Session, snapshots: List[RealtimeSnapshot]) -> Tuple[List[RealtimeSnapshot], int]:
+        """
+        Insert snapshots in one INSERT ... ON CONFLICT DO NOTHING statement.
+
+        Rows whose dedup_key already exists (a retried upload) are skipped,
+        as are repeats within the same batch. Inserted objects get their ids.
+
+        Returns:
+            (inserted snapshots, number deduplicated)
+        """
+        unique: Dict[str, RealtimeSnapshot] = {}
+        for snap in snapshots:
+            unique.setdefault(snap.dedup_key, snap)
+        if not unique:
+            return ([], 0)
+
+        table = RealtimeSnapshot.__table__
+        columns = [c.name for c in table.columns if c.name not in ("id", "created_at")]
+        now = datetime.utcnow()
+        stmt = dialect_insert(db, table).values([
+            {**{name: getattr(snap, name) for name in columns}, "created_at": now}
+            for snap in unique.values()
+        ]).on_conflict_do_nothing().returning(table.c.id, table.c.dedup_key)
+
+        inserted = []
+        for snapshot_id, dedup_key in db.execute(stmt):
+            snap = unique[dedup_key]
+            snap.id = snapshot_id
+            snap.created_at = now
+            inserted.append(snap)
+
+        return (inserted, len(snapshots) - len(inserted))
+
+    @staticmethod
+    def find_by_dedup_key(db: Session, dedup_key: str) -> Optional[int]:
+        """Id of the stored snapshot with this dedup key"""
+        return db.query(RealtimeSnapshot.id).filter(RealtimeSnapshot.dedup_key == dedup_key).scalar()
+
+    @staticmethod
+    def upsert_latest(db: Session, snapshots: List[RealtimeSnapshot]) -> int:
+        """
+        Mirror the newest of the given (flushed) snapshots into realtime_snapshot_latest.
+
+        Rows are collapsed per (account, type) first so one statement never
+        touches the same key twice. An existing row is only replaced when the
+        incoming scraped_at is not older, so late retries cannot roll back state.
+
+        Returns:
+            Number of (account, type) keys written
+        """
+        newest = {}
+        for snap in snapshots:
+            key = (snap.shopee_account_id, snap.snapshot_type)
+            current = newest.get(key)
+            if current is None or (snap.scraped_at, snap.id) >= (current.scraped_at, current.id):
+                newest[key] = snap
+
+        if not newest:
+            return 0
+
+        now = datetime.utcnow()
+        stmt = dialect_insert(db, RealtimeSnapshotLatest.__table__).values([
+            {
+                "shopee_account_id": snap.shopee_account_id,
+                "snapshot_type": snap.snapshot_type,
+                "snapshot_id": snap.id,
+                "shop_name": snap.shop_name,
+                "data": snap.data,
+                "scraped_at": snap.scraped_at,
+                "updated_at": now,
+                **{column: getattr(snap, column) for column in METRIC_COLUMNS},
+            }
+            for snap in newest.values()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["shopee_account_id", "snapshot_type"],
+            set_={
+                "snapshot_id": stmt.excluded.snapshot_id,
+                "shop_name": stmt.excluded.shop_name,
+                "data": stmt.excluded.data,
+                "scraped_at": stmt.excluded.scraped_at,
+                "updated_at": stmt.excluded.updated_at,
+                **{column: getattr(stmt.excluded, column) for column in METRIC_COLUMNS},
+            },
+            where=RealtimeSnapshotLatest.__table__.c.scraped_at <= stmt.excluded.scraped_at
+        )
+        db.execute(stmt)
+        return len(newest)
+
+    @staticmethod
+    def get_latest(db: Session, snapshot_type: Optional[str] = None) -> List[RealtimeSnapshotLatest]:
+        """Read the latest snapshot per account, optionally for one type"""
+        query = db.query(RealtimeSnapshotLatest)
+        if snapshot_type:
+            query = query.filter(RealtimeSnapshotLatest.snapshot_type == snapshot_type)
+        return query.order_by(RealtimeSnapshotLatest.shopee_account_id).all()
@@ -0,0 +1,221 @@
+"""
+Sales Report Service
+Daily per-shop sales report rows read from the order fact rollup
+(payout_daily_summary) instead of grouping raw orders.
+
+Closed ranges (ending before today) are cached by a hash of the filters;
+the rollup refresh drops overlapping entries, so preview and export of the
+same month share one computation and never serve stale numbers.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import csv
+import hashlib
+import io
+import json
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models.payout_summary import PayoutDailySummary
+from app.models.report_cache import ReportRangeCache
+from app.models.shopee_account import ShopeeAccount
+
+CACHE_FORMAT = 1  # Bump when the cached row layout changes
+CSV_HEADER = ['Date', 'Shop Name', 'Total Orders', 'Total GMV (Rp)', 'Total Commission (Rp)']
+CSV_CHUNK_ROWS = 1000
+
+# (day, shopee_account_id, orders, gmv, commission)
+FactRow = Tuple[date, int, int, Decimal, Decimal]
+
+
+def filter_hash(from_date: date, to_date: date, account_id: Optional[int]) -> str:
+    key = json.dumps({
+        "v": CACHE_FORMAT,
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "account_id": account_id,
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def is_closed(to_date: date, today: Optional[date] = None) -> bool:
+    """Ranges ending before today no longer receive new orders"""
+    return to_date < (today or datetime.utcnow().date())
+
+
+def invalidate_report_cache(
+    db: Session,
+    account_id: Optional[int] = None,
+    low: Optional[date] = None,
+    high: Optional[date] = None
+) -> None:
+    """
+    Drop cached reports overlapping [low, high] for an account (all-shop
+    reports included); everything when called without arguments.
+    Does not commit.
+    """
+    query = db.query(ReportRangeCache)
+    if account_id is not None:
+        query = query.filter(
+            (ReportRangeCache.account_id.is_(None)) | (ReportRangeCache.account_id == account_id)
+        )
+    if low is not None and high is not None:
+        query = query.filter(ReportRangeCache.from_date <= high, ReportRangeCache.to_date >= low)
+    query.delete(synchronize_session=False)
+
+
+def fact_query(db: Session, from_date: date, to_date: date, account_id: Optional[int] = None) -> Query:
+    """Per (day, shop) totals of completed orders in [from_date, to_date], newest first"""
+    query = db.query(
+        PayoutDailySummary.day,
+        PayoutDailySummary.shopee_account_id,
+        func.sum(PayoutDailySummary.order_count),
+        func.sum(PayoutDailySummary.gmv_total),
+        func.sum(PayoutDailySummary.commission_total)
+    ).filter(
+        PayoutDailySummary.day >= from_date,
+        PayoutDailySummary.day <= to_date
+    )
+    if account_id:
+        query = query.filter(PayoutDailySummary.shopee_account_id == account_id)
+    return query.group_by(
+        PayoutDailySummary.day, PayoutDailySummary.shopee_account_id
+    ).order_by(PayoutDailySummary.day.desc(), PayoutDailySummary.shopee_account_id)
+
+
+def _fact_row(row) -> FactRow:
+    day, account_id, orders, gmv, commission = row
+    return (day, account_id, int(orders or 0), Decimal(str(gmv or 0)), Decimal(str(commission or 0)))
+
+
+def _encode(rows: List[FactRow]) -> list:
+    return [[day.isoformat(), account_id, orders, str(gmv), str(commission)]
+            for day, account_id, orders, gmv, commission in rows]
+
+
+def _decode(rows: list) -> List[FactRow]:
+    return [(date.fromisoformat(day), account_id, orders, Decimal(gmv), Decimal(commission))
+            for day, account_id, orders, gmv, commission in rows]
+
+
+class SalesReportService:
+    """Sales report rows, summary and CSV"""
+
+    @staticmethod
+    def fact_rows(
+        db: Session,
+        from_date: date,
+        to_date: date,
+        account_id: Optional[int] = None
+    ) -> Iterable[FactRow]:
+        """
+        Report rows for the filters. Closed ranges are served from (and stored
+        in) the range cache; open ranges stream from the rollup.
+        """
+        if not is_closed(to_date):
+            return (_fact_row(row) for row in fact_query(db, from_date, to_date, account_id).yield_per(CSV_CHUNK_ROWS))
+
+        key = filter_hash(from_date, to_date, account_id)
+        fresh_after = datetime.utcnow() - timedelta(hours=settings.report_cache_ttl_hours)
+        cached = db.get(ReportRangeCache, key)
+        if cached is not None and cached.created_at and cached.created_at >= fresh_after:
+            return _decode(cached.rows)
+
+        rows = [_fact_row(row) for row in fact_query(db, from_date, to_date, account_id)]
+        table = ReportRangeCache.__table__
+        values = {
+            "filter_hash": key,
+            "from_date": from_date,
+            "to_date": to_date,
+            "account_id": account_id,
+            "rows": _encode(rows),
+            "created_at": datetime.utcnow(),
+        }
+        stmt = dialect_insert(db, table).values(values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["filter_hash"],
+            set_={name: stmt.excluded[name] for name in ("rows", "created_at")}
+        ))
+        db.query(ReportRangeCache).filter(
+            ReportRangeCache.created_at < fresh_after
+        ).delete(synchronize_session=False)
+        db.commit()
+        return rows
+
+    @staticmethod
+    def account_names(db: Session) -> Dict[int, str]:
+        return {account_id: name for account_id, name in db.query(ShopeeAccount.id, ShopeeAccount.account_name)}
+
+    @staticmethod
+    def report(
+        db: Session,
+        from_date: date,
+        to_date: date,
+        account_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """{"data": [row dicts], "summary": totals} as served by POST /api/reports/generate"""
+        names = SalesReportService.account_names(db)
+        data = []
+        total_orders = 0
+        total_gmv = Decimal(0)
+        total_commission = Decimal(0)
+
+        for day, shop_id, orders, gmv, commission in SalesReportService.fact_rows(db, from_date, to_date, account_id):
+            if shop_id not in names:
+                continue
+            data.append({
+                "date": str(day),
+                "shop_name": names[shop_id] or "Unknown",
+                "total_orders": orders,
+                "total_gmv": float(gmv),
+                "total_commission": float(commission),
+            })
+            total_orders += orders
+            total_gmv += gmv
+            total_commission += commission
+
+        return {
+            "data": data,
+            "summary": {
+                "total_orders": total_orders,
+                "total_gmv": float(total_gmv),
+                "total_commission": float(total_commission),
+                "avg_order_value": float(total_gmv / total_orders) if total_orders > 0 else 0
+            }
+        }
+
+
+def iter_csv(rows: Iterable[FactRow], names: Dict[int, str], chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """UTF-8 report CSV, yielded every `chunk_rows` rows (the header goes out first)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _drain() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(CSV_HEADER)
+    yield _drain()
+
+    pending = 0
+    for day, shop_id, orders, gmv, commission in rows:
+        if shop_id not in names:
+            continue
+        writer.writerow([
+            str(day),
+            names[shop_id] or "Unknown",
+            orders,
+            f"{float(gmv):,.2f}",
+            f"{float(commission):,.2f}"
+        ])
+        pending += 1
+        if pending == chunk_rows:
+            yield _drain()
+            pending = 0
+    if pending:
+        yield _drain()
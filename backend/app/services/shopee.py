@@ -183,32 +183,23 @@ class ShopeeAPIService:
         """
         Sync orders from Shopee to database
         """
-        from app.models.order import Order
-        from app.models.shopee_account import ShopeeAccount
+        from app.services.order_upsert import OrderUpsertService
 
         try:
             orders = await self.get_orders(access_token, shop_id)
 
-            created = 0
-            updated = 0
-
-            for order in orders:
-                order_id = order.get("order_id")
-                existing = db.query(Order).filter(Order.order_id == str(order_id)).first()
-
-                if not existing:
-                    db_order = Order(
-                        shopee_account_id=account_id,
-                        order_id=str(order_id),
-                        total_amount=order.get("total_amount", 0),
-                        status="completed",
-                        date=datetime.fromtimestamp(order.get("create_time", 0)),
-                    )
-                    db.add(db_order)
-                    created += 1
-                else:
-                    existing.total_amount = order.get("total_amount", 0)
-                    updated += 1
+            result = OrderUpsertService.bulk_upsert(db, [
+                {
+                    "order_id": str(order.get("order_id")),
+                    "shopee_account_id": account_id,
+                    "total_amount": order.get("total_amount", 0),
+                    "status": "completed",
+                    "date": datetime.fromtimestamp(order.get("create_time", 0)),
+                }
+                for order in orders
+            ], update_columns=("total_amount",))
+            created = result["inserted"]
+            updated = result["updated"] + result["unchanged"]
 
             db.commit()
             logger.info(f"Synced {created} new orders, updated {updated} existing")
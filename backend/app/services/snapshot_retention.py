@@ -0,0 +1,291 @@
+"""
+Snapshot Retention Service
+Rolls raw realtime_snapshots into 5-minute and hourly aggregates and drops
+raw rows older than the retention window, one day at a time.
+"""
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.realtime_snapshot import RealtimeSnapshot, RealtimeSnapshotRollup
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+}
+
+PARTITION_PREFIX = "realtime_snapshots_p"
+DEFAULT_PARTITION = "realtime_snapshots_default"
+SNAPSHOT_COLUMNS = "id, shopee_account_id, shop_name, snapshot_type, data, scraped_at, created_at"
+
+
+def _bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Floor a timestamp to the start of its bucket"""
+    if resolution == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(minute=ts.minute - ts.minute % 5, second=0, microsecond=0)
+
+
+def _numeric_fields(data: Any) -> Dict[str, float]:
+    """Top-level numeric values of a snapshot payload (booleans excluded)"""
+    if not isinstance(data, dict):
+        return {}
+    return {
+        key: float(value)
+        for key, value in data.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def merge_metrics(
+    target: Dict[str, Dict[str, float]],
+    target_last_at: Optional[datetime],
+    source: Dict[str, Dict[str, float]],
+    source_last_at: datetime
+) -> Dict[str, Dict[str, float]]:
+    """
+    Merge two {field: {min, max, last}} aggregates.
+    `last` comes from whichever side saw the later sample.
+    """
+    merged = {k: dict(v) for k, v in target.items()}
+    source_is_newer = target_last_at is None or source_last_at >= target_last_at
+    for field, agg in source.items():
+        current = merged.get(field)
+        if current is None:
+            merged[field] = dict(agg)
+            continue
+        current["min"] = min(current["min"], agg["min"])
+        current["max"] = max(current["max"], agg["max"])
+        if source_is_newer:
+            current["last"] = agg["last"]
+    return merged
+
+
+class SnapshotRetentionService:
+    """Retention and downsampling for realtime_snapshots"""
+
+    @staticmethod
+    def is_partitioned(db: Session) -> bool:
+        """True when realtime_snapshots is a native Postgres range-partitioned table"""
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        return db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = 'realtime_snapshots'"
+        )).first() is not None
+
+    @staticmethod
+    def ensure_partitions(db: Session, days_ahead: int = 2, today: Optional[date] = None) -> List[str]:
+        """
+        Create daily partitions from today up to `days_ahead` days out (Postgres only).
+
+        Rows for a day without a partition (clock skew, future-dated retries,
+        a stalled loop) sit in realtime_snapshots_default, and Postgres refuses
+        to create that day's partition while they are there. Such days are
+        created with the default partition detached, and their rows are
+        moved into the new partition before it is re-attached.
+        """
+        if not SnapshotRetentionService.is_partitioned(db):
+            return []
+
+        created = []
+        today = today or datetime.utcnow().date()
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            name = f"{PARTITION_PREFIX}{day:%Y%m%d}"
+            if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                continue
+            start, end = day.isoformat(), (day + timedelta(days=1)).isoformat()
+            create = (
+                f"CREATE TABLE {name} PARTITION OF realtime_snapshots "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+            in_range = f"scraped_at >= '{start}' AND scraped_at < '{end}'"
+            stranded = db.execute(text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range} LIMIT 1")).first()
+
+            if stranded:
+                db.execute(text(f"ALTER TABLE realtime_snapshots DETACH PARTITION {DEFAULT_PARTITION}"))
+                db.execute(text(create))
+                db.execute(text(
+                    f"INSERT INTO realtime_snapshots ({SNAPSHOT_COLUMNS}) "
+                    f"SELECT {SNAPSHOT_COLUMNS} FROM {DEFAULT_PARTITION} WHERE {in_range}"
+                ))
+                db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+                db.execute(text(f"ALTER TABLE realtime_snapshots ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+                logger.info(f"[Retention] Moved stranded default-partition rows into {name}")
+            else:
+                db.execute(text(create))
+            db.commit()
+            created.append(name)
+        return created
+
+    @staticmethod
+    def _rollup_window(db: Session, start: datetime, end: datetime) -> Tuple[int, int]:
+        """
+        Aggregate raw rows in [start, end) into every resolution and merge
+        them with any buckets already written by a previous run.
+
+        Returns:
+            (raw_rows_read, buckets_written)
+        """
+        buckets: Dict[Tuple[str, str, str, datetime], Dict[str, Any]] = {}
+        rows = db.query(
+            RealtimeSnapshot.shopee_account_id,
+            RealtimeSnapshot.snapshot_type,
+            RealtimeSnapshot.scraped_at,
+            RealtimeSnapshot.data
+        ).filter(
+            RealtimeSnapshot.scraped_at >= start,
+            RealtimeSnapshot.scraped_at < end
+        ).order_by(RealtimeSnapshot.scraped_at).yield_per(1000)
+
+        raw_count = 0
+        for account_id, snapshot_type, scraped_at, data in rows:
+            raw_count += 1
+            values = _numeric_fields(data)
+            for resolution in RESOLUTIONS:
+                key = (account_id, snapshot_type, resolution, _bucket_start(scraped_at, resolution))
+                bucket = buckets.setdefault(key, {"count": 0, "metrics": {}, "last_at": scraped_at})
+                bucket["count"] += 1
+                bucket["last_at"] = scraped_at  # rows arrive in scraped_at order
+                for field, value in values.items():
+                    agg = bucket["metrics"].get(field)
+                    if agg is None:
+                        bucket["metrics"][field] = {"min": value, "max": value, "last": value}
+                    else:
+                        agg["min"] = min(agg["min"], value)
+                        agg["max"] = max(agg["max"], value)
+                        agg["last"] = value
+
+        if not buckets:
+            return (0, 0)
+
+        # Buckets straddling a previous cutoff already exist; merge into them
+        existing = {
+            (r.shopee_account_id, r.snapshot_type, r.resolution, r.bucket_start): r
+            for r in db.query(RealtimeSnapshotRollup).filter(
+                RealtimeSnapshotRollup.bucket_start >= _bucket_start(start, "1h"),
+                RealtimeSnapshotRollup.bucket_start < end
+            )
+        }
+
+        for key, bucket in buckets.items():
+            row = existing.get(key)
+            if row is None:
+                account_id, snapshot_type, resolution, bucket_start = key
+                db.add(RealtimeSnapshotRollup(
+                    shopee_account_id=account_id,
+                    snapshot_type=snapshot_type,
+                    resolution=resolution,
+                    bucket_start=bucket_start,
+                    sample_count=bucket["count"],
+                    metrics=bucket["metrics"],
+                    last_scraped_at=bucket["last_at"]
+                ))
+            else:
+                row.metrics = merge_metrics(row.metrics or {}, row.last_scraped_at, bucket["metrics"], bucket["last_at"])
+                row.sample_count = (row.sample_count or 0) + bucket["count"]
+                row.last_scraped_at = max(row.last_scraped_at, bucket["last_at"])
+
+        return (raw_count, len(buckets))
+
+    @staticmethod
+    def _drop_window(db: Session, day_start: datetime, end: datetime, partitioned: bool) -> str:
+        """
+        Drop raw rows in [day_start, end).
+        Whole-day partitions are dropped; the DELETE then only touches
+        leftovers (e.g. rows that landed in the default partition).
+        """
+        method = "delete"
+        if partitioned and end - day_start == timedelta(days=1):
+            name = f"{PARTITION_PREFIX}{day_start:%Y%m%d}"
+            exists = db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+            if exists:
+                db.execute(text(f"DROP TABLE {name}"))
+                method = "partition_drop"
+
+        db.query(RealtimeSnapshot).filter(
+            RealtimeSnapshot.scraped_at >= day_start,
+            RealtimeSnapshot.scraped_at < end
+        ).delete(synchronize_session=False)
+        return method
+
+    @staticmethod
+    def run(db: Session, now: Optional[datetime] = None, retention_hours: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply retention: roll up and drop raw snapshots older than the window.
+
+        Works one UTC day at a time, committing after each day, so an
+        interrupted run resumes cleanly and memory stays bounded.
+        """
+        now = now or datetime.utcnow()
+        hours = retention_hours if retention_hours is not None else settings.snapshot_raw_retention_hours
+        cutoff = _bucket_start(now - timedelta(hours=hours), "1h")
+
+        oldest = db.query(func.min(RealtimeSnapshot.scraped_at)).filter(
+            RealtimeSnapshot.scraped_at < cutoff
+        ).scalar()
+
+        result = {
+            "cutoff": cutoff.isoformat(),
+            "days_processed": 0,
+            "raw_rows_rolled_up": 0,
+            "buckets_written": 0,
+            "partitions_dropped": 0,
+        }
+        if oldest is None:
+            return result
+
+        partitioned = SnapshotRetentionService.is_partitioned(db)
+        day_start = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        while day_start < cutoff:
+            window_end = min(day_start + timedelta(days=1), cutoff)
+            raw_count, bucket_count = SnapshotRetentionService._rollup_window(db, day_start, window_end)
+            method = SnapshotRetentionService._drop_window(db, day_start, window_end, partitioned)
+            db.commit()
+
+            result["days_processed"] += 1
+            result["raw_rows_rolled_up"] += raw_count
+            result["buckets_written"] += bucket_count
+            if method == "partition_drop":
+                result["partitions_dropped"] += 1
+
+            logger.info(f"[Retention] {day_start.date()} -> rows={raw_count}, buckets={bucket_count}, via={method}")
+            day_start += timedelta(days=1)
+
+        return result
+
+
+def _run_once() -> None:
+    """Run one retention pass with its own session (executed in a worker thread)"""
+    db = SessionLocal()
+    try:
+        SnapshotRetentionService.ensure_partitions(db)
+    except Exception as e:
+        # Never let partition upkeep block retention itself
+        db.rollback()
+        logger.error(f"[Retention] Partition upkeep failed: {e}")
+    try:
+        result = SnapshotRetentionService.run(db)
+        logger.info(f"[Retention] Pass complete: {result}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[Retention] Pass failed: {e}")
+    finally:
+        db.close()
+
+
+async def retention_loop(interval_minutes: int) -> None:
+    """Background task: apply snapshot retention every `interval_minutes`"""
+    while True:
+        await asyncio.to_thread(_run_once)
+        await asyncio.sleep(interval_minutes * 60)
@@ -0,0 +1,366 @@
+"""
+Studio Report Service
+Materializes daily, weekly and monthly studio reports into `reports`.
+
+A batch of daily reports costs three grouped queries whatever the number
+of days or studios: revenue/commission from the order rollup, ad spend,
+and attendance by status. Weekly and monthly reports are sums of the
+materialized daily reports of their period, so long ranges never rescan
+orders.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import asyncio
+import csv
+import io
+import logging
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.ads import AdsDailySpend
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.models.payout_summary import PayoutDailySummary
+from app.models.report import Report
+from app.models.shopee_account import ShopeeAccount
+from app.models.studio import Studio
+
+logger = logging.getLogger(__name__)
+
+REPORT_TYPES = ("daily", "weekly", "monthly")
+ATTENDANCE_STATUSES = ("present", "late", "absent", "sick")
+CSV_HEADER = [
+    'Period', 'Start', 'End', 'Revenue (Rp)', 'Commission (Rp)', 'Ad Spend (Rp)', 'Orders',
+    *[status.title() for status in ATTENDANCE_STATUSES]
+]
+
+
+def period_bounds(report_type: str, day: date) -> Tuple[str, date, date]:
+    """
+    (period label, first day, last day) of the period containing `day`.
+    Weeks are ISO weeks (Monday to Sunday).
+    """
+    if report_type == "daily":
+        return (day.isoformat(), day, day)
+    if report_type == "weekly":
+        start = day - timedelta(days=day.weekday())
+        year, week, _ = start.isocalendar()
+        return (f"{year}-W{week:02d}", start, start + timedelta(days=6))
+    if report_type == "monthly":
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return (start.strftime("%Y-%m"), start, next_month - timedelta(days=1))
+    raise ValueError(f"Unknown report type: {report_type}")
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _empty_totals() -> Dict:
+    return {
+        "revenue": Decimal(0),
+        "commission": Decimal(0),
+        "ad_spent": Decimal(0),
+        "orders": 0,
+        "attendance": {status: 0 for status in ATTENDANCE_STATUSES},
+    }
+
+
+def compute_daily(
+    db: Session,
+    start: date,
+    end: date,
+    studio_ids: Iterable[int]
+) -> Dict[Tuple[int, date], Dict]:
+    """Totals per (studio, day) for every day in [start, end], in three grouped queries"""
+    studio_ids = list(studio_ids)
+    totals = {
+        (studio_id, start + timedelta(days=offset)): _empty_totals()
+        for studio_id in studio_ids
+        for offset in range((end - start).days + 1)
+    }
+
+    sales = db.query(
+        ShopeeAccount.studio_id,
+        PayoutDailySummary.day,
+        func.sum(PayoutDailySummary.order_count),
+        func.sum(PayoutDailySummary.gmv_total),
+        func.sum(PayoutDailySummary.commission_total)
+    ).join(
+        ShopeeAccount, PayoutDailySummary.shopee_account_id == ShopeeAccount.id
+    ).filter(
+        PayoutDailySummary.day >= start,
+        PayoutDailySummary.day <= end,
+        ShopeeAccount.studio_id.in_(studio_ids)
+    ).group_by(ShopeeAccount.studio_id, PayoutDailySummary.day)
+    for studio_id, day, orders, gmv, commission in sales:
+        entry = totals[(studio_id, _as_date(day))]
+        entry["orders"] = int(orders or 0)
+        entry["revenue"] = Decimal(str(gmv or 0))
+        entry["commission"] = Decimal(str(commission or 0))
+
+    spend = db.query(
+        ShopeeAccount.studio_id,
+        AdsDailySpend.date,
+        func.sum(AdsDailySpend.spend_amount)
+    ).join(
+        ShopeeAccount, AdsDailySpend.shopee_account_id == ShopeeAccount.id
+    ).filter(
+        AdsDailySpend.date >= start,
+        AdsDailySpend.date <= end,
+        ShopeeAccount.studio_id.in_(studio_ids)
+    ).group_by(ShopeeAccount.studio_id, AdsDailySpend.date)
+    for studio_id, day, amount in spend:
+        totals[(studio_id, _as_date(day))]["ad_spent"] = Decimal(str(amount or 0))
+
+    attendance_day = func.date(Attendance.date)
+    attendance = db.query(
+        Employee.studio_id,
+        attendance_day,
+        Attendance.status,
+        func.count(Attendance.id)
+    ).join(
+        Employee, Attendance.employee_id == Employee.id
+    ).filter(
+        Attendance.date >= datetime.combine(start, time.min),
+        Attendance.date < datetime.combine(end + timedelta(days=1), time.min),
+        Employee.studio_id.in_(studio_ids)
+    ).group_by(Employee.studio_id, attendance_day, Attendance.status)
+    for studio_id, day, status, count in attendance:
+        counts = totals[(studio_id, _as_date(day))]["attendance"]
+        counts[status] = counts.get(status, 0) + int(count)
+
+    return totals
+
+
+def merge_totals(reports: Iterable[Report]) -> Dict:
+    """Sum materialized reports into one set of totals"""
+    merged = _empty_totals()
+    merged["days"] = 0
+    for report in reports:
+        merged["revenue"] += Decimal(str(report.total_revenue or 0))
+        merged["commission"] += Decimal(str(report.total_commission or 0))
+        merged["ad_spent"] += Decimal(str(report.total_ad_spent or 0))
+        merged["orders"] += int((report.data or {}).get("orders", 0))
+        merged["days"] += (report.data or {}).get("days", 1)
+        for status, count in (report.attendance_summary or {}).items():
+            merged["attendance"][status] = merged["attendance"].get(status, 0) + count
+    return merged
+
+
+def _store(
+    db: Session,
+    existing: Dict[Tuple[int, str], Report],
+    studio_id: int,
+    report_type: str,
+    period: str,
+    start: date,
+    end: date,
+    totals: Dict
+) -> Report:
+    report = existing.get((studio_id, period))
+    if report is None:
+        report = Report(studio_id=studio_id, report_type=report_type, period=period)
+        db.add(report)
+        existing[(studio_id, period)] = report
+    report.period_start = start
+    report.period_end = end
+    report.total_revenue = totals["revenue"]
+    report.total_commission = totals["commission"]
+    report.total_ad_spent = totals["ad_spent"]
+    report.attendance_summary = dict(totals["attendance"])
+    report.data = {"orders": totals["orders"], "days": totals.get("days", 1)}
+    report.updated_at = datetime.utcnow()
+    return report
+
+
+class StudioReportService:
+    """Generate, merge and read persisted studio reports"""
+
+    @staticmethod
+    def studio_ids(db: Session, studio_id: Optional[int] = None) -> List[int]:
+        query = db.query(Studio.id)
+        if studio_id:
+            query = query.filter(Studio.id == studio_id)
+        return [row[0] for row in query.order_by(Studio.id)]
+
+    @staticmethod
+    def materialize_daily(
+        db: Session,
+        start: date,
+        end: date,
+        studio_id: Optional[int] = None,
+        only_missing: bool = False
+    ) -> int:
+        """
+        Write daily reports for [start, end]. With only_missing, days that are
+        already materialized for every studio are left alone.
+        Does not commit.
+
+        Returns:
+            Number of daily reports written
+        """
+        studio_ids = StudioReportService.studio_ids(db, studio_id)
+        if not studio_ids:
+            return 0
+        existing = {
+            (report.studio_id, report.period): report
+            for report in db.query(Report).filter(
+                Report.report_type == "daily",
+                Report.studio_id.in_(studio_ids),
+                Report.period_start >= start,
+                Report.period_start <= end
+            )
+        }
+        if only_missing:
+            missing = [
+                start + timedelta(days=offset) for offset in range((end - start).days + 1)
+                if any((sid, (start + timedelta(days=offset)).isoformat()) not in existing for sid in studio_ids)
+            ]
+            if not missing:
+                return 0
+            start, end = missing[0], missing[-1]
+
+        written = 0
+        for (sid, day), totals in compute_daily(db, start, end, studio_ids).items():
+            if only_missing and (sid, day.isoformat()) in existing:
+                continue
+            _store(db, existing, sid, "daily", day.isoformat(), day, day, totals)
+            written += 1
+        return written
+
+    @staticmethod
+    def materialize_period(
+        db: Session,
+        report_type: str,
+        day: date,
+        studio_id: Optional[int] = None,
+        recompute: bool = False,
+        today: Optional[date] = None
+    ) -> List[Report]:
+        """
+        Write the report of the period containing `day`. Weekly and monthly
+        reports are merged from the period's daily reports, materializing
+        missing days first, or every day of the period with `recompute`.
+        Days from today on are never materialized, so a running period only
+        sums the days that are over. Does not commit.
+        """
+        period, start, end = period_bounds(report_type, day)
+        last_day = min(end, (today or datetime.utcnow().date()) - timedelta(days=1))
+        if report_type == "daily":
+            if start <= last_day:
+                StudioReportService.materialize_daily(db, start, last_day, studio_id)
+                db.flush()
+            query = db.query(Report).filter(Report.report_type == "daily", Report.period == period)
+            if studio_id:
+                query = query.filter(Report.studio_id == studio_id)
+            return query.all()
+
+        if start <= last_day:
+            StudioReportService.materialize_daily(db, start, last_day, studio_id, only_missing=not recompute)
+            db.flush()
+        studio_ids = StudioReportService.studio_ids(db, studio_id)
+        dailies: Dict[int, List[Report]] = {sid: [] for sid in studio_ids}
+        for report in db.query(Report).filter(
+            Report.report_type == "daily",
+            Report.studio_id.in_(studio_ids),
+            Report.period_start >= start,
+            Report.period_start <= end
+        ):
+            dailies[report.studio_id].append(report)
+
+        existing = {
+            (report.studio_id, report.period): report
+            for report in db.query(Report).filter(
+                Report.report_type == report_type,
+                Report.period == period,
+                Report.studio_id.in_(studio_ids)
+            )
+        }
+        return [
+            _store(db, existing, sid, report_type, period, start, end, merge_totals(reports))
+            for sid, reports in dailies.items()
+        ]
+
+    @staticmethod
+    def run_scheduled(db: Session, today: Optional[date] = None) -> None:
+        """
+        One scheduler pass: recompute the last REPORT_RECOMPUTE_DAYS daily
+        reports (late syncs land there), then the latest complete week and
+        month. Commits.
+        """
+        today = today or datetime.utcnow().date()
+        yesterday = today - timedelta(days=1)
+        StudioReportService.materialize_daily(
+            db, today - timedelta(days=max(settings.report_recompute_days, 1)), yesterday
+        )
+        db.flush()
+        StudioReportService.materialize_period(db, "weekly", today - timedelta(days=today.weekday() + 7), today=today)
+        StudioReportService.materialize_period(db, "monthly", today.replace(day=1) - timedelta(days=1), today=today)
+        db.commit()
+
+    @staticmethod
+    def daily_breakdown(db: Session, report: Report) -> List[Report]:
+        """The daily reports a weekly/monthly report was merged from, oldest first"""
+        if report.report_type == "daily":
+            return []
+        return db.query(Report).filter(
+            Report.report_type == "daily",
+            Report.studio_id == report.studio_id,
+            Report.period_start >= report.period_start,
+            Report.period_start <= report.period_end
+        ).order_by(Report.period_start).all()
+
+
+def _csv_row(report: Report) -> list:
+    attendance = report.attendance_summary or {}
+    return [
+        report.period,
+        report.period_start.isoformat() if report.period_start else '',
+        report.period_end.isoformat() if report.period_end else '',
+        f"{float(report.total_revenue or 0):.2f}",
+        f"{float(report.total_commission or 0):.2f}",
+        f"{float(report.total_ad_spent or 0):.2f}",
+        (report.data or {}).get("orders", 0),
+        *[attendance.get(status, 0) for status in ATTENDANCE_STATUSES]
+    ]
+
+
+def iter_report_csv(report: Report, breakdown: List[Report]) -> Iterator[bytes]:
+    """CSV of a report: its daily rows (weekly/monthly) followed by the period total"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for row in breakdown:
+        writer.writerow(_csv_row(row))
+    writer.writerow(_csv_row(report))
+    yield buffer.getvalue().encode()
+
+
+def _run_scheduled() -> None:
+    db = SessionLocal()
+    try:
+        StudioReportService.run_scheduled(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def report_scheduler_loop(interval_minutes: int) -> None:
+    """Background task: keep recent daily, weekly and monthly studio reports materialized"""
+    while True:
+        try:
+            await asyncio.to_thread(_run_scheduled)
+        except Exception as e:
+            logger.error(f"[Reports] Scheduled generation failed: {e}")
+        await asyncio.sleep(interval_minutes * 60)
@@ -0,0 +1,106 @@
+"""
+Sync Blob Store
+Gzip-compressed, content-addressed storage for raw extension sync payloads on
+local disk. Identical payloads share one file; files expire after a retention
+window measured from their last write.
+"""
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BLOB_SUFFIX = ".json.gz"
+
+
+class SyncBlobStore:
+    """Files live at <root>/<sha[:2]>/<sha>.json.gz"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.sync_blob_dir
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}{BLOB_SUFFIX}")
+
+    def put(self, data: bytes) -> Tuple[str, bool]:
+        """
+        Store `data` under its sha256.
+
+        Returns:
+            (sha256, True if a new file was written)
+        """
+        sha256 = self.digest(data)
+        path = self.path_for(sha256)
+        if os.path.exists(path):
+            # Same content seen again: extend its retention instead of rewriting
+            os.utime(path)
+            return (sha256, False)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+                gz.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return (sha256, True)
+
+    def get(self, sha256: str) -> Optional[bytes]:
+        """Decompressed blob, or None when it was never stored or has expired"""
+        path = self.path_for(sha256)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rb") as gz:
+            return gz.read()
+
+    def purge(self, retention_days: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """
+        Delete blobs not written for `retention_days`; returns files removed.
+        A naive `now` is taken as UTC, like datetime.utcnow().
+        """
+        days = retention_days if retention_days is not None else settings.sync_blob_retention_days
+        now = now or datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        cutoff = (now - timedelta(days=days)).timestamp()
+        if not os.path.isdir(self.root):
+            return 0
+
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+async def blob_retention_loop(interval_minutes: int) -> None:
+    """Background task: purge expired sync payload blobs every `interval_minutes`"""
+    store = SyncBlobStore()
+    while True:
+        try:
+            removed = await asyncio.to_thread(store.purge)
+            if removed:
+                logger.info(f"[SyncBlobStore] Purged {removed} expired blobs")
+        except Exception as e:
+            logger.error(f"[SyncBlobStore] Purge failed: {e}")
+        await asyncio.sleep(interval_minutes * 60)
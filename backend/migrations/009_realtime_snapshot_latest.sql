@@ -0,0 +1,29 @@
+-- Migration 009: Latest snapshot per account for bot dashboards
+-- Created: 2026-10-19
+
+-- One row per (account, snapshot_type), upserted on every ingest
+CREATE TABLE IF NOT EXISTS realtime_snapshot_latest (
+    shopee_account_id VARCHAR(100) NOT NULL,
+    snapshot_type VARCHAR(50) NOT NULL,
+    snapshot_id INTEGER NOT NULL,  -- realtime_snapshots.id mirrored here
+    shop_name VARCHAR(255),
+    data JSON NOT NULL,
+    scraped_at DATETIME NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (shopee_account_id, snapshot_type)
+);
+
+-- Backfill from existing history (newest scraped_at wins, highest id breaks ties)
+INSERT INTO realtime_snapshot_latest (shopee_account_id, snapshot_type, snapshot_id, shop_name, data, scraped_at, updated_at)
+SELECT shopee_account_id, snapshot_type, id, shop_name, data, scraped_at, CURRENT_TIMESTAMP
+FROM (
+    SELECT s.*,
+           ROW_NUMBER() OVER (
+               PARTITION BY shopee_account_id, snapshot_type
+               ORDER BY scraped_at DESC, id DESC
+           ) AS rn
+    FROM realtime_snapshots s
+) ranked
+WHERE rn = 1
+ON CONFLICT (shopee_account_id, snapshot_type) DO NOTHING;
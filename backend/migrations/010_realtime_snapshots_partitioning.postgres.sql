@@ -0,0 +1,55 @@
+-- Migration 010 (PostgreSQL only): Range-partition realtime_snapshots by day
+-- Created: 2026-10-19
+--
+-- Retention drops whole daily partitions instead of DELETE-ing rows.
+-- New daily partitions are created ahead of time by the retention task
+-- (SnapshotRetentionService.ensure_partitions); rows outside any daily
+-- partition land in realtime_snapshots_default.
+
+BEGIN;
+
+ALTER TABLE realtime_snapshots RENAME TO realtime_snapshots_legacy;
+
+CREATE TABLE realtime_snapshots (
+    id SERIAL,
+    shopee_account_id VARCHAR(100) NOT NULL,
+    shop_name VARCHAR(255),
+    snapshot_type VARCHAR(50) NOT NULL,
+    data JSON NOT NULL,
+    scraped_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- Partition key must be part of the primary key
+    PRIMARY KEY (id, scraped_at)
+) PARTITION BY RANGE (scraped_at);
+
+CREATE TABLE realtime_snapshots_default PARTITION OF realtime_snapshots DEFAULT;
+
+-- Daily partitions covering the raw retention window plus two days ahead
+DO $$
+DECLARE
+    d DATE;
+BEGIN
+    FOR d IN SELECT generate_series(CURRENT_DATE - 2, CURRENT_DATE + 2, INTERVAL '1 day')::DATE LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS realtime_snapshots_p%s PARTITION OF realtime_snapshots FOR VALUES FROM (%L) TO (%L)',
+            to_char(d, 'YYYYMMDD'), d, d + 1
+        );
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_realtime_snapshots_account ON realtime_snapshots(shopee_account_id);
+CREATE INDEX IF NOT EXISTS idx_realtime_snapshots_type ON realtime_snapshots(snapshot_type);
+CREATE INDEX IF NOT EXISTS idx_realtime_snapshots_scraped_at ON realtime_snapshots(scraped_at DESC);
+
+-- Run POST /api/bot/maintenance/retention first so only the raw retention
+-- window is left to copy.
+INSERT INTO realtime_snapshots (id, shopee_account_id, shop_name, snapshot_type, data, scraped_at, created_at)
+SELECT id, shopee_account_id, shop_name, snapshot_type, data, scraped_at, created_at
+FROM realtime_snapshots_legacy;
+
+SELECT setval(pg_get_serial_sequence('realtime_snapshots', 'id'), COALESCE((SELECT MAX(id) FROM realtime_snapshots), 0) + 1, false);
+
+DROP TABLE realtime_snapshots_legacy;
+
+COMMIT;
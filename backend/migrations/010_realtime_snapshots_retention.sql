@@ -0,0 +1,18 @@
+-- Migration 010: Downsampled rollups for realtime_snapshots retention
+-- Created: 2026-10-19
+
+-- 5-minute and hourly aggregates of raw snapshots older than the retention window
+CREATE TABLE IF NOT EXISTS realtime_snapshot_rollups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shopee_account_id VARCHAR(100) NOT NULL,
+    snapshot_type VARCHAR(50) NOT NULL,
+    resolution VARCHAR(10) NOT NULL,  -- 5m, 1h
+    bucket_start DATETIME NOT NULL,
+    sample_count INTEGER DEFAULT 0,
+    metrics JSON NOT NULL,  -- {field: {min, max, last}}
+    last_scraped_at DATETIME NOT NULL,
+
+    CONSTRAINT uq_snapshot_rollup_bucket UNIQUE (shopee_account_id, snapshot_type, resolution, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_realtime_snapshot_rollups_bucket ON realtime_snapshot_rollups(bucket_start);
@@ -0,0 +1,28 @@
+-- Migration 011 (PostgreSQL): Typed metric columns for realtime snapshots
+-- Created: 2026-10-19
+
+ALTER TABLE realtime_snapshots
+    ADD COLUMN IF NOT EXISTS orders_ready_to_ship INTEGER,
+    ADD COLUMN IF NOT EXISTS pending_orders INTEGER,
+    ADD COLUMN IF NOT EXISTS total_orders_today INTEGER,
+    ADD COLUMN IF NOT EXISTS spend_today NUMERIC(14, 2),
+    ADD COLUMN IF NOT EXISTS budget_available NUMERIC(14, 2),
+    ADD COLUMN IF NOT EXISTS coins NUMERIC(14, 2);
+
+ALTER TABLE realtime_snapshot_latest
+    ADD COLUMN IF NOT EXISTS orders_ready_to_ship INTEGER,
+    ADD COLUMN IF NOT EXISTS pending_orders INTEGER,
+    ADD COLUMN IF NOT EXISTS total_orders_today INTEGER,
+    ADD COLUMN IF NOT EXISTS spend_today NUMERIC(14, 2),
+    ADD COLUMN IF NOT EXISTS budget_available NUMERIC(14, 2),
+    ADD COLUMN IF NOT EXISTS coins NUMERIC(14, 2);
+
+CREATE INDEX IF NOT EXISTS ix_realtime_snapshot_latest_snapshot_type ON realtime_snapshot_latest(snapshot_type);
+
+UPDATE realtime_snapshot_latest SET
+    orders_ready_to_ship = CASE WHEN snapshot_type IN ('creator_live', 'summary') THEN (data->>'orders_ready_to_ship')::NUMERIC::INTEGER END,
+    pending_orders = CASE WHEN snapshot_type IN ('creator_live', 'summary') THEN (data->>'pending_orders')::NUMERIC::INTEGER END,
+    total_orders_today = CASE WHEN snapshot_type IN ('creator_live', 'summary') THEN (data->>'total_orders_today')::NUMERIC::INTEGER END,
+    spend_today = CASE WHEN snapshot_type IN ('ads', 'summary') THEN (data->>'spend_today')::NUMERIC END,
+    budget_available = CASE WHEN snapshot_type IN ('ads', 'summary') THEN (data->>'budget_available')::NUMERIC END,
+    coins = CASE WHEN snapshot_type IN ('ads', 'coins', 'summary') THEN (data->>'coins')::NUMERIC END;
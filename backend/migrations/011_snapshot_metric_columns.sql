@@ -0,0 +1,31 @@
+-- Migration 011: Typed metric columns for realtime snapshots
+-- Created: 2026-10-19
+--
+-- Hot dashboard metrics are copied out of the JSON `data` column at ingest,
+-- so overviews can SUM indexed numeric columns instead of decoding JSON.
+-- SQLite syntax; see 011_snapshot_metric_columns.postgres.sql for Postgres.
+
+ALTER TABLE realtime_snapshots ADD COLUMN orders_ready_to_ship INTEGER;
+ALTER TABLE realtime_snapshots ADD COLUMN pending_orders INTEGER;
+ALTER TABLE realtime_snapshots ADD COLUMN total_orders_today INTEGER;
+ALTER TABLE realtime_snapshots ADD COLUMN spend_today NUMERIC(14, 2);
+ALTER TABLE realtime_snapshots ADD COLUMN budget_available NUMERIC(14, 2);
+ALTER TABLE realtime_snapshots ADD COLUMN coins NUMERIC(14, 2);
+
+ALTER TABLE realtime_snapshot_latest ADD COLUMN orders_ready_to_ship INTEGER;
+ALTER TABLE realtime_snapshot_latest ADD COLUMN pending_orders INTEGER;
+ALTER TABLE realtime_snapshot_latest ADD COLUMN total_orders_today INTEGER;
+ALTER TABLE realtime_snapshot_latest ADD COLUMN spend_today NUMERIC(14, 2);
+ALTER TABLE realtime_snapshot_latest ADD COLUMN budget_available NUMERIC(14, 2);
+ALTER TABLE realtime_snapshot_latest ADD COLUMN coins NUMERIC(14, 2);
+
+CREATE INDEX IF NOT EXISTS ix_realtime_snapshot_latest_snapshot_type ON realtime_snapshot_latest(snapshot_type);
+
+-- Backfill the latest table (dashboards read only this one)
+UPDATE realtime_snapshot_latest SET
+    orders_ready_to_ship = CASE WHEN snapshot_type IN ('creator_live', 'summary') THEN CAST(json_extract(data, '$.orders_ready_to_ship') AS INTEGER) END,
+    pending_orders = CASE WHEN snapshot_type IN ('creator_live', 'summary') THEN CAST(json_extract(data, '$.pending_orders') AS INTEGER) END,
+    total_orders_today = CASE WHEN snapshot_type IN ('creator_live', 'summary') THEN CAST(json_extract(data, '$.total_orders_today') AS INTEGER) END,
+    spend_today = CASE WHEN snapshot_type IN ('ads', 'summary') THEN json_extract(data, '$.spend_today') END,
+    budget_available = CASE WHEN snapshot_type IN ('ads', 'summary') THEN json_extract(data, '$.budget_available') END,
+    coins = CASE WHEN snapshot_type IN ('ads', 'coins', 'summary') THEN json_extract(data, '$.coins') END;
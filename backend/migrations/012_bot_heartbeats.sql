@@ -0,0 +1,29 @@
+-- Migration 012: Heartbeat table for 24H bot status
+-- Created: 2026-10-19
+
+-- One row per worker (scope='worker') and per account (scope='account')
+CREATE TABLE IF NOT EXISTS bot_heartbeats (
+    scope VARCHAR(20) NOT NULL,  -- worker, account
+    key VARCHAR(100) NOT NULL,  -- worker_id or shopee_account_id
+    worker_id VARCHAR(100),
+    shop_name VARCHAR(255),
+    status VARCHAR(20),  -- running, ok, error, stopped
+    last_seen_at DATETIME NOT NULL,
+    last_snapshot_at DATETIME,
+    last_cycle_at DATETIME,
+    last_cycle_duration_ms INTEGER,
+    cycles_total INTEGER DEFAULT 0,
+    success_count INTEGER DEFAULT 0,
+    failure_count INTEGER DEFAULT 0,
+    consecutive_failures INTEGER DEFAULT 0,
+    last_error TEXT,
+
+    PRIMARY KEY (scope, key)
+);
+
+-- Seed account rows from the latest snapshot table
+INSERT INTO bot_heartbeats (scope, key, shop_name, last_seen_at, last_snapshot_at)
+SELECT 'account', shopee_account_id, MAX(shop_name), MAX(scraped_at), MAX(scraped_at)
+FROM realtime_snapshot_latest
+GROUP BY shopee_account_id
+ON CONFLICT (scope, key) DO NOTHING;
@@ -0,0 +1,22 @@
+-- Migration 013: Per-cycle throughput metrics for bot runs
+-- Created: 2026-10-19
+
+ALTER TABLE bot_runs ADD COLUMN worker_id VARCHAR(100);
+ALTER TABLE bot_runs ADD COLUMN max_workers INTEGER;
+ALTER TABLE bot_runs ADD COLUMN snapshots_count INTEGER DEFAULT 0;
+ALTER TABLE bot_runs ADD COLUMN duration_ms INTEGER;
+ALTER TABLE bot_runs ADD COLUMN snapshots_per_second FLOAT;
+ALTER TABLE bot_runs ADD COLUMN p95_scrape_ms INTEGER;
+
+-- Per-account scrape timings within a run (source for p95_scrape_ms)
+CREATE TABLE IF NOT EXISTS bot_run_scrapes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id VARCHAR(36) NOT NULL REFERENCES bot_runs(run_id) ON DELETE CASCADE,
+    shopee_account_id VARCHAR(100) NOT NULL,
+    success BOOLEAN NOT NULL,
+    duration_ms INTEGER,
+    snapshots INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_bot_run_scrapes_run_id ON bot_run_scrapes(run_id);
@@ -0,0 +1,10 @@
+-- Migration 014 (Postgres, partitioned realtime_snapshots): Idempotency keys
+-- Created: 2026-10-19
+-- Unique indexes on a partitioned table must include the partition key, so the
+-- key is (dedup_key, scraped_at). The default key already hashes scraped_at;
+-- the bot reuses the same scraped_at when it retries with a client id.
+
+ALTER TABLE realtime_snapshots ADD COLUMN IF NOT EXISTS dedup_key VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_realtime_snapshots_dedup_key
+    ON realtime_snapshots (dedup_key, scraped_at);
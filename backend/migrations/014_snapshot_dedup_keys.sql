@@ -0,0 +1,9 @@
+-- Migration 014: Idempotency keys for realtime snapshots
+-- Created: 2026-10-19
+-- dedup_key = sha256 of the client-supplied id, or of (account, type, scraped_at).
+-- Ingest inserts with ON CONFLICT DO NOTHING, so retried uploads are no-ops.
+-- Existing rows keep a NULL key (NULLs never conflict).
+
+ALTER TABLE realtime_snapshots ADD COLUMN dedup_key VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_realtime_snapshots_dedup_key ON realtime_snapshots(dedup_key);
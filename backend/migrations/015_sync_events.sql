@@ -0,0 +1,30 @@
+-- Migration 015: Compact extension sync audit log
+-- Created: 2026-10-19
+-- Replaces 'extension_auto_connect_sync' rows in activity_logs, which carried
+-- the full raw payload. Raw payloads now optionally live in the gzip blob store
+-- (SYNC_BLOB_DIR) keyed by payload_sha256.
+
+CREATE TABLE IF NOT EXISTS sync_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    account_id INTEGER,
+    payload_type VARCHAR(50) NOT NULL,
+    success BOOLEAN NOT NULL,
+    item_count INTEGER DEFAULT 0,
+    inserted INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    payload_bytes INTEGER DEFAULT 0,
+    payload_sha256 VARCHAR(64),
+    blob_stored BOOLEAN DEFAULT FALSE,
+    duration_ms INTEGER,
+    error_message TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_events_user_id ON sync_events(user_id);
+CREATE INDEX IF NOT EXISTS idx_sync_events_account_id ON sync_events(account_id);
+CREATE INDEX IF NOT EXISTS idx_sync_events_payload_sha256 ON sync_events(payload_sha256);
+CREATE INDEX IF NOT EXISTS idx_sync_events_created_at ON sync_events(created_at);
+
+-- Old sync rows duplicated every payload; drop them once this table is live
+DELETE FROM activity_logs WHERE action = 'extension_auto_connect_sync';
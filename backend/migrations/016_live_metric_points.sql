@@ -0,0 +1,23 @@
+-- Migration 016: Live streaming metric time series
+-- Created: 2026-10-19
+-- One row per (account, session, resolution, bucket). Extension samples are
+-- merged into '1m' buckets by upsert; minute rows older than
+-- LIVE_METRICS_MINUTE_RETENTION_DAYS are folded into '15m' buckets.
+
+CREATE TABLE IF NOT EXISTS live_metric_points (
+    account_id INTEGER NOT NULL,
+    session_key VARCHAR(100) NOT NULL,
+    resolution VARCHAR(4) NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    viewers_peak INTEGER,
+    viewers INTEGER,
+    likes INTEGER,
+    total_sales INTEGER,
+    revenue NUMERIC(14, 2),
+    last_sample_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (account_id, session_key, resolution, bucket_start)
+);
+
+-- Rollup scans minute rows by age across accounts
+CREATE INDEX IF NOT EXISTS idx_live_metric_points_resolution_bucket ON live_metric_points(resolution, bucket_start);
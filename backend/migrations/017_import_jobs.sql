@@ -0,0 +1,35 @@
+-- Migration 017: Server-side chunked order import jobs
+-- Created: 2026-10-19
+-- Uploads are spooled to IMPORT_SPOOL_DIR and imported IMPORT_CHUNK_ROWS rows
+-- per transaction; chunks_done is the resume point after a restart.
+
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    shop_id INTEGER NOT NULL,
+    import_type VARCHAR(20) NOT NULL,
+    mapping JSON NOT NULL,
+    filename VARCHAR(255),
+    file_path VARCHAR(500) NOT NULL,
+    file_format VARCHAR(10) NOT NULL,
+    file_bytes INTEGER DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    chunk_size INTEGER NOT NULL,
+    total_rows INTEGER,
+    chunks_done INTEGER DEFAULT 0,
+    rows_processed INTEGER DEFAULT 0,
+    inserted INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    skipped INTEGER DEFAULT 0,
+    failed INTEGER DEFAULT 0,
+    failed_rows JSON,
+    chunk_stats JSON,
+    error_message TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_import_jobs_user_id ON import_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs(status);
@@ -0,0 +1,25 @@
+-- Migration 018 (Postgres): Keyset-paginated payout history and payout rollup
+-- Created: 2026-10-19
+-- Same as 018_payout_history.sql, plus a pattern-ops index so the order_id
+-- prefix search (LIKE 'term%') is an index range scan under any collation.
+
+CREATE INDEX IF NOT EXISTS idx_orders_date_id ON orders(date, id);
+CREATE INDEX IF NOT EXISTS idx_orders_order_id_prefix ON orders(order_id varchar_pattern_ops);
+
+CREATE TABLE IF NOT EXISTS payout_daily_summary (
+    shopee_account_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    payout_status VARCHAR(50) NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    commission_total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (shopee_account_id, day, payout_status)
+);
+
+BEGIN;
+DELETE FROM payout_daily_summary;
+INSERT INTO payout_daily_summary (shopee_account_id, day, payout_status, order_count, commission_total)
+SELECT shopee_account_id, date::date, COALESCE(payout_status, 'pending'), COUNT(id), COALESCE(SUM(commission_amount), 0)
+FROM orders
+WHERE status = 'completed'
+GROUP BY shopee_account_id, date::date, COALESCE(payout_status, 'pending');
+COMMIT;
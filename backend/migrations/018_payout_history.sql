@@ -0,0 +1,22 @@
+-- Migration 018: Keyset-paginated payout history and payout rollup
+-- Created: 2026-10-19
+-- payout_daily_summary is refreshed by the order upsert and mark-paid paths;
+-- the backfill below seeds it from existing orders.
+
+CREATE INDEX IF NOT EXISTS idx_orders_date_id ON orders(date, id);
+
+CREATE TABLE IF NOT EXISTS payout_daily_summary (
+    shopee_account_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    payout_status VARCHAR(50) NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    commission_total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (shopee_account_id, day, payout_status)
+);
+
+DELETE FROM payout_daily_summary;
+INSERT INTO payout_daily_summary (shopee_account_id, day, payout_status, order_count, commission_total)
+SELECT shopee_account_id, DATE(date), COALESCE(payout_status, 'pending'), COUNT(id), COALESCE(SUM(commission_amount), 0)
+FROM orders
+WHERE status = 'completed'
+GROUP BY shopee_account_id, DATE(date), COALESCE(payout_status, 'pending');
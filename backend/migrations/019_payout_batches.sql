@@ -0,0 +1,29 @@
+-- Migration 019: Background bulk mark-paid batches
+-- Created: 2026-10-19
+-- Order ids are marked paid PAYOUT_BATCH_CHUNK_IDS per transaction;
+-- chunks_done is the resume point after a restart.
+
+CREATE TABLE IF NOT EXISTS payout_batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    payment_method VARCHAR(50) NOT NULL,
+    source VARCHAR(10) NOT NULL,
+    filename VARCHAR(255),
+    order_ids JSON NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    chunk_size INTEGER NOT NULL,
+    total_ids INTEGER DEFAULT 0,
+    chunks_done INTEGER DEFAULT 0,
+    ids_processed INTEGER DEFAULT 0,
+    matched INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    chunk_stats JSON,
+    error_message TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME,
+    finished_at DATETIME,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_payout_batches_user_id ON payout_batches(user_id);
+CREATE INDEX IF NOT EXISTS idx_payout_batches_status ON payout_batches(status);
@@ -0,0 +1,28 @@
+-- Migration 020 (Postgres): Sales reports from the daily order fact rollup
+-- Created: 2026-10-19
+-- Same as 020_report_facts.sql with Postgres types; the backfill runs in one
+-- transaction so the summary cards never read an empty rollup.
+
+ALTER TABLE payout_daily_summary ADD COLUMN IF NOT EXISTS gmv_total NUMERIC(14, 2) NOT NULL DEFAULT 0;
+
+BEGIN;
+DELETE FROM payout_daily_summary;
+INSERT INTO payout_daily_summary (shopee_account_id, day, payout_status, order_count, gmv_total, commission_total)
+SELECT shopee_account_id, date::date, COALESCE(payout_status, 'pending'), COUNT(id),
+       COALESCE(SUM(total_amount), 0), COALESCE(SUM(commission_amount), 0)
+FROM orders
+WHERE status = 'completed'
+GROUP BY shopee_account_id, date::date, COALESCE(payout_status, 'pending');
+COMMIT;
+
+CREATE TABLE IF NOT EXISTS report_range_cache (
+    filter_hash VARCHAR(64) PRIMARY KEY,
+    from_date DATE NOT NULL,
+    to_date DATE NOT NULL,
+    account_id INTEGER,
+    rows JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_range_cache_range ON report_range_cache(from_date, to_date);
+CREATE INDEX IF NOT EXISTS idx_report_range_cache_created_at ON report_range_cache(created_at);
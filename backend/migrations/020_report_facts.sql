@@ -0,0 +1,26 @@
+-- Migration 020: Sales reports from the daily order fact rollup
+-- Created: 2026-10-19
+-- payout_daily_summary gains GMV so reports aggregate it instead of orders;
+-- closed-range report rows are cached in report_range_cache.
+
+ALTER TABLE payout_daily_summary ADD COLUMN gmv_total NUMERIC(14, 2) NOT NULL DEFAULT 0;
+
+DELETE FROM payout_daily_summary;
+INSERT INTO payout_daily_summary (shopee_account_id, day, payout_status, order_count, gmv_total, commission_total)
+SELECT shopee_account_id, DATE(date), COALESCE(payout_status, 'pending'), COUNT(id),
+       COALESCE(SUM(total_amount), 0), COALESCE(SUM(commission_amount), 0)
+FROM orders
+WHERE status = 'completed'
+GROUP BY shopee_account_id, DATE(date), COALESCE(payout_status, 'pending');
+
+CREATE TABLE IF NOT EXISTS report_range_cache (
+    filter_hash VARCHAR(64) PRIMARY KEY,
+    from_date DATE NOT NULL,
+    to_date DATE NOT NULL,
+    account_id INTEGER,
+    rows JSON NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_range_cache_range ON report_range_cache(from_date, to_date);
+CREATE INDEX IF NOT EXISTS idx_report_range_cache_created_at ON report_range_cache(created_at);
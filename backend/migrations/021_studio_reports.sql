@@ -0,0 +1,10 @@
+-- Migration 021: Persisted studio reports
+-- Created: 2026-10-19
+-- The report scheduler materializes daily reports and merges them into
+-- weekly/monthly ones; one row per (studio, report type, period).
+
+ALTER TABLE reports ADD COLUMN period_start DATE;
+ALTER TABLE reports ADD COLUMN period_end DATE;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uix_reports_studio_period ON reports(studio_id, report_type, period);
+CREATE INDEX IF NOT EXISTS idx_reports_type_period_start ON reports(report_type, period_start);
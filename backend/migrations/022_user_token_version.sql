@@ -0,0 +1,6 @@
+-- Migration 022: Token version for access token revocation
+-- Created: 2026-10-19
+-- Access tokens carry a `ver` claim; bumping users.token_version (on
+-- deactivation or role change) revokes every token issued before.
+
+ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,61 @@
+-- Migration 023 (Postgres): Monthly range partitions for activity_logs
+-- Created: 2026-10-19
+-- Rebuilds activity_logs as a table partitioned by month on created_at, with
+-- one partition per month from the oldest row through two months ahead, and
+-- copies the existing rows. The app's maintenance pass keeps creating future
+-- partitions and, with ACTIVITY_LOG_RETENTION_MONTHS, drops expired ones.
+-- There is no SQLite counterpart: SQLite keeps the single table and
+-- retention deletes by month range.
+
+BEGIN;
+
+ALTER TABLE activity_logs RENAME TO activity_logs_unpartitioned;
+ALTER INDEX IF EXISTS ix_activity_logs_id RENAME TO ix_activity_logs_unpartitioned_id;
+ALTER INDEX IF EXISTS ix_activity_logs_user_id RENAME TO ix_activity_logs_unpartitioned_user_id;
+ALTER INDEX IF EXISTS ix_activity_logs_created_at RENAME TO ix_activity_logs_unpartitioned_created_at;
+ALTER INDEX IF EXISTS idx_activity_logs_user_id RENAME TO idx_activity_logs_unpartitioned_user_id;
+ALTER INDEX IF EXISTS idx_activity_logs_created_at RENAME TO idx_activity_logs_unpartitioned_created_at;
+
+CREATE TABLE activity_logs (
+    id SERIAL,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    action VARCHAR(100) NOT NULL,
+    entity_type VARCHAR(50),
+    entity_id INTEGER,
+    old_value JSON,
+    new_value JSON,
+    ip_address VARCHAR(50),
+    user_agent TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX ix_activity_logs_user_id ON activity_logs(user_id);
+CREATE INDEX ix_activity_logs_created_at ON activity_logs(created_at);
+
+DO $$
+DECLARE
+    m DATE := date_trunc('month', COALESCE((SELECT MIN(created_at) FROM activity_logs_unpartitioned), NOW()))::date;
+    last_month DATE := date_trunc('month', GREATEST(
+        COALESCE((SELECT MAX(created_at) FROM activity_logs_unpartitioned), NOW()),
+        NOW() + INTERVAL '2 months'
+    ))::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF activity_logs FOR VALUES FROM (%L) TO (%L)',
+            'activity_logs_' || to_char(m, 'YYYYMM'), m, (m + INTERVAL '1 month')::date
+        );
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+INSERT INTO activity_logs (id, user_id, action, entity_type, entity_id, old_value, new_value, ip_address, user_agent, created_at)
+SELECT id, user_id, action, entity_type, entity_id, old_value, new_value, ip_address, user_agent, COALESCE(created_at, NOW())
+FROM activity_logs_unpartitioned;
+
+SELECT setval(pg_get_serial_sequence('activity_logs', 'id'), COALESCE((SELECT MAX(id) FROM activity_logs), 0) + 1, false);
+
+DROP TABLE activity_logs_unpartitioned;
+
+COMMIT;
@@ -0,0 +1,17 @@
+-- Migration 024: Composite indexes for keyset-paginated activity logs
+-- Created: 2026-10-19
+-- The log page filters by user, action or entity type (plus a date range)
+-- and pages by (created_at, id) descending; each filter gets an index ending
+-- in the keyset so a page is one index range scan. They supersede the
+-- single-column user_id and created_at indexes. Valid on SQLite and on
+-- Postgres, where indexes on the partitioned table cascade to every partition.
+
+DROP INDEX IF EXISTS ix_activity_logs_user_id;
+DROP INDEX IF EXISTS ix_activity_logs_created_at;
+DROP INDEX IF EXISTS idx_activity_logs_user_id;
+DROP INDEX IF EXISTS idx_activity_logs_created_at;
+
+CREATE INDEX IF NOT EXISTS idx_activity_logs_created_id ON activity_logs(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_activity_logs_user_created ON activity_logs(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_activity_logs_action_created ON activity_logs(action, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_activity_logs_entity_created ON activity_logs(entity_type, created_at, id);
@@ -0,0 +1,89 @@
+"""
+Concurrent load test for hot API endpoints.
+
+Fires requests from N concurrent clients for a fixed duration and reports
+throughput and latency, so runs before/after a change can be compared on the
+same machine and database.
+
+Usage:
+    python scripts/load_test.py --base-url http://localhost:8000 \
+        --access-code BOT-CODE --concurrency 50 --duration 20
+
+    # Specific endpoints (repeatable), default is the bot dashboard/status set
+    python scripts/load_test.py --path /api/bot/status --path /api/bot/dashboard/ads
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/bot/status",
+    "/api/bot/dashboard/creator-live",
+    "/api/bot/dashboard/ads",
+    "/api/bot/realtime-snapshots/latest",
+]
+
+
+async def _worker(client: httpx.AsyncClient, paths, deadline: float, latencies: list, errors: list, offset: int):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(base_url: str, access_code: str, paths, concurrency: int, duration: float):
+    latencies: list = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"X-Access-Code": access_code},
+        limits=limits,
+        timeout=30.0
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*[
+            _worker(client, paths, deadline, latencies, errors, n) for n in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(f"Endpoints:   {', '.join(paths)}")
+    print(f"Concurrency: {concurrency}, duration: {elapsed:.1f}s")
+    print(f"Requests:    {len(latencies)} ok, {len(errors)} errors")
+    print(f"Throughput:  {len(latencies) / elapsed:.1f} req/s")
+    if latencies:
+        ordered = sorted(latencies)
+        p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+        print(f"Latency ms:  p50={statistics.median(ordered):.1f} p95={p95:.1f} max={ordered[-1]:.1f}")
+    if errors:
+        print(f"Errors:      {sorted(set(map(str, errors)))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for hot API endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--access-code", default="")
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base_url, args.access_code, args.paths or DEFAULT_PATHS, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
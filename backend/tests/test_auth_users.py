@@ -41,6 +41,18 @@ def setup_database():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_user_state_cache():
+    """User ids are reused across tests; start each one with cold auth/scope caches and no login failures"""
+    from app.auth.user_state import user_state_cache
+    from app.auth.login_throttle import login_throttle
+    from app.core.rbac import account_scope_cache
+    user_state_cache.clear()
+    login_throttle.clear()
+    account_scope_cache.clear()
+    yield
+
+
 @pytest.fixture
 def super_admin_user():
     """Create a super admin user for testing"""
@@ -224,6 +236,25 @@ class TestAuthentication:
         assert response.status_code == 401
         assert "Incorrect username or password" in response.json()["detail"]
     
+    def test_login_throttled_after_repeated_failures(self, super_admin_user):
+        """Failed attempts beyond the per-user limit get 429 without a password check"""
+        from app.auth.password_pool import password_pool
+        for _ in range(5):
+            response = client.post(
+                "/api/auth/login",
+                json={"username": super_admin_user["username"], "password": "WrongPassword!"}
+            )
+            assert response.status_code == 401
+        
+        checks = password_pool.stats()["submitted"]
+        response = client.post(
+            "/api/auth/login",
+            json={"username": super_admin_user["username"], "password": super_admin_user["password"]}
+        )
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+        assert password_pool.stats()["submitted"] == checks
+    
     def test_login_nonexistent_user(self):
         """Test login with non-existent username"""
         response = client.post(
@@ -556,6 +587,44 @@ class TestUserUpdate:
         )
         assert response.status_code == 200
         assert response.json()["role"] == "admin"
+    
+    def test_role_change_revokes_tokens(self, super_admin_user, leader_user):
+        """Tokens issued before a role change stop working immediately"""
+        admin_headers = get_auth_header(super_admin_user["username"], super_admin_user["password"])
+        leader_headers = get_auth_header(leader_user["username"], leader_user["password"])
+        assert client.get("/api/auth/me", headers=leader_headers).status_code == 200
+        
+        response = client.put(f"/api/users/{leader_user['id']}", headers=admin_headers, json={"role": "affiliate"})
+        assert response.status_code == 200
+        
+        response = client.get("/api/auth/me", headers=leader_headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token has been revoked"
+        
+        # A fresh login carries the new role
+        leader_headers = get_auth_header(leader_user["username"], leader_user["password"])
+        assert client.get("/api/auth/me", headers=leader_headers).json()["role"] == "affiliate"
+    
+    def test_revocation_drops_cache_only_after_commit(self, leader_user):
+        """A re-read before commit cannot re-cache the old token version past the commit"""
+        from app.models.user import User
+        from app.auth.user_state import load_user_state, revoke_tokens, user_state_cache
+        
+        db = TestingSessionLocal()
+        other = TestingSessionLocal()
+        try:
+            user = db.query(User).get(leader_user["id"])
+            old_version = load_user_state(other, user.id).token_version
+            
+            revoke_tokens(user)
+            assert user_state_cache.get(user.id) is not None  # Not committed yet
+            
+            db.commit()
+            assert user_state_cache.get(user.id) is None
+            assert load_user_state(other, user.id).token_version == old_version + 1
+        finally:
+            db.close()
+            other.close()
 
 
 class TestUserDeletion:
@@ -721,6 +790,56 @@ class TestRBAC:
         # Should include the affiliate
         assert any(u["id"] == affiliate_user["id"] for u in team)
 
+    def test_account_scope_follows_assignments(self, super_admin_user, admin_user, leader_user):
+        """Scopes are cached, unrestricted for full-access roles, and dropped on assignment changes"""
+        from app.models.studio import Studio
+        from app.models.shopee_account import ShopeeAccount
+        from app.models.user import User
+        from app.core.rbac import get_account_scope, account_scope_cache
+        from app.services.auto_connect import AutoConnectService
+
+        db = TestingSessionLocal()
+        studio = Studio(name="Scope Studio")
+        db.add(studio)
+        db.flush()
+        first = ShopeeAccount(studio_id=studio.id, account_name="scope_a")
+        second = ShopeeAccount(studio_id=studio.id, account_name="scope_b")
+        db.add_all([first, second])
+        db.commit()
+        try:
+            admin = db.query(User).get(super_admin_user["id"])
+            leader = db.query(User).get(leader_user["id"])
+            assert get_account_scope(db, admin).unrestricted
+            assert second.id in get_account_scope(db, admin)
+
+            assert not get_account_scope(db, leader)
+            AutoConnectService.ensure_assignment(db, leader, first)
+            db.commit()
+            scope = get_account_scope(db, leader)
+            assert first.id in scope and second.id not in scope
+            assert get_account_scope(db, leader) is scope  # Served from cache
+
+            headers = get_auth_header(leader_user["username"], leader_user["password"])
+            response = client.get("/api/shopee-accounts/my", headers=headers)
+            assert [a["id"] for a in response.json()] == [first.id]
+            assert account_scope_cache.stats()["hits"] >= 1
+
+            # admin is not a full-account role
+            assert not get_account_scope(db, db.query(User).get(admin_user["id"]))
+
+            # Unknown accounts 404 even for unrestricted scopes; others' accounts 403
+            curve = "/api/live-streaming/accounts/{}/metric-sessions"
+            root_headers = get_auth_header(super_admin_user["username"], super_admin_user["password"])
+            assert client.get(curve.format(second.id + 1000), headers=root_headers).status_code == 404
+            assert client.get(curve.format(second.id), headers=headers).status_code == 403
+            assert client.get(curve.format(first.id), headers=headers).status_code == 200
+        finally:
+            db.delete(first)
+            db.delete(second)
+            db.delete(studio)
+            db.commit()
+            db.close()
+
 
 class TestActivityLogs:
     """Test activity logging"""
@@ -736,6 +855,12 @@ class TestActivityLogs:
             }
         )
         
+        # The audit writer's periodic flush, which isn't running under TestClient
+        from app.services.audit_log import flush_audit_log
+        db = TestingSessionLocal()
+        flush_audit_log(db)
+        db.close()
+        
         # Check activity logs
         headers = get_auth_header(admin_user["username"], admin_user["password"])
         response = client.get(f"/api/activity-logs/user/{admin_user['id']}", headers=headers)
@@ -769,6 +894,73 @@ class TestActivityLogs:
         
         response = client.get(f"/api/activity-logs/user/{leader_user['id']}", headers=headers)
         assert response.status_code == 403
+    
+    def test_keyset_pages_cover_all_rows(self, admin_user):
+        """Cursor pages walk (created_at, id) newest first without gaps, ties included"""
+        from datetime import datetime
+        from app.models.activity_log import ActivityLog
+        
+        db = TestingSessionLocal()
+        stamp = datetime(2026, 3, 1, 12, 0, 0)
+        db.add_all([
+            ActivityLog(user_id=admin_user["id"], action="keyset_probe", entity_type="probe", created_at=stamp)
+            for _ in range(5)
+        ])
+        db.commit()
+        expected = [row.id for row in db.query(ActivityLog.id).filter(
+            ActivityLog.action == "keyset_probe"
+        ).order_by(ActivityLog.id.desc())]
+        
+        headers = get_auth_header(admin_user["username"], admin_user["password"])
+        try:
+            seen, cursor = [], None
+            while True:
+                params = {"action": "keyset_probe", "limit": 2, "include_total": "true"}
+                if cursor:
+                    params["cursor"] = cursor
+                response = client.get("/api/activity-logs/page", headers=headers, params=params)
+                assert response.status_code == 200
+                body = response.json()
+                assert body["approximate_total"] == 5
+                seen += [log["id"] for log in body["items"]]
+                cursor = body["next_cursor"]
+                if not cursor:
+                    break
+            assert seen == expected
+            
+            response = client.get(
+                "/api/activity-logs/page", headers=headers, params={"cursor": "not-a-cursor"}
+            )
+            assert response.status_code == 400
+        finally:
+            db.query(ActivityLog).filter(ActivityLog.action == "keyset_probe").delete()
+            db.commit()
+            db.close()
+    
+    def test_audit_events_buffered_until_flush(self, admin_user):
+        """Handlers only queue audit events; the writer inserts them in a batch"""
+        from datetime import date
+        from app.models.activity_log import ActivityLog
+        from app.services.audit_log import audit_log, flush_audit_log, drop_before
+        
+        db = TestingSessionLocal()
+        try:
+            flush_audit_log(db)
+            for _ in range(3):
+                audit_log.record("audit_probe", user_id=admin_user["id"], new_value={"n": 1})
+            probes = db.query(ActivityLog).filter(ActivityLog.action == "audit_probe")
+            assert probes.count() == 0
+            
+            assert flush_audit_log(db) == 3
+            assert probes.count() == 3
+            assert audit_log.stats()["pending"] == 0
+            
+            # SQLite is not partitioned: retention deletes by month range
+            assert drop_before(db, date.today()) == 0
+            assert drop_before(db, date(2100, 1, 1)) >= 3
+            assert probes.count() == 0
+        finally:
+            db.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,318 @@
+"""
+Automated tests for 24H Playwright Bot ingest endpoints.
+
+Run: pytest tests/test_bot_ingest.py -v
+"""
+import os
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.auth.access_code import access_code_cache
+from app.database import Base, get_db, get_async_db, to_async_url
+from app.auth.jwt import get_password_hash
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_TEST_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    """Override database dependency for testing"""
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def bot_headers():
+    """Create a user with an access code and return bot auth headers"""
+    from app.models.user import User
+
+    db = TestingSessionLocal()
+    user = User(
+        username="test_bot",
+        email="bot@test.com",
+        password_hash=get_password_hash("BotUser123!"),
+        role="admin",
+        access_code="BOT-TEST-CODE",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    yield {"X-Access-Code": "BOT-TEST-CODE"}
+
+    db = TestingSessionLocal()
+    db.query(User).filter(User.id == user_id).delete()
+    db.commit()
+    db.close()
+    access_code_cache.clear()  # The row was deleted behind the cache's back
+
+
+def _admin_headers():
+    """JWT headers for the access-code user created by bot_headers (role admin)"""
+    from app.models.user import User
+    from app.auth.jwt import create_access_token
+    from app.auth.user_state import token_claims
+
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "test_bot").one()
+    token = create_access_token(token_claims(user))
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _snapshot(account_id, snapshot_type, scraped_at, **data):
+    return {
+        "shopee_account_id": account_id,
+        "shop_name": f"Shop {account_id}",
+        "snapshot_type": snapshot_type,
+        "data": data,
+        "scraped_at": scraped_at,
+    }
+
+
+class TestLatestSnapshots:
+    """Latest-per-account reads served from realtime_snapshot_latest"""
+
+    def test_latest_keeps_newest_per_account(self, bot_headers):
+        client.post("/api/bot/realtime-snapshots/ingest-batch", headers=bot_headers, json={"snapshots": [
+            _snapshot("acc_a", "creator_live", "2026-01-18T10:00:00", orders_ready_to_ship=1, pending_orders=1),
+            _snapshot("acc_a", "creator_live", "2026-01-18T10:05:00", orders_ready_to_ship=5, pending_orders=2),
+            _snapshot("acc_b", "creator_live", "2026-01-18T10:01:00", orders_ready_to_ship=3, pending_orders=0),
+        ]})
+        # A late retry with an older timestamp must not roll back the latest row
+        client.post("/api/bot/realtime-snapshots/ingest", headers=bot_headers,
+                    json=_snapshot("acc_a", "creator_live", "2026-01-18T09:00:00", orders_ready_to_ship=99))
+
+        response = client.get("/api/bot/realtime-snapshots/latest?snapshot_type=creator_live", headers=bot_headers)
+        assert response.status_code == 200
+        snapshots = {s["shopee_account_id"]: s for s in response.json()["snapshots"]}
+        assert len(snapshots) == 2
+        assert snapshots["acc_a"]["data"]["orders_ready_to_ship"] == 5
+
+        overview = client.get("/api/bot/dashboard/creator-live", headers=bot_headers).json()
+        assert overview["total_accounts"] == 2
+        assert overview["total_orders_ready"] == 8
+        assert overview["total_pending"] == 2
+
+    def test_ads_overview_sums_typed_columns(self, bot_headers):
+        client.post("/api/bot/realtime-snapshots/ingest-batch", headers=bot_headers, json={"snapshots": [
+            _snapshot("acc_x", "ads", "2026-01-18T11:00:00", spend_today=100.5, budget_available=50, coins="12"),
+            _snapshot("acc_y", "ads", "2026-01-18T11:00:00", spend_today=20, budget_available=10, coins=3),
+        ]})
+
+        overview = client.get("/api/bot/dashboard/ads", headers=bot_headers).json()
+        assert overview["total_accounts"] == 2
+        assert overview["total_spend_today"] == 120.5
+        assert overview["total_budget_available"] == 60
+        assert overview["total_coins"] == 15
+
+    def test_retried_ingest_is_deduplicated(self, bot_headers):
+        snap = _snapshot("acc_dup", "creator_live", "2026-01-18T12:00:00", orders_ready_to_ship=4)
+        first = client.post("/api/bot/realtime-snapshots/ingest", headers=bot_headers, json=snap).json()
+        retry = client.post("/api/bot/realtime-snapshots/ingest", headers=bot_headers, json=snap).json()
+        assert first["deduplicated"] is False
+        assert retry["deduplicated"] is True
+        assert retry["snapshot_id"] == first["snapshot_id"]
+
+        batch = client.post("/api/bot/realtime-snapshots/ingest-batch", headers=bot_headers, json={"snapshots": [
+            snap,
+            _snapshot("acc_dup", "creator_live", "2026-01-18T12:05:00", orders_ready_to_ship=6),
+            _snapshot("acc_dup", "creator_live", "2026-01-18T12:05:00", orders_ready_to_ship=6),
+        ]}).json()
+        assert batch["ingested"] == 1
+        assert batch["deduplicated"] == 2
+
+
+class TestBotStatus:
+    """Status served from the heartbeat table"""
+
+    def test_heartbeat_tracks_failures_and_staleness(self, bot_headers):
+        from datetime import datetime, timedelta
+
+        now = datetime.utcnow()
+        for seconds_ago in (0, 30):
+            scraped_at = (now - timedelta(seconds=seconds_ago)).isoformat()
+            client.post("/api/bot/realtime-snapshots/ingest", headers=bot_headers,
+                        json=_snapshot("acc_hb", "creator_live", scraped_at, orders_ready_to_ship=1))
+
+        for _ in range(2):
+            response = client.post("/api/bot/heartbeat", headers=bot_headers, json={
+                "worker_id": "worker-1",
+                "cycle_duration_ms": 4200,
+                "accounts": [
+                    {"shopee_account_id": "acc_hb", "success": True, "duration_ms": 1500},
+                    {"shopee_account_id": "acc_hung", "success": False, "duration_ms": 30000, "error": "timeout"},
+                ]
+            })
+            assert response.status_code == 200
+
+        status_data = client.get("/api/bot/status", headers=bot_headers).json()
+        assert status_data["is_active"] is True
+        assert status_data["recent_snapshots_count"] >= 2  # Snapshots in the window, not accounts
+
+        worker = next(w for w in status_data["workers"] if w["key"] == "worker-1")
+        assert worker["cycles_total"] == 2
+        assert worker["last_cycle_duration_ms"] == 4200
+
+        accounts = {a["key"]: a for a in status_data["accounts"]}
+        assert accounts["acc_hb"]["is_stale"] is False
+        assert accounts["acc_hb"]["consecutive_failures"] == 0
+        assert accounts["acc_hung"]["consecutive_failures"] == 2
+        assert accounts["acc_hung"]["last_error"] == "timeout"
+
+    def test_run_lifecycle_records_throughput(self, bot_headers):
+        started = client.post("/api/bot/runs/start", headers=bot_headers, json={
+            "accounts_total": 3, "max_workers": 2, "worker_id": "worker-1"
+        })
+        assert started.status_code == 200
+        run_id = started.json()["run_id"]
+
+        for account_id, success, duration in [("a1", True, 1000), ("a2", True, 2000), ("a3", False, 9000)]:
+            response = client.post(f"/api/bot/runs/{run_id}/progress", headers=bot_headers, json={
+                "shopee_account_id": account_id, "success": success, "duration_ms": duration, "snapshots": 2 if success else 0
+            })
+            assert response.status_code == 200
+
+        finished = client.post(f"/api/bot/runs/{run_id}/finish", headers=bot_headers, json={"status": "completed"}).json()
+        assert finished["accounts_processed"] == 3
+        assert finished["accounts_success"] == 2
+        assert finished["accounts_failed"] == 1
+        assert finished["snapshots_count"] == 4
+        assert finished["p95_scrape_ms"] == 9000
+
+        # A finished run no longer accepts progress
+        late = client.post(f"/api/bot/runs/{run_id}/progress", headers=bot_headers, json={
+            "shopee_account_id": "a1", "success": True
+        })
+        assert late.status_code == 404
+
+        trends = client.get("/api/bot/runs/trends?target_interval_ms=10000", headers=bot_headers).json()
+        assert trends["runs_analyzed"] >= 1
+        assert trends["suggested_max_workers"] == 3  # ceil(3 * (9000 + 1000) / 10000)
+
+
+class TestSnapshotRetention:
+    """Rollup and drop of raw snapshots older than the retention window"""
+
+    def test_retention_rolls_up_and_drops_old_rows(self, bot_headers):
+        from app.models.realtime_snapshot import RealtimeSnapshot, RealtimeSnapshotRollup
+
+        client.post("/api/bot/realtime-snapshots/ingest-batch", headers=bot_headers, json={"snapshots": [
+            _snapshot("acc_r", "ads", "2020-01-01T10:01:00", spend_today=10, coins=5),
+            _snapshot("acc_r", "ads", "2020-01-01T10:03:00", spend_today=30, coins=4),
+            _snapshot("acc_r", "ads", "2020-01-01T10:07:00", spend_today=20, coins=4),
+        ]})
+
+        # Access codes cannot trigger retention; an admin session can
+        response = client.post("/api/bot/maintenance/retention", headers=bot_headers)
+        assert response.status_code in (401, 403)
+        response = client.post("/api/bot/maintenance/retention", headers=_admin_headers())
+        assert response.status_code == 200
+        assert response.json()["raw_rows_rolled_up"] >= 3
+
+        db = TestingSessionLocal()
+        assert db.query(RealtimeSnapshot).filter(RealtimeSnapshot.shopee_account_id == "acc_r").count() == 0
+        hourly = db.query(RealtimeSnapshotRollup).filter(
+            RealtimeSnapshotRollup.shopee_account_id == "acc_r",
+            RealtimeSnapshotRollup.resolution == "1h"
+        ).one()
+        db.close()
+        assert hourly.sample_count == 3
+        assert hourly.metrics["spend_today"] == {"min": 10.0, "max": 30.0, "last": 20.0}
+
+        five_min = client.get(
+            "/api/bot/realtime-snapshots/rollups?account_id=acc_r&snapshot_type=ads&resolution=5m",
+            headers=bot_headers
+        ).json()
+        assert [r["sample_count"] for r in five_min["rollups"]] == [2, 1]
+
+    @pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="needs TEST_POSTGRES_URL (partitioning is Postgres-only)")
+    def test_partition_catch_up_moves_rows_out_of_default(self):
+        from datetime import date
+        from sqlalchemy import text
+        from app.services.snapshot_retention import SnapshotRetentionService
+
+        pg_engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+        db = sessionmaker(bind=pg_engine)()
+        try:
+            db.execute(text("DROP SCHEMA IF EXISTS retention_test CASCADE; CREATE SCHEMA retention_test"))
+            db.execute(text("SET search_path TO retention_test"))
+            db.execute(text(
+                "CREATE TABLE realtime_snapshots (id SERIAL, shopee_account_id VARCHAR(100) NOT NULL, "
+                "shop_name VARCHAR(255), snapshot_type VARCHAR(50) NOT NULL, data JSON NOT NULL, "
+                "scraped_at TIMESTAMP NOT NULL, created_at TIMESTAMP, PRIMARY KEY (id, scraped_at)) "
+                "PARTITION BY RANGE (scraped_at); "
+                "CREATE TABLE realtime_snapshots_default PARTITION OF realtime_snapshots DEFAULT"
+            ))
+            # A future-dated row lands in the default partition before its day exists
+            db.execute(text(
+                "INSERT INTO realtime_snapshots (shopee_account_id, snapshot_type, data, scraped_at) "
+                "VALUES ('acc_p', 'ads', '{}', '2030-01-02 08:00')"
+            ))
+            db.commit()
+
+            created = SnapshotRetentionService.ensure_partitions(db, today=date(2030, 1, 1))
+
+            assert created == [f"realtime_snapshots_p2030010{d}" for d in (1, 2, 3)]
+            assert db.execute(text("SELECT count(*) FROM realtime_snapshots_p20300102")).scalar() == 1
+            assert db.execute(text("SELECT count(*) FROM realtime_snapshots_default")).scalar() == 0
+            # A second pass finds every day in place
+            assert SnapshotRetentionService.ensure_partitions(db, today=date(2030, 1, 1)) == []
+        finally:
+            db.rollback()
+            db.execute(text("DROP SCHEMA IF EXISTS retention_test CASCADE"))
+            db.commit()
+            db.close()
+            pg_engine.dispose()
+
+
+class TestAccessCodeCache:
+    """Access-code resolution served from the in-process cache"""
+
+    def test_repeat_requests_hit_cache_until_invalidated(self, bot_headers):
+        from app.models.user import User
+
+        client.get("/api/bot/realtime-snapshots/latest", headers=bot_headers)
+        hits = access_code_cache.stats()["hits"]
+        assert client.get("/api/bot/realtime-snapshots/latest", headers=bot_headers).status_code == 200
+        assert access_code_cache.stats()["hits"] == hits + 1
+
+        # Deactivation goes through revoke_tokens, which drops the cached entry
+        from app.auth.user_state import revoke_tokens
+        db = TestingSessionLocal()
+        user = db.query(User).filter(User.access_code == "BOT-TEST-CODE").one()
+        user.is_active = False
+        revoke_tokens(user)
+        db.commit()
+        db.close()
+        assert client.get("/api/bot/realtime-snapshots/latest", headers=bot_headers).status_code == 403
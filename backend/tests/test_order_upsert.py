@@ -0,0 +1,245 @@
+"""
+Tests for the shared bulk order upsert.
+
+Run: pytest tests/test_order_upsert.py -v
+"""
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.order import Order
+from app.services.order_upsert import OrderUpsertService
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    yield session
+    session.query(Order).delete()
+    session.commit()
+    session.close()
+
+
+UPDATE_COLUMNS = ("total_amount", "commission_amount", "status")
+
+
+def _row(order_id, **values):
+    return {"order_id": order_id, "shopee_account_id": 1, "date": datetime(2026, 1, 18), **values}
+
+
+class TestBulkUpsert:
+
+    def test_inserts_then_updates_only_changed_rows(self, db):
+        result = OrderUpsertService.bulk_upsert(db, [
+            _row("ORD-1", total_amount=100, commission_amount=10),
+            _row("ORD-2", total_amount=50),
+        ], UPDATE_COLUMNS)
+        db.commit()
+        assert (result["inserted"], result["updated"]) == (2, 0)
+
+        result = OrderUpsertService.bulk_upsert(db, [
+            _row("ORD-1", total_amount=120, commission_amount=None),
+            _row("ORD-2", total_amount=50),
+            _row("ORD-3", total_amount=5),
+        ], UPDATE_COLUMNS)
+        db.commit()
+        assert (result["inserted"], result["updated"], result["unchanged"]) == (1, 1, 1)
+
+        orders = {o.order_id: o for o in db.query(Order).all()}
+        assert orders["ORD-1"].total_amount == Decimal("120")
+        # None never overwrites a stored value
+        assert orders["ORD-1"].commission_amount == Decimal("10")
+        assert orders["ORD-3"].status == "completed"
+        assert orders["ORD-3"].commission_amount == Decimal("0")
+
+    def test_merges_repeats_and_rejects_new_rows_without_date(self, db):
+        result = OrderUpsertService.bulk_upsert(db, [
+            _row("ORD-9", total_amount=1),
+            _row("ORD-9", total_amount=2, status="cancelled"),
+            {"order_id": "ORD-10", "shopee_account_id": 1, "date": None, "total_amount": 3},
+        ], UPDATE_COLUMNS)
+        db.commit()
+
+        assert result["inserted"] == 1
+        assert result["rejected"] == ["ORD-10"]
+        order = db.query(Order).filter(Order.order_id == "ORD-9").one()
+        assert order.total_amount == Decimal("2")
+        assert order.status == "cancelled"
+
+    def test_row_inserted_concurrently_is_updated_not_reset(self, db):
+        from sqlalchemy import event
+
+        raced = []
+
+        def insert_elsewhere(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO orders") and not raced:
+                raced.append(True)
+                other = TestingSessionLocal()
+                other.add(Order(order_id="RACE-1", shopee_account_id=1, date=datetime(2026, 1, 18),
+                                total_amount=10, commission_amount=7, payout_status="paid",
+                                paid_at=datetime(2026, 1, 20)))
+                other.commit()
+                other.close()
+
+        # Read finds nothing; the other session inserts before our INSERT runs
+        connection = db.connection()
+        event.listen(connection, "before_cursor_execute", insert_elsewhere)
+        try:
+            result = OrderUpsertService.bulk_upsert(db, [_row("RACE-1", total_amount=12)], UPDATE_COLUMNS)
+            db.commit()
+        finally:
+            event.remove(connection, "before_cursor_execute", insert_elsewhere)
+
+        assert (result["inserted"], result["updated"]) == (0, 1)
+        order = db.query(Order).filter(Order.order_id == "RACE-1").one()
+        assert order.total_amount == Decimal("12")
+        assert order.commission_amount == Decimal("7")
+        assert (order.payout_status, order.paid_at) == ("paid", datetime(2026, 1, 20))
+
+
+class TestOrderImport:
+
+    def test_parses_columns_and_reports_failures(self, db):
+        from app.services.order_import import OrderImportService, read_csv
+
+        db.add(Order(order_id="OLD-1", shopee_account_id=1, date=datetime(2026, 1, 1), total_amount=1))
+        db.commit()
+        csv = (
+            "No. Pesanan,Waktu Pesanan,Total Pembayaran,Komisi,Status\n"
+            "NEW-1,2026-01-18 10:30:00,\"Rp1.250.000,50\",Rp12.500,Lunas\n"
+            "NEW-2,18/01/2026,75000,,Menunggu validasi\n"
+            "OLD-1,,Rp2.000,,pending\n"
+            "NEW-3,bukan tanggal,Rp5.000,,\n"
+            ",2026-01-18,Rp1,,\n"
+        ).encode()
+        mapping = {"order_id": "No. Pesanan", "order_time": "Waktu Pesanan", "gmv": "Total Pembayaran",
+                   "commission_amount": "Komisi", "payout_status": "Status"}
+
+        stats = OrderImportService.execute(db, read_csv(csv), 1, "sales", mapping)
+
+        assert (stats["inserted"], stats["updated"], stats["skipped"], stats["failed"]) == (2, 1, 1, 1)
+        assert stats["failed_rows"][0]["row_index"] == 3
+        assert stats["failed_rows"][0]["raw"]["No. Pesanan"] == "NEW-3"
+        orders = {o.order_id: o for o in db.query(Order).all()}
+        assert orders["NEW-1"].date == datetime(2026, 1, 18, 10, 30)
+        assert orders["NEW-1"].total_amount == Decimal("1250000.50")
+        assert orders["NEW-1"].commission_amount == Decimal("12500")
+        assert orders["NEW-1"].payout_status == "paid"
+        assert orders["NEW-2"].date == datetime(2026, 1, 18)
+        assert orders["NEW-2"].payout_status == "validating"
+        # Existing order keeps its date, gets the new amount
+        assert orders["OLD-1"].date == datetime(2026, 1, 1)
+        assert orders["OLD-1"].total_amount == Decimal("2000")
+
+    def test_chunked_stream_keeps_row_numbers(self, db):
+        import io
+        from app.services.order_import import OrderImportService, read_csv
+
+        csv = "order_id,time,gmv\nSTR-0,2026-01-18,1\nSTR-1,,2\nSTR-2,2026-01-18,3\nSTR-3,,4\n"
+        frames = read_csv(io.BytesIO(csv.encode()), chunksize=2)
+
+        stats = OrderImportService.execute_chunks(
+            db, frames, 1, "orders", {"order_id": "order_id", "order_time": "time", "gmv": "gmv"}
+        )
+
+        assert (stats["inserted"], stats["failed"]) == (2, 2)
+        assert [row["row_index"] for row in stats["failed_rows"]] == [1, 3]
+        assert db.query(Order).filter(Order.order_id.like("STR-%")).count() == 2
+
+
+class TestImportJobs:
+
+    def test_chunked_job_resumes_after_failure(self, db, tmp_path, monkeypatch):
+        import io
+        from app.config import settings
+        from app.models.import_job import ImportJob
+        from app.services.import_jobs import ImportJobService
+        from app.services.order_import import OrderImportService
+
+        monkeypatch.setattr(settings, "import_spool_dir", str(tmp_path))
+        csv = "order_id,time,gmv\n" + "".join(f"JOB-{i},2026-01-18,{i + 1}000\n" for i in range(5))
+        job = ImportJobService.create(
+            db, io.BytesIO(csv.encode()), "export.csv", None, 1, "sales",
+            {"order_id": "order_id", "order_time": "time", "gmv": "gmv"}, chunk_size=2
+        )
+        assert job.total_rows == 5
+
+        # Simulate a crash on the second chunk: the first stays committed
+        real_import_frame = OrderImportService.import_frame
+
+        def failing_import_frame(db, frame, *args, **kwargs):
+            if frame.index[0] == 2:
+                raise RuntimeError("worker died")
+            return real_import_frame(db, frame, *args, **kwargs)
+
+        monkeypatch.setattr(OrderImportService, "import_frame", failing_import_frame)
+        assert ImportJobService.claim(db, job.id)
+        ImportJobService.run(db, job)
+        assert (job.status, job.chunks_done, job.inserted) == ("failed", 1, 2)
+        assert db.query(Order).count() == 2
+
+        monkeypatch.setattr(OrderImportService, "import_frame", real_import_frame)
+        ImportJobService.requeue(db, job)
+        assert ImportJobService.claim(db, job.id)
+        assert not ImportJobService.claim(db, job.id)  # Already running elsewhere
+        ImportJobService.run(db, job)
+
+        assert (job.status, job.chunks_done, job.rows_processed, job.inserted) == ("completed", 3, 5, 5)
+        assert [c["chunk"] for c in job.chunk_stats] == [0, 1, 2]
+        assert job.to_dict()["progress"] == 1.0
+        assert db.query(Order).filter(Order.order_id == "JOB-4").one().total_amount == Decimal("5000")
+        assert list(tmp_path.iterdir()) == []
+        db.query(ImportJob).delete()
+
+    def test_resume_counts_records_not_lines(self, tmp_path):
+        from app.services.import_jobs import iter_chunks
+
+        path = tmp_path / "export.csv"
+        path.write_text('order_id,note\nQ-0,"two\nlines"\nQ-1,x\nQ-2,y\nQ-3,z\n')
+
+        chunk, frame = next(iter_chunks(str(path), "csv", 2, start_chunk=1))
+
+        assert chunk == 1
+        assert list(frame["order_id"]) == ["Q-2", "Q-3"]
+        assert list(frame.index) == [2, 3]
+
+    def test_old_failed_jobs_lose_their_upload(self, db, tmp_path, monkeypatch):
+        import io
+        import os
+        from datetime import timedelta
+        from app.config import settings
+        from app.models.import_job import ImportJob
+        from app.services.import_jobs import ImportJobService
+
+        monkeypatch.setattr(settings, "import_spool_dir", str(tmp_path))
+        jobs = [
+            ImportJobService.create(db, io.BytesIO(b"order_id\nOLD-1\n"), "export.csv", None, 1, "sales", {})
+            for _ in range(2)
+        ]
+        now = datetime.utcnow()
+        for job, age in zip(jobs, (timedelta(days=settings.import_failed_retention_days + 1), timedelta(hours=1))):
+            job.status = "failed"
+            job.updated_at = now - age
+        db.commit()
+
+        assert ImportJobService.purge_failed(db, now) == 1
+        assert not os.path.exists(jobs[0].file_path)
+        assert os.path.exists(jobs[1].file_path)
+        with pytest.raises(ValueError):
+            ImportJobService.requeue(db, jobs[0])
+        db.query(ImportJob).delete()
+        db.commit()
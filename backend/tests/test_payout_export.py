@@ -0,0 +1,77 @@
+"""
+Tests for the streamed payout export (CSV and gzip).
+
+Run: pytest tests/test_payout_export.py -v
+"""
+import csv
+import gzip
+import io
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.order import Order
+from app.models.shopee_account import ShopeeAccount
+from app.models.payout_summary import PayoutDailySummary
+from app.models.user import User
+from app.services.payout_export import payout_export_query, stream_payouts
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    account = ShopeeAccount(studio_id=1, account_name="Toko Payout", shopee_account_id="PAYOUT-1")
+    session.add(account)
+    session.flush()
+    session.add_all([
+        Order(order_id=f"PAY-{day}", shopee_account_id=account.id, total_amount=100,
+              commission_amount=day * 1000, date=datetime(2026, 1, day, 23, 30),
+              payout_status="paid" if day % 2 else "pending")
+        for day in range(1, 11)
+    ])
+    session.commit()
+    yield session
+    session.query(Order).delete()
+    session.query(ShopeeAccount).delete()
+    session.query(PayoutDailySummary).delete()
+    session.commit()
+    session.close()
+
+
+ADMIN = User(id=1, username="admin", role="super_admin")
+
+
+class TestPayoutExport:
+
+    def test_csv_streams_in_chunks_with_inclusive_dates(self, db):
+        query = payout_export_query(db, ADMIN, date(2026, 1, 3), date(2026, 1, 7))
+        chunks = list(stream_payouts(query, "csv"))
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+
+        assert rows[0][:3] == ["Order ID", "Date", "Account"]
+        # Late-evening orders on the end date are included
+        assert [r[0] for r in rows[1:]] == ["PAY-7", "PAY-6", "PAY-5", "PAY-4", "PAY-3"]
+        assert rows[1][2:5] == ["Toko Payout", "7000.00", "PAID"]
+        assert rows[2][6] == "-"
+
+    def test_gzip_output_matches_csv(self, db):
+        query = payout_export_query(db, ADMIN, date(2026, 1, 1), date(2026, 1, 31), status="pending")
+        plain = b"".join(stream_payouts(query, "csv"))
+        query = payout_export_query(db, ADMIN, date(2026, 1, 1), date(2026, 1, 31), status="pending")
+        compressed = b"".join(stream_payouts(query, "csv.gz"))
+
+        assert gzip.decompress(compressed) == plain
+        assert plain.decode().count("PENDING") == 5
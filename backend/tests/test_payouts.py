@@ -0,0 +1,178 @@
+"""
+Tests for payout history paging, the payout rollup and bulk mark-paid.
+
+Run: pytest tests/test_payouts.py -v
+"""
+import io
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.order import Order
+from app.models.shopee_account import ShopeeAccount
+from app.models.payout_summary import PayoutDailySummary
+from app.models.user import User
+from app.models.payout_batch import PayoutBatch
+from app.models.activity_log import ActivityLog
+from app.services.audit_log import audit_log
+from app.services.order_upsert import OrderUpsertService
+from app.services.payout_batch import PayoutBatchService, parse_order_ids, record_mark_paid
+from app.services.payout_history import PayoutHistoryService
+from app.services.payout_summary import PayoutSummaryService
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    account = ShopeeAccount(studio_id=1, account_name="Toko Payout", shopee_account_id="PAYOUT-1")
+    session.add(account)
+    session.flush()
+    session.add_all([
+        Order(order_id=f"PAY-{day}", shopee_account_id=account.id, total_amount=100,
+              commission_amount=day * 1000, date=datetime(2026, 1, day, 23, 30),
+              payout_status="paid" if day % 2 else "pending")
+        for day in range(1, 11)
+    ])
+    session.commit()
+    yield session
+    session.query(Order).delete()
+    session.query(ShopeeAccount).delete()
+    session.query(PayoutDailySummary).delete()
+    session.commit()
+    session.close()
+
+
+ADMIN = User(id=1, username="admin", role="super_admin")
+
+
+class TestPayoutHistory:
+
+    def test_cursor_pages_reach_every_row(self, db):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = PayoutHistoryService.page(
+                db, ADMIN, date(2026, 1, 1), date(2026, 1, 31), cursor=cursor, limit=3
+            )
+            seen.extend(r["order_id"] for r in rows)
+            if cursor is None:
+                break
+        assert seen == [f"PAY-{day}" for day in range(10, 0, -1)]
+
+        rows, _ = PayoutHistoryService.page(db, ADMIN, date(2026, 1, 1), date(2026, 1, 31), search="PAY-1")
+        assert sorted(r["order_id"] for r in rows) == ["PAY-1", "PAY-10"]
+        rows, _ = PayoutHistoryService.page(db, ADMIN, date(2026, 1, 1), date(2026, 1, 31), search="toko", limit=500)
+        assert len(rows) == 10
+        rows, _ = PayoutHistoryService.page(db, ADMIN, date(2026, 1, 1), date(2026, 1, 31), search="%")
+        assert rows == []
+
+    def test_rollup_follows_upserts(self, db):
+        PayoutSummaryService.rebuild(db)
+        summary = PayoutSummaryService.summarize(db, date(2026, 1, 1), date(2026, 1, 31))
+        assert summary["paid"] == {"count": 5, "total": 25000}
+        assert summary["pending"]["count"] == 5
+
+        account_id = db.query(ShopeeAccount.id).scalar()
+        OrderUpsertService.bulk_upsert(db, [
+            {"order_id": "PAY-2", "shopee_account_id": account_id, "payout_status": "paid"},
+            {"order_id": "PAY-NEW", "shopee_account_id": account_id, "date": datetime(2026, 1, 20),
+             "total_amount": 1, "commission_amount": 500},
+        ], update_columns=("payout_status",))
+        db.commit()
+
+        summary = PayoutSummaryService.summarize(db, date(2026, 1, 1), date(2026, 1, 31))
+        assert summary["paid"] == {"count": 6, "total": 27000}
+        assert summary["pending"] == {"count": 5, "total": 28500}
+        assert PayoutSummaryService.summarize(db, date(2026, 1, 2), date(2026, 1, 2))["paid"]["count"] == 1
+
+    def test_overlapping_refreshes_serialize(self, db):
+        import threading
+
+        PayoutSummaryService.rebuild(db)
+        db.commit()
+        account_id = db.query(ShopeeAccount.id).scalar()
+        first, second = TestingSessionLocal(), TestingSessionLocal()
+        errors = []
+
+        def refresh_second():
+            try:
+                PayoutSummaryService.refresh(second, [(account_id, date(2026, 1, day)) for day in (3, 8)])
+                second.commit()
+            except Exception as e:
+                errors.append(e)
+                second.rollback()
+
+        try:
+            PayoutSummaryService.refresh(first, [(account_id, date(2026, 1, day)) for day in (1, 5)])
+            worker = threading.Thread(target=refresh_second)
+            worker.start()
+            worker.join(0.2)  # Still waiting on the first refresh
+            first.commit()
+            worker.join()
+        finally:
+            first.close()
+            second.close()
+
+        assert errors == []
+        summary = PayoutSummaryService.summarize(db, date(2026, 1, 1), date(2026, 1, 31))
+        assert (summary["paid"]["count"], summary["pending"]["count"]) == (5, 5)
+        assert db.query(PayoutDailySummary).count() == 10
+
+
+class TestPayoutBatch:
+
+    def test_parse_order_ids(self):
+        export = "Order ID,Date,Account\nPAY-1,2026-01-01,Toko\nPAY-2,2026-01-02,Toko\nPAY-1,2026-01-01,Toko\n"
+        assert parse_order_ids(io.BytesIO(export.encode("utf-8-sig"))) == ["PAY-1", "PAY-2"]
+        assert parse_order_ids(io.BytesIO(b"PAY-3\r\n\r\n PAY-4 \n")) == ["PAY-3", "PAY-4"]
+
+    def test_inline_mark_paid_counts_per_chunk(self, db):
+        PayoutSummaryService.rebuild(db)
+        ids = [f"PAY-{day}" for day in range(1, 11)] + ["MISSING-1"]
+        result = PayoutBatchService.mark_paid(db, ids, "transfer", chunk_size=4)
+        db.commit()
+
+        assert [(c["ids"], c["matched"], c["updated"]) for c in result["chunks"]] == [(4, 4, 2), (4, 4, 2), (3, 2, 1)]
+        assert (result["matched"], result["updated"]) == (10, 5)
+        assert db.query(Order).filter(Order.payout_status == "paid", Order.payment_method == "transfer").count() == 5
+        assert PayoutSummaryService.summarize(db, date(2026, 1, 1), date(2026, 1, 31))["paid"]["count"] == 10
+        # The request transaction writes no audit row; the entry is buffered after commit
+        assert db.query(ActivityLog).count() == 0
+        audit_log.discard()
+        record_mark_paid(result, "transfer", user_id=1)
+        assert audit_log.pending_count() == 1
+
+        # Nothing left to update: no second audit entry
+        again = PayoutBatchService.mark_paid(db, ids, "transfer")
+        assert again["updated"] == 0
+        record_mark_paid(again, "transfer", user_id=1)
+        assert audit_log.pending_count() == 1
+        audit_log.discard()
+
+    def test_background_batch_reports_progress(self, db):
+        batch = PayoutBatchService.create(db, ["PAY-2", "PAY-4", "PAY-4", "PAY-6", "NOPE"], None, "ewallet", chunk_size=2)
+        assert batch.total_ids == 4
+        assert PayoutBatchService.claim(db, batch.id)
+        assert not PayoutBatchService.claim(db, batch.id)
+        PayoutBatchService.run(db, batch)
+
+        data = batch.to_dict()
+        assert (data["status"], data["progress"], data["updated"], data["not_found"]) == ("completed", 1.0, 3, 1)
+        assert [(c["chunk"], c["updated"]) for c in data["chunk_stats"]] == [(0, 2), (1, 1)]
+        logs = db.query(ActivityLog).all()
+        assert len(logs) == 1 and logs[0].entity_id == batch.id and logs[0].new_value["updated"] == 3
+        db.query(ActivityLog).delete()
+        db.query(PayoutBatch).delete()
+        db.commit()
@@ -0,0 +1,160 @@
+"""
+Tests for sales reports and persisted studio reports.
+
+Run: pytest tests/test_reports.py -v
+"""
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.order import Order
+from app.models.shopee_account import ShopeeAccount
+from app.models.payout_summary import PayoutDailySummary
+from app.models.report_cache import ReportRangeCache
+from app.models.report import Report
+from app.models.studio import Studio
+from app.models.employee import Employee
+from app.models.attendance import Attendance
+from app.models.ads import AdsDailySpend
+from app.services.order_upsert import OrderUpsertService
+from app.services import sales_report
+from app.services.sales_report import SalesReportService, iter_csv
+from app.services.studio_reports import StudioReportService, iter_report_csv
+from app.services.payout_summary import PayoutSummaryService
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    account = ShopeeAccount(studio_id=1, account_name="Toko Payout", shopee_account_id="PAYOUT-1")
+    session.add(account)
+    session.flush()
+    session.add_all([
+        Order(order_id=f"PAY-{day}", shopee_account_id=account.id, total_amount=100,
+              commission_amount=day * 1000, date=datetime(2026, 1, day, 23, 30),
+              payout_status="paid" if day % 2 else "pending")
+        for day in range(1, 11)
+    ])
+    session.commit()
+    yield session
+    session.query(Order).delete()
+    session.query(ShopeeAccount).delete()
+    session.query(PayoutDailySummary).delete()
+    session.commit()
+    session.close()
+
+
+class TestSalesReport:
+
+    def test_report_from_facts_with_range_cache(self, db, monkeypatch):
+        monkeypatch.setattr(sales_report, "is_closed", lambda to_date: True)
+        PayoutSummaryService.rebuild(db)
+        db.commit()
+
+        report = SalesReportService.report(db, date(2026, 1, 1), date(2026, 1, 31))
+        assert [row["date"] for row in report["data"]][:2] == ["2026-01-10", "2026-01-09"]
+        assert report["summary"]["total_orders"] == 10
+        assert report["summary"]["total_gmv"] == 1000
+        assert report["summary"]["total_commission"] == 55000
+        assert db.query(ReportRangeCache).count() == 1
+
+        # Served from the cache: the CSV matches without touching the rollup
+        names = SalesReportService.account_names(db)
+        lines = b"".join(iter_csv(SalesReportService.fact_rows(db, date(2026, 1, 1), date(2026, 1, 31)), names)).decode().splitlines()
+        assert lines[0] == "Date,Shop Name,Total Orders,Total GMV (Rp),Total Commission (Rp)"
+        assert lines[1] == '2026-01-10,Toko Payout,1,100.00,"10,000.00"'
+        assert len(lines) == 11
+
+        # A late order inside the range drops the cached entry
+        account_id = db.query(ShopeeAccount.id).scalar()
+        OrderUpsertService.bulk_upsert(db, [
+            {"order_id": "PAY-LATE", "shopee_account_id": account_id, "date": datetime(2026, 1, 5, 8),
+             "total_amount": 50, "commission_amount": 5},
+        ], update_columns=("total_amount",))
+        db.commit()
+        assert db.query(ReportRangeCache).count() == 0
+        report = SalesReportService.report(db, date(2026, 1, 1), date(2026, 1, 31))
+        assert report["summary"]["total_orders"] == 11
+        assert next(r for r in report["data"] if r["date"] == "2026-01-05")["total_gmv"] == 150
+        db.query(ReportRangeCache).delete()
+        db.commit()
+
+
+class TestStudioReports:
+
+    def test_monthly_report_merges_daily_reports(self, db):
+        PayoutSummaryService.rebuild(db)
+        account_id = db.query(ShopeeAccount.id).scalar()
+        studio = Studio(id=1, name="Studio Payout")
+        employee = Employee(studio_id=1, name="Host", role="host")
+        db.add_all([studio, employee])
+        db.flush()
+        db.add_all([
+            AdsDailySpend(date=date(2026, 1, 3), shopee_account_id=account_id, spend_amount=700),
+            Attendance(employee_id=employee.id, date=datetime(2026, 1, 3, 9), status="present"),
+            Attendance(employee_id=employee.id, date=datetime(2026, 1, 4, 9), status="late"),
+        ])
+        db.commit()
+
+        [weekly] = StudioReportService.materialize_period(db, "weekly", date(2026, 1, 7))
+        db.commit()
+        assert (weekly.period, weekly.period_start, weekly.period_end) == ("2026-W02", date(2026, 1, 5), date(2026, 1, 11))
+        assert float(weekly.total_commission) == sum(range(5, 12)) * 1000 - 11000
+        assert db.query(Report).filter(Report.report_type == "daily").count() == 7
+
+        [monthly] = StudioReportService.materialize_period(db, "monthly", date(2026, 1, 15))
+        db.commit()
+        assert monthly.period == "2026-01"
+        assert float(monthly.total_revenue) == 1000
+        assert float(monthly.total_commission) == 55000
+        assert float(monthly.total_ad_spent) == 700
+        assert monthly.attendance_summary["present"] == 1 and monthly.attendance_summary["late"] == 1
+        assert monthly.data == {"orders": 10, "days": 31}
+        assert db.query(Report).filter(Report.report_type == "daily").count() == 31
+
+        # Re-running updates in place
+        StudioReportService.materialize_period(db, "monthly", date(2026, 1, 1))
+        db.commit()
+        assert db.query(Report).filter(Report.report_type == "monthly").count() == 1
+
+        lines = b"".join(iter_report_csv(monthly, StudioReportService.daily_breakdown(db, monthly))).decode().splitlines()
+        assert len(lines) == 1 + 31 + 1
+        assert lines[-1].startswith("2026-01,2026-01-01,2026-01-31,1000.00,55000.00,700.00,10,1,1")
+
+        # A late order: reused daily reports miss it, an explicit recompute picks it up
+        db.add(Order(order_id="PAY-LATE", shopee_account_id=account_id, total_amount=100,
+                     commission_amount=9000, date=datetime(2026, 1, 2, 12), payout_status="paid"))
+        db.flush()
+        PayoutSummaryService.refresh(db, [(account_id, date(2026, 1, 2))])
+        db.commit()
+        [stale] = StudioReportService.materialize_period(db, "monthly", date(2026, 1, 1))
+        assert float(stale.total_commission) == 55000
+        [fresh] = StudioReportService.materialize_period(db, "monthly", date(2026, 1, 1), recompute=True)
+        db.commit()
+        assert float(fresh.total_commission) == 64000
+
+        # A running week only materializes the days that are over
+        StudioReportService.materialize_period(db, "weekly", date(2026, 2, 4), today=date(2026, 2, 4))
+        db.commit()
+        februaries = db.query(Report.period).filter(Report.report_type == "daily", Report.period_start >= date(2026, 2, 1))
+        assert sorted(row[0] for row in februaries) == ["2026-02-02", "2026-02-03"]
+
+        db.query(Report).delete()
+        db.query(Attendance).delete()
+        db.query(AdsDailySpend).delete()
+        db.query(Employee).delete()
+        db.query(Studio).delete()
+        db.commit()
@@ -0,0 +1,201 @@
+"""
+Automated tests for the extension Auto Connect sync endpoint.
+
+Run: pytest tests/test_shopee_data_sync.py -v
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.auth.access_code import access_code_cache
+from app.database import Base, get_db
+from app.auth.jwt import get_password_hash
+from app.services.account_cache import account_resolution_cache, resolution_key
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    """Override database dependency for testing"""
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    account_resolution_cache.clear()
+
+
+@pytest.fixture
+def extension_user():
+    """Create a user with an access code; returns (user_id, headers)"""
+    from app.models.user import User
+
+    db = TestingSessionLocal()
+    user = User(
+        username="test_extension",
+        email="extension@test.com",
+        password_hash=get_password_hash("Extension123!"),
+        role="admin",
+        access_code="EXT-TEST-CODE",
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    yield user_id, {"X-Access-Code": "EXT-TEST-CODE"}
+
+    db = TestingSessionLocal()
+    db.query(User).filter(User.id == user_id).delete()
+    db.commit()
+    db.close()
+    access_code_cache.clear()  # The row was deleted behind the cache's back
+
+
+def _sync(headers, sync_type, data, account_id="191136817", shop_name="Shopee Live 191136817"):
+    return client.post("/api/shopee-data/sync", headers=headers, json={
+        "account": {"account_id": account_id, "shop_name": shop_name},
+        "type": sync_type,
+        "data": data,
+    })
+
+
+class TestAccountResolutionCache:
+
+    def test_regular_syncs_reuse_cached_resolution(self, extension_user):
+        user_id, headers = extension_user
+
+        identity = _sync(headers, "identity", {})
+        assert identity.status_code == 200
+        db_account_id = identity.json()["db_account_id"]
+        assert account_resolution_cache.get(resolution_key(user_id, "191136817")) is None
+
+        first = _sync(headers, "transactions", {"transactions": [
+            {"order_id": "SYNC-A", "total_amount": 10, "date": "2026-01-18T10:00:00"}
+        ]})
+        assert first.status_code == 200, first.text
+        assert first.json()["db_account_id"] == db_account_id
+        assert first.json()["inserted"] == 1
+        assert account_resolution_cache.get(resolution_key(user_id, "191136817")).account_id == db_account_id
+
+        second = _sync(headers, "transactions", {"transactions": [
+            {"order_id": "SYNC-A", "total_amount": 12, "date": "2026-01-18T10:00:00"}
+        ]})
+        assert second.status_code == 200
+        assert second.json()["db_account_id"] == db_account_id
+        assert second.json()["account_created"] is False
+        assert second.json()["updated"] == 1
+
+        # Connect Account again: cached resolutions for the user are dropped
+        _sync(headers, "identity", {})
+        assert account_resolution_cache.get(resolution_key(user_id, "191136817")) is None
+
+
+class TestAccountWriteBuffer:
+
+    def test_syncs_coalesce_into_one_flushed_update(self, extension_user):
+        from app.models.shopee_account import ShopeeAccount
+        from app.services.account_write_buffer import account_write_buffer
+
+        _, headers = extension_user
+        account_write_buffer.discard()
+        db_account_id = _sync(headers, "identity", {}, account_id="555", shop_name="Shop 555").json()["db_account_id"]
+
+        for _ in range(3):
+            assert _sync(headers, "live_streaming", {}, account_id="555", shop_name="Shop 555 Renamed").status_code == 200
+        assert account_write_buffer.pending_count() == 1
+
+        db = TestingSessionLocal()
+        try:
+            assert db.get(ShopeeAccount, db_account_id).account_name == "Shop 555"
+            assert account_write_buffer.flush(db) == 1
+            # Nothing pending, and re-queuing identical values changes no rows
+            assert account_write_buffer.flush(db) == 0
+            account_write_buffer.queue(db, db_account_id, account_name="Shop 555 Renamed", is_active=True)
+            assert account_write_buffer.flush(db) == 0
+
+            db.expire_all()
+            account = db.get(ShopeeAccount, db_account_id)
+            assert account.account_name == "Shop 555 Renamed"
+            assert account.last_synced_at is not None
+        finally:
+            db.close()
+
+    def test_zero_interval_writes_inline(self, extension_user, monkeypatch):
+        from app.config import settings
+        from app.models.shopee_account import ShopeeAccount
+        from app.services.account_write_buffer import account_write_buffer
+
+        _, headers = extension_user
+        monkeypatch.setattr(settings, "account_write_flush_seconds", 0)
+        account_write_buffer.discard()
+        db_account_id = _sync(headers, "identity", {}, account_id="556", shop_name="Shop 556").json()["db_account_id"]
+        assert _sync(headers, "live_streaming", {}, account_id="556", shop_name="Shop 556 Renamed").status_code == 200
+
+        assert account_write_buffer.pending_count() == 0
+        db = TestingSessionLocal()
+        try:
+            assert db.get(ShopeeAccount, db_account_id).account_name == "Shop 556 Renamed"
+        finally:
+            db.close()
+
+
+class TestLiveMetrics:
+
+    def test_samples_merge_per_minute_and_roll_up(self, extension_user):
+        from datetime import datetime
+        from app.models.live_metric import LiveMetricPoint
+        from app.services.live_metrics import LiveMetricsService
+
+        _, headers = extension_user
+        samples = [
+            {"sessionId": "S1", "timestamp": "2026-01-18T10:00:05Z", "viewers": 10, "likes": 1},
+            {"sessionId": "S1", "timestamp": "2026-01-18T10:00:50Z", "viewers": 8, "likes": 4, "revenue": "12.50"},
+            {"sessionId": "S1", "timestamp": "2026-01-18T10:01:10Z", "viewers": 20, "likes": 6},
+        ]
+        first = _sync(headers, "live_streaming", {"live_streaming": {"samples": samples[:2]}}, account_id="777", shop_name="Shop 777")
+        assert first.status_code == 200, first.text
+        db_account_id = first.json()["db_account_id"]
+        # A late retry of the first sample only bumps the count
+        _sync(headers, "live_streaming", {"live_streaming": samples[2]}, account_id="777", shop_name="Shop 777")
+        _sync(headers, "live_streaming", {"live_streaming": samples[0]}, account_id="777", shop_name="Shop 777")
+
+        db = TestingSessionLocal()
+        try:
+            curve = LiveMetricsService.get_curve(db, db_account_id, "S1")
+            assert curve["t"] == ["2026-01-18T10:00:00", "2026-01-18T10:01:00"]
+            assert curve["samples"] == [3, 1]
+            assert curve["viewers"] == [8, 20]
+            assert curve["viewers_peak"] == [10, 20]
+            assert curve["likes"] == [4, 6]
+            assert curve["revenue"] == [12.5, None]
+
+            coarse = LiveMetricsService.get_curve(db, db_account_id, "S1", "5m")
+            assert coarse["t"] == ["2026-01-18T10:00:00"]
+            assert coarse["viewers"] == [20] and coarse["revenue"] == [12.5]
+
+            result = LiveMetricsService.rollup(db, now=datetime(2026, 1, 30), retention_days=7)
+            assert result["points_rolled_up"] == 2
+            assert db.query(LiveMetricPoint).filter(LiveMetricPoint.resolution == "1m").count() == 0
+            assert LiveMetricsService.get_curve(db, db_account_id, "S1")["samples"] == [4]
+            assert LiveMetricsService.list_sessions(db, db_account_id)[0]["viewers_peak"] == 20
+        finally:
+            db.query(LiveMetricPoint).delete()
+            db.commit()
+            db.close()
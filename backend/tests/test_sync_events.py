@@ -0,0 +1,89 @@
+"""
+Tests for the compact extension sync audit (sync_events + blob store).
+
+Run: pytest tests/test_sync_events.py -v
+"""
+import json
+import os
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import Base
+from app.models.sync_event import SyncEvent
+from app.services.auto_connect import AutoConnectService
+from app.services.sync_blob_store import SyncBlobStore
+
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    """Setup test database before tests and cleanup after"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sync_blob_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "sync_payload_blobs", "errors")
+    return tmp_path
+
+
+def test_blob_store_dedupes_and_purges(blob_dir):
+    store = SyncBlobStore()
+    sha, written = store.put(b'{"a":1}')
+    assert written is True
+    assert store.put(b'{"a":1}') == (sha, False)
+    assert store.get(sha) == b'{"a":1}'
+
+    assert store.purge(retention_days=7) == 0
+    assert store.purge(retention_days=7, now=datetime.utcnow() + timedelta(days=8)) == 1
+    assert store.get(sha) is None
+
+
+def test_blob_purge_cutoff_ignores_local_timezone(blob_dir, monkeypatch):
+    import time
+
+    store = SyncBlobStore()
+    store.put(b'{"b":2}')
+    monkeypatch.setenv("TZ", "EST5")  # UTC-5: a naive UTC time read as local would be 5h late
+    time.tzset()
+    try:
+        assert store.purge(retention_days=1, now=datetime.utcnow() + timedelta(days=1, hours=-3)) == 0
+        assert store.purge(retention_days=1, now=datetime.utcnow() + timedelta(days=1, hours=1)) == 1
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_log_sync_keeps_summary_and_blob_only_for_failures(blob_dir):
+    payload = {"account": {"account_id": "123"}, "type": "transactions",
+               "data": {"transactions": [{"order_id": str(i)} for i in range(50)]}}
+    db = TestingSessionLocal()
+    AutoConnectService.log_sync(db, user_id=1, account_id=7, payload_type="transactions",
+                                success=True, raw_payload=payload, inserted=50, duration_ms=12)
+    AutoConnectService.log_sync(db, user_id=1, account_id=0, payload_type="transactions",
+                                success=False, raw_payload=payload, error_message="boom")
+    db.commit()
+
+    ok, failed = db.query(SyncEvent).order_by(SyncEvent.id).all()
+    db.query(SyncEvent).delete()
+    db.commit()
+    db.close()
+
+    assert ok.item_count == 50
+    assert ok.inserted == 50
+    assert ok.blob_stored is False
+    assert ok.payload_bytes == len(json.dumps(payload, sort_keys=True, separators=(",", ":")))
+
+    assert failed.account_id is None
+    assert failed.blob_stored is True
+    assert failed.payload_sha256 == ok.payload_sha256
+    assert json.loads(SyncBlobStore().get(failed.payload_sha256)) == payload
+    assert os.path.getsize(SyncBlobStore().path_for(failed.payload_sha256)) < failed.payload_bytes
@@ -7,49 +7,112 @@ const logger = require('./logger');
 const API_BASE = process.env.API_BASE || 'http://localhost:8000/api';
 const ACCESS_CODE = process.env.ACCESS_CODE || '';
 
-async function postSnapshot(payload) {
+async function postSnapshot(payload, attempts = 2) {
     const url = `${API_BASE}/bot/realtime-snapshots/ingest`;
 
     logger.debug(`POST ${url}`, payload.shopee_account_id);
 
+    for (let attempt = 1; attempt <= attempts; attempt++) {
+        try {
+            const response = await axios.post(url, payload, {
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Access-Code': ACCESS_CODE
+                },
+                timeout: 10000
+            });
+
+            if (response.data.deduplicated) {
+                logger.info(`Snapshot already stored: ${response.data.snapshot_id}`, payload.shopee_account_id);
+            } else {
+                logger.info(`Snapshot ingested: ${response.data.snapshot_id}`, payload.shopee_account_id);
+            }
+            return { success: true, data: response.data };
+
+        } catch (error) {
+            const msg = error.response?.data?.detail || error.message;
+            // Ingest is idempotent on (account, type, scraped_at), so timeouts
+            // and 5xx can be retried without creating duplicate rows
+            const retryable = !error.response || error.response.status >= 500;
+            if (retryable && attempt < attempts) {
+                logger.warn(`Ingest attempt ${attempt} failed, retrying: ${msg}`, payload.shopee_account_id);
+                continue;
+            }
+            logger.error(`Ingest failed: ${msg}`, payload.shopee_account_id);
+            return { success: false, error: msg };
+        }
+    }
+}
+
+async function postBatchSnapshots(snapshots) {
+    const url = `${API_BASE}/bot/realtime-snapshots/ingest-batch`;
+
     try {
-        const response = await axios.post(url, payload, {
+        const response = await axios.post(url, { snapshots }, {
             headers: {
                 'Content-Type': 'application/json',
                 'X-Access-Code': ACCESS_CODE
             },
-            timeout: 10000
+            timeout: 30000
         });
 
-        logger.info(`Snapshot ingested: ${response.data.snapshot_id}`, payload.shopee_account_id);
+        logger.info(`Batch ingested: ${response.data.ingested}/${response.data.total}`);
         return { success: true, data: response.data };
 
     } catch (error) {
-        const msg = error.response?.data?.detail || error.message;
-        logger.error(`Ingest failed: ${msg}`, payload.shopee_account_id);
-        return { success: false, error: msg };
+        logger.error(`Batch ingest failed: ${error.message}`);
+        return { success: false, error: error.message };
     }
 }
 
-async function postBatchSnapshots(snapshots) {
-    const url = `${API_BASE}/bot/realtime-snapshots/ingest-batch`;
+async function postHeartbeat(heartbeat) {
+    const url = `${API_BASE}/bot/heartbeat`;
 
     try {
-        const response = await axios.post(url, { snapshots }, {
+        const response = await axios.post(url, heartbeat, {
             headers: {
                 'Content-Type': 'application/json',
                 'X-Access-Code': ACCESS_CODE
             },
-            timeout: 30000
+            timeout: 10000
         });
 
-        logger.info(`Batch ingested: ${response.data.ingested}/${response.data.total}`);
+        logger.debug(`Heartbeat sent: ${heartbeat.worker_id} (${heartbeat.status})`);
         return { success: true, data: response.data };
 
     } catch (error) {
-        logger.error(`Batch ingest failed: ${error.message}`);
+        // Heartbeats are best-effort; never fail a cycle because of them
+        logger.warn(`Heartbeat failed: ${error.message}`);
         return { success: false, error: error.message };
     }
 }
 
-module.exports = { postSnapshot, postBatchSnapshots };
+/**
+ * Bot run lifecycle: POST /bot/runs/start, /bot/runs/:id/progress, /bot/runs/:id/finish
+ * Best-effort like heartbeats; a failed call is logged and returns null.
+ */
+async function postRunEvent(path, body) {
+    const url = `${API_BASE}/bot/runs${path}`;
+
+    try {
+        const response = await axios.post(url, body, {
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Access-Code': ACCESS_CODE
+            },
+            timeout: 10000
+        });
+        return response.data;
+
+    } catch (error) {
+        const msg = error.response?.data?.detail || error.message;
+        logger.warn(`Run event ${path} failed: ${msg}`);
+        return null;
+    }
+}
+
+const startRun = (body) => postRunEvent('/start', body);
+const reportRunProgress = (runId, body) => postRunEvent(`/${runId}/progress`, body);
+const finishRun = (runId, body) => postRunEvent(`/${runId}/finish`, body);
+
+module.exports = { postSnapshot, postBatchSnapshots, postHeartbeat, startRun, reportRunProgress, finishRun };
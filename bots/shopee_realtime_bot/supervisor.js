@@ -3,8 +3,11 @@
  * Manages worker pool, scheduling, and crash recovery
  */
 const { scrapeAccount } = require('./worker');
+const { postHeartbeat, startRun, reportRunProgress, finishRun } = require('./lib/uploader');
+const crypto = require('crypto');
 const logger = require('./lib/logger');
 const fs = require('fs');
+const os = require('os');
 const path = require('path');
 
 // Configuration
@@ -12,7 +15,9 @@ const CONFIG = {
     ACCOUNTS_FILE: path.join(__dirname, 'config', 'accounts.json'),
     MAX_PARALLEL_WORKERS: parseInt(process.env.MAX_WORKERS) || 5,
     SYNC_INTERVAL_MS: parseInt(process.env.SYNC_INTERVAL) || 60000, // 60 seconds
-    RETRY_DELAY_MS: 5000
+    RETRY_DELAY_MS: 5000,
+    HEARTBEAT_INTERVAL_MS: parseInt(process.env.HEARTBEAT_INTERVAL) || 30000,
+    WORKER_ID: process.env.WORKER_ID || `${os.hostname()}-${process.pid}`
 };
 
 // State
@@ -44,26 +49,57 @@ function loadAccounts() {
 /**
  * Process accounts in batches
  */
-async function processBatch(batch) {
+async function processBatch(batch, runId) {
     const promises = batch.map(async (account) => {
+        const startedAt = Date.now();
+        let result;
         try {
-            const result = await scrapeAccount(account);
+            result = await scrapeAccount(account);
             if (result.success) {
                 stats.successCount++;
             } else {
                 stats.failCount++;
             }
-            return result;
         } catch (error) {
             logger.error(`Worker crashed for ${account.shopee_account_id}: ${error.message}`);
             stats.failCount++;
-            return { success: false, error: error.message };
+            result = { success: false, error: error.message };
         }
+        result.account = account;
+        result.durationMs = Date.now() - startedAt;
+
+        await reportRunProgress(runId, {
+            shopee_account_id: account.shopee_account_id,
+            success: !!result.success,
+            duration_ms: result.durationMs,
+            snapshots: (result.snapshots || []).length
+        });
+        return result;
     });
 
     return Promise.all(promises);
 }
 
+/**
+ * Report liveness (and cycle results, when given) to the backend
+ */
+function sendHeartbeat(status, cycleResults = null, cycleDurationMs = null) {
+    const heartbeat = { worker_id: CONFIG.WORKER_ID, status, accounts: [] };
+
+    if (cycleResults) {
+        heartbeat.cycle_duration_ms = cycleDurationMs;
+        heartbeat.accounts = cycleResults.map(r => ({
+            shopee_account_id: r.account.shopee_account_id,
+            shop_name: r.account.shop_name,
+            success: !!r.success,
+            duration_ms: r.durationMs,
+            error: r.error || null
+        }));
+    }
+
+    return postHeartbeat(heartbeat);
+}
+
 /**
  * Run a complete sync cycle for all accounts
  */
@@ -72,12 +108,21 @@ async function runCycle() {
     const cycleStart = Date.now();
     logger.info(`=== CYCLE ${currentCycle} STARTING (${accounts.length} accounts) ===`);
 
+    const cycleResults = [];
+    const runId = crypto.randomUUID();
+    await startRun({
+        run_id: runId,
+        worker_id: CONFIG.WORKER_ID,
+        accounts_total: accounts.length,
+        max_workers: CONFIG.MAX_PARALLEL_WORKERS
+    });
+
     // Process in batches
     for (let i = 0; i < accounts.length; i += CONFIG.MAX_PARALLEL_WORKERS) {
         const batch = accounts.slice(i, i + CONFIG.MAX_PARALLEL_WORKERS);
         logger.info(`Processing batch ${Math.floor(i / CONFIG.MAX_PARALLEL_WORKERS) + 1}: ${batch.map(a => a.shop_name).join(', ')}`);
 
-        await processBatch(batch);
+        cycleResults.push(...await processBatch(batch, runId));
 
         // Small delay between batches to prevent overwhelming
         if (i + CONFIG.MAX_PARALLEL_WORKERS < accounts.length) {
@@ -85,10 +130,14 @@ async function runCycle() {
         }
     }
 
-    const duration = ((Date.now() - cycleStart) / 1000).toFixed(1);
+    const durationMs = Date.now() - cycleStart;
+    const duration = (durationMs / 1000).toFixed(1);
     stats.totalCycles++;
     stats.lastCycleAt = new Date().toISOString();
 
+    await finishRun(runId, { status: 'completed' });
+    await sendHeartbeat('running', cycleResults, durationMs);
+
     logger.info(`=== CYCLE ${currentCycle} COMPLETED in ${duration}s (success: ${stats.successCount}, fail: ${stats.failCount}) ===`);
 }
 
@@ -109,6 +158,16 @@ async function startSupervisor() {
 
     isRunning = true;
 
+    // Liveness pings between cycles, so a hung browser shows up as stale accounts
+    // while the worker itself keeps reporting
+    const heartbeatId = setInterval(() => {
+        if (!isRunning) {
+            clearInterval(heartbeatId);
+            return;
+        }
+        sendHeartbeat('running');
+    }, CONFIG.HEARTBEAT_INTERVAL_MS);
+
     // Run immediately on start
     await runCycle();
 
@@ -140,6 +199,7 @@ async function startSupervisor() {
 function shutdown(signal) {
     logger.info(`${signal} received. Shutting down gracefully...`);
     isRunning = false;
+    sendHeartbeat('stopped');
 
     logger.info('=== FINAL STATS ===');
     logger.info(`Total cycles: ${stats.totalCycles}`);
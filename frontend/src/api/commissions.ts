@@ -24,6 +24,41 @@ export interface PayoutRow {
 export interface PayoutHistoryResponse {
     summary: PayoutSummary
     rows: PayoutRow[]
+    next_cursor: string | null
+    total_count: number | null
+}
+
+export interface MarkPaidChunk {
+    chunk: number
+    ids: number
+    matched: number
+    updated: number
+    ms?: number
+}
+
+export interface MarkPaidResult {
+    message: string
+    total_ids: number
+    matched: number
+    updated: number
+    chunks: MarkPaidChunk[]
+}
+
+export interface PayoutBatch {
+    id: number
+    status: 'queued' | 'running' | 'completed' | 'failed'
+    payment_method: string
+    source: 'ids' | 'file'
+    filename: string | null
+    total_ids: number
+    ids_processed: number
+    chunks_done: number
+    progress: number | null
+    matched: number
+    updated: number
+    not_found: number
+    chunk_stats: MarkPaidChunk[]
+    error_message: string | null
 }
 
 export interface PayoutParams {
@@ -32,6 +67,8 @@ export interface PayoutParams {
     status?: string
     search?: string
     account_id?: number
+    cursor?: string
+    limit?: number
 }
 
 // Commissions API
@@ -60,8 +97,28 @@ export const commissionsApi = {
     },
 
     // Mark paid (bulk)
-    markPaid: async (orderIds: string[]) => {
-        const response = await api.post('/commissions/mark-paid', { order_ids: orderIds })
+    markPaid: async (orderIds: string[], paymentMethod = 'transfer'): Promise<MarkPaidResult> => {
+        const response = await api.post('/commissions/mark-paid', { order_ids: orderIds, payment_method: paymentMethod })
+        return response.data
+    },
+
+    // Mark paid in the background (large lists); poll getPayoutBatch for progress
+    createPayoutBatch: async (orderIds: string[], paymentMethod = 'transfer'): Promise<PayoutBatch> => {
+        const response = await api.post('/commissions/mark-paid/batches', { order_ids: orderIds, payment_method: paymentMethod })
+        return response.data
+    },
+
+    // Mark paid from a CSV/text file of order ids
+    uploadPayoutBatch: async (file: File, paymentMethod = 'transfer'): Promise<PayoutBatch> => {
+        const formData = new FormData()
+        formData.append('file', file)
+        formData.append('payment_method', paymentMethod)
+        const response = await api.post('/commissions/mark-paid/batches/upload', formData)
+        return response.data
+    },
+
+    getPayoutBatch: async (batchId: number): Promise<PayoutBatch> => {
+        const response = await api.get(`/commissions/mark-paid/batches/${batchId}`)
         return response.data
     }
 }
@@ -21,6 +21,26 @@ export interface ImportResult {
     }>
 }
 
+export interface ImportJob extends ImportResult {
+    id: number
+    status: 'queued' | 'running' | 'completed' | 'failed'
+    filename: string
+    total_rows: number | null
+    rows_processed: number
+    chunks_done: number
+    progress: number | null
+    chunk_stats: Array<{
+        chunk: number
+        rows: number
+        inserted: number
+        updated: number
+        skipped: number
+        failed: number
+        ms: number
+    }>
+    error_message: string | null
+}
+
 export const importApi = {
     // Preview CSV
     previewCsv: async (file: File): Promise<ImportPreviewResponse> => {
@@ -42,5 +62,43 @@ export const importApi = {
     }): Promise<ImportResult> => {
         const response = await api.post('/import/csv/execute', data)
         return response.data
+    },
+
+    // Execute Import on the file itself (parsed server-side)
+    executeImportFile: async (file: File, data: {
+        shop_id: number
+        import_type: string
+        mapping: Record<string, string>
+    }): Promise<ImportResult> => {
+        const formData = new FormData()
+        formData.append('file', file)
+        formData.append('shop_id', String(data.shop_id))
+        formData.append('import_type', data.import_type)
+        formData.append('mapping', JSON.stringify(data.mapping))
+
+        const response = await api.post('/import/csv/execute-file', formData)
+        return response.data
+    },
+
+    // Start a chunked server-side import job (CSV or XLSX)
+    createImportJob: async (file: File, data: {
+        shop_id: number
+        import_type: string
+        mapping: Record<string, string>
+    }): Promise<ImportJob> => {
+        const formData = new FormData()
+        formData.append('file', file)
+        formData.append('shop_id', String(data.shop_id))
+        formData.append('import_type', data.import_type)
+        formData.append('mapping', JSON.stringify(data.mapping))
+
+        const response = await api.post('/import/jobs', formData)
+        return response.data
+    },
+
+    // Poll import job progress
+    getImportJob: async (jobId: number): Promise<ImportJob> => {
+        const response = await api.get(`/import/jobs/${jobId}`)
+        return response.data
     }
 }
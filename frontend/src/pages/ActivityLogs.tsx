@@ -11,26 +11,46 @@ interface ActivityLog {
     created_at: string
 }
 
+interface ActivityLogPage {
+    items: ActivityLog[]
+    next_cursor: string | null
+    approximate_total: number | null
+}
+
 const ActivityLogs: React.FC = () => {
     const [logs, setLogs] = useState<ActivityLog[]>([])
     const [loading, setLoading] = useState(true)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [error, setError] = useState<string | null>(null)
+    const [nextCursor, setNextCursor] = useState<string | null>(null)
+    const [approxTotal, setApproxTotal] = useState<number | null>(null)
 
     useEffect(() => {
         fetchLogs()
     }, [])
 
-    const fetchLogs = async () => {
+    const fetchLogs = async (cursor?: string) => {
         try {
-            setLoading(true)
+            if (cursor) {
+                setLoadingMore(true)
+            } else {
+                setLoading(true)
+            }
             setError(null)
-            const response = await api.get('/activity-logs')
-            setLogs(response.data)
+            const response = await api.get<ActivityLogPage>('/activity-logs/page', {
+                params: { cursor, include_total: !cursor }
+            })
+            setLogs(prev => (cursor ? [...prev, ...response.data.items] : response.data.items))
+            setNextCursor(response.data.next_cursor)
+            if (!cursor) {
+                setApproxTotal(response.data.approximate_total)
+            }
         } catch (err: any) {
             console.error('Failed to fetch activity logs:', err)
             setError(err.response?.data?.detail || 'Failed to load activity logs')
         } finally {
             setLoading(false)
+            setLoadingMore(false)
         }
     }
 
@@ -68,7 +88,7 @@ const ActivityLogs: React.FC = () => {
             <div className="bg-red-50 border border-red-200 rounded-lg p-4">
                 <p className="text-red-600">{error}</p>
                 <button
-                    onClick={fetchLogs}
+                    onClick={() => fetchLogs()}
                     className="mt-2 text-red-700 hover:text-red-900 underline"
                 >
                     Try again
@@ -93,7 +113,7 @@ const ActivityLogs: React.FC = () => {
                     <p className="text-gray-500">Pantau siapa ngapain aja di dashboard, biar nggak ada drama.</p>
                 </div>
                 <button
-                    onClick={fetchLogs}
+                    onClick={() => fetchLogs()}
                     className="bg-blue-600 text-white px-4 py-2 rounded-lg hover:bg-blue-700"
                 >
                     Refresh
@@ -150,6 +170,20 @@ const ActivityLogs: React.FC = () => {
                             ))}
                         </tbody>
                     </table>
+                    {nextCursor && (
+                        <div className="flex items-center justify-center gap-3 p-4 border-t text-sm text-gray-500">
+                            <span>
+                                {logs.length}{approxTotal !== null && ` / ~${approxTotal}`} baris
+                            </span>
+                            <button
+                                onClick={() => fetchLogs(nextCursor)}
+                                disabled={loadingMore}
+                                className="px-4 py-2 rounded-lg border hover:bg-gray-50 disabled:opacity-50"
+                            >
+                                Muat lebih banyak
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>
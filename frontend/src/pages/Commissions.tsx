@@ -14,6 +14,8 @@ const Commissions: React.FC = () => {
   // State
   const [loading, setLoading] = useState(false)
   const [data, setData] = useState<PayoutRow[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [totalCount, setTotalCount] = useState<number | null>(null)
   const [summary, setSummary] = useState<PayoutSummary | null>(null)
   const [accounts, setAccounts] = useState<any[]>([])
 
@@ -46,7 +48,7 @@ const Commissions: React.FC = () => {
     }
   }
 
-  const fetchData = async () => {
+  const fetchData = async (cursor?: string) => {
     try {
       setLoading(true)
       const res = await commissionsApi.getPayoutHistory({
@@ -54,9 +56,12 @@ const Commissions: React.FC = () => {
         to: toDate,
         status: statusFilter === 'all' ? undefined : statusFilter,
         search: searchQuery || undefined,
-        account_id: accountId || undefined
+        account_id: accountId || undefined,
+        cursor
       })
-      setData(res.rows)
+      setData(prev => (cursor ? [...prev, ...res.rows] : res.rows))
+      setNextCursor(res.next_cursor)
+      setTotalCount(res.total_count)
       setSummary(res.summary)
     } catch (err) {
       console.error(err)
@@ -122,7 +127,7 @@ const Commissions: React.FC = () => {
         </div>
         <div className="flex gap-2">
           <button
-            onClick={fetchData}
+            onClick={() => fetchData()}
             title="Update hasil terbaru biar nggak ketinggalan."
             className="px-4 py-2 bg-white border border-slate-300 rounded-lg hover:bg-slate-50 text-slate-700 font-medium transition-colors"
           >
@@ -283,6 +288,20 @@ const Commissions: React.FC = () => {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="flex items-center justify-center gap-3 p-4 border-t text-sm text-gray-500">
+            <span>
+              {data.length}{totalCount !== null && ` / ${totalCount}`} baris
+            </span>
+            <button
+              onClick={() => fetchData(nextCursor)}
+              disabled={loading}
+              className="px-4 py-2 rounded-lg border hover:bg-gray-50 disabled:opacity-50"
+            >
+              Muat lebih banyak
+            </button>
+          </div>
+        )}
       </div>
     </div>
   )
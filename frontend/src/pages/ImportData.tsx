@@ -24,6 +24,7 @@ const ImportData: React.FC = () => {
     const [preview, setPreview] = useState<ImportPreviewResponse | null>(null)
     const [mapping, setMapping] = useState<Record<string, string>>({})
     const [result, setResult] = useState<ImportResult | null>(null)
+    const [progress, setProgress] = useState<number | null>(null)
 
     useEffect(() => {
         fetchAccounts()
@@ -84,66 +85,34 @@ const ImportData: React.FC = () => {
         }
     }
 
-    // handleExecute removed - using handleExecuteWithParsing instead
-
-    const parseCsvLocally = (file: File): Promise<any[]> => {
-        return new Promise((resolve) => {
-            const reader = new FileReader()
-            reader.onload = (e) => {
-                const text = e.target?.result as string
-                const lines = text.split('\n')
-                if (lines.length < 2) return resolve([])
-
-                // Simple parser handling quotes roughly (Streamo MVP style)
-                // Ideally use PapaParse but I don't want to install new deps if possible.
-                // Let's assume standard CSV.
-                // Actually, `papa-parse` is standard. Let's see if installed. Probably not.
-                // I'll write a simple quote-aware splitter.
-
-                const headers = lines[0].split(',').map(h => h.trim().replace(/^"|"$/g, ''))
-                const result = []
-
-                for (let i = 1; i < lines.length; i++) {
-                    if (!lines[i].trim()) continue
-                    const row: any = {}
-                    // Handle commas inside quotes logic? 
-                    // For MVP, lets assume simple CSV or use a regex.
-                    const values = lines[i].match(/(".*?"|[^",\s]+)(?=\s*,|\s*$)/g) || lines[i].split(',')
-
-                    headers.forEach((h, idx) => {
-                        let val = values[idx] || ''
-                        val = val.trim().replace(/^"|"$/g, '')
-                        row[h] = val
-                    })
-                    result.push(row)
-                }
-                resolve(result)
-            }
-            reader.readAsText(file)
-        })
-    }
-
     const handleExecuteWithParsing = async () => {
         if (!file || !preview || !selectedAccountId) return
 
         try {
             setLoading(true)
-            // Parse locally
-            const rows = await parseCsvLocally(file)
-
-            const res = await importApi.executeImport({
+            // Upload the file itself; the server imports it in chunks
+            let job = await importApi.createImportJob(file, {
                 shop_id: selectedAccountId,
                 import_type: preview.detected_type === 'unknown' ? 'sales' : preview.detected_type,
-                mapping: mapping,
-                rows: rows
+                mapping: mapping
             })
 
-            setResult(res)
+            while (job.status === 'queued' || job.status === 'running') {
+                setProgress(job.progress)
+                await new Promise(resolve => setTimeout(resolve, 2000))
+                job = await importApi.getImportJob(job.id)
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error_message || 'Gagal import')
+            }
+
+            setResult(job)
             setStep(3)
         } catch (err: any) {
             setError(err.message || 'Gagal import')
         } finally {
             setLoading(false)
+            setProgress(null)
         }
     }
 
@@ -216,7 +185,7 @@ const ImportData: React.FC = () => {
                         <div className="border-2 border-dashed border-slate-300 rounded-xl p-8 text-center hover:bg-slate-50 transition-colors relative">
                             <input
                                 type="file"
-                                accept=".csv"
+                                accept=".csv,.xlsx"
                                 onChange={handleFileChange}
                                 className="absolute inset-0 w-full h-full opacity-0 cursor-pointer"
                             />
@@ -292,7 +261,7 @@ const ImportData: React.FC = () => {
                         {loading ? (
                             <>
                                 <RefreshCw className="animate-spin" />
-                                Memproses Data...
+                                Memproses Data...{progress !== null && ` ${Math.round(progress * 100)}%`}
                             </>
                         ) : (
                             <>